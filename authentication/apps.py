@@ -5,3 +5,7 @@ class AuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
     label = 'authentication'
+
+    def ready(self):
+        # Register signal receivers for the tenant cache
+        from . import signals  # noqa: F401
@@ -0,0 +1,136 @@
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Empty
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import Tenant
+from authentication.permissions import IsTenantMember
+from core.authentication import TenantTokenUser
+from core.permissions import IsTenantUser
+from hr.views import StaffViewSet
+from inventory.models import Product
+from inventory.views import ProductImageViewSet, ProductViewSet
+
+
+class Command(BaseCommand):
+    help = 'Benchmark tenant permission checks on upload and detail endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=500,
+            help='Number of simulated requests per scenario',
+        )
+        parser.add_argument(
+            '--upload-kb',
+            type=int,
+            default=2048,
+            help='Size of the simulated multipart upload in KB',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        upload = b'\0' * (options['upload_kb'] * 1024)
+
+        # Everything is built in memory: no rows are read or written
+        tenant = Tenant(tenant_id=1, business_name='Benchmark', plan='Basic', status='Active')
+        token = AccessToken()
+        token['user_id'] = 1
+        token['tenant_id'] = tenant.pk
+        user = TenantTokenUser(token)
+        factory = APIRequestFactory()
+
+        self.stdout.write(f'Permission benchmark ({iterations} requests per scenario)\n')
+
+        for label, view_class, field in [
+            ('product image upload', ProductImageViewSet, 'image'),
+            ('staff Aadhaar upload', StaffViewSet, 'aadhaar_file'),
+        ]:
+            def build():
+                request = factory.post(
+                    '/upload/',
+                    {field: SimpleUploadedFile('file.jpg', upload, content_type='image/jpeg')},
+                    format='multipart',
+                )
+                force_authenticate(request, user=user, token=token)
+                return request
+
+            check_ms, parsed = self.time_permissions(view_class, build, tenant, iterations)
+            parse_ms = self.time_body_parse(view_class, build, tenant, iterations)
+            self.stdout.write(
+                f'  {label:<24} permission checks {check_ms:8.4f} ms/request, '
+                f'body parsed by checks: {"yes" if parsed else "no"} '
+                f'(a full parse of the {options["upload_kb"]} KB body costs {parse_ms:.4f} ms)'
+            )
+
+        product = Product(product_id=1, tenant_id=tenant.pk, name='Benchmark', sku='BENCH')
+
+        def build_detail():
+            request = factory.get('/products/1/')
+            force_authenticate(request, user=user, token=token)
+            return request
+
+        check_ms, queries = self.time_object_permissions(ProductViewSet, build_detail, tenant, product, iterations)
+        self.stdout.write(
+            f'  {"product detail":<24} object checks     {check_ms:8.4f} ms/request, '
+            f'queries: {queries}'
+        )
+        self.stdout.write(self.style.SUCCESS('\nDone.'))
+
+    def prepare(self, view_class, django_request, tenant, action):
+        view = view_class(action_map={django_request.method.lower(): action})
+        view.args, view.kwargs = (), {}
+        view.format_kwarg = None
+        view.headers = {}
+        request = view.initialize_request(django_request)
+        request.tenant = tenant
+        view.request = request
+        return view, request
+
+    def get_permissions(self, view):
+        """The view's own permissions plus both tenant permission classes."""
+        permissions = view.get_permissions()
+        present = {type(permission) for permission in permissions}
+        return permissions + [
+            cls() for cls in (IsTenantUser, IsTenantMember) if cls not in present
+        ]
+
+    def time_permissions(self, view_class, build, tenant, iterations):
+        elapsed = 0.0
+        parsed = False
+        for _ in range(iterations):
+            view, request = self.prepare(view_class, build(), tenant, 'create')
+            permissions = self.get_permissions(view)
+            started = time.perf_counter()
+            for permission in permissions:
+                permission.has_permission(request, view)
+            elapsed += time.perf_counter() - started
+            parsed = parsed or request._data is not Empty
+        return elapsed * 1000 / iterations, parsed
+
+    def time_body_parse(self, view_class, build, tenant, iterations):
+        elapsed = 0.0
+        for _ in range(iterations):
+            _, request = self.prepare(view_class, build(), tenant, 'create')
+            started = time.perf_counter()
+            request.data
+            elapsed += time.perf_counter() - started
+        return elapsed * 1000 / iterations
+
+    def time_object_permissions(self, view_class, build, tenant, obj, iterations):
+        elapsed = 0.0
+        with CaptureQueriesContext(connection) as captured:
+            for _ in range(iterations):
+                view, request = self.prepare(view_class, build(), tenant, 'retrieve')
+                permissions = self.get_permissions(view)
+                started = time.perf_counter()
+                for permission in permissions:
+                    permission.has_object_permission(request, view, obj)
+                elapsed += time.perf_counter() - started
+        return elapsed * 1000 / iterations, len(captured.captured_queries)
@@ -24,7 +24,7 @@ class IsTenantMember(permissions.BasePermission):
     
     This permission provides object-level validation by:
     1. Checking JWT token's tenant_id claim
-    2. Comparing it against URL parameters or request data
+    2. Comparing it against URL or query-string parameters
     3. Validating object ownership at the object level
     
     Use this in combination with IsTenantUser for defense-in-depth security.
@@ -39,8 +39,11 @@ class IsTenantMember(permissions.BasePermission):
         
         token_tenant_id = token.get("tenant_id")
         
-        # If views accept tenant_id in URL or query, validate it matches token
-        url_tenant_id = view.kwargs.get("tenant_id") or request.data.get("tenant_id")
+        # If views accept tenant_id in the URL or query string, validate it matches the token.
+        # The request body is deliberately not inspected: reading request.data would
+        # force DRF to parse every body (including multipart uploads) before the view
+        # runs, and writes always take their tenant from request.tenant anyway.
+        url_tenant_id = view.kwargs.get("tenant_id") or request.query_params.get("tenant_id")
         if url_tenant_id:
             return str(token_tenant_id) == str(url_tenant_id)
         
@@ -54,10 +57,7 @@ class IsTenantMember(permissions.BasePermission):
             return False
         
         token_tenant_id = token.get("tenant_id")
+        # Compare ids only; never follow obj.tenant, which would load the Tenant row
         obj_tenant_id = getattr(obj, "tenant_id", None)
         
-        # Handle both direct tenant_id and tenant FK
-        if obj_tenant_id is None and hasattr(obj, "tenant"):
-            obj_tenant_id = getattr(obj.tenant, "tenant_id", None)
-        
         return str(token_tenant_id) == str(obj_tenant_id)
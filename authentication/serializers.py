@@ -13,7 +13,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     Custom JWT serializer that adds tenant_id and role to token claims.
     
     This allows the frontend to know which tenant the user belongs to
-    and what their role is without making additional API calls.
+    and what their role is without making additional API calls, and lets
+    the backend authenticate requests without loading the User row.
     """
     
     @classmethod
@@ -25,7 +26,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             user: The authenticated User instance
             
         Returns:
-            Token with additional claims: user_id, tenant_id, role
+            Token with additional claims: user_id, tenant_id, role, staff_id,
+            email, is_staff, is_superuser
         """
         try:
             # Get the base token from parent class
@@ -48,6 +50,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             
             token["tenant_id"] = tenant_id
             token["role"] = getattr(user, "role", None)
+
+            # Claims read by JWTStatelessTenantAuthentication instead of the User row
+            token["staff_id"] = getattr(user, "staff_profile_id", None)
+            token["email"] = user.email
+            token["is_staff"] = user.is_staff
+            token["is_superuser"] = user.is_superuser
             
             logger.info(f"Token generated successfully for user {user.email} (tenant: {tenant_id}, role: {token['role']})")
             return token
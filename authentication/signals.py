@@ -0,0 +1,18 @@
+"""
+Signal receivers keeping the process-level tenant cache fresh.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.tenants import invalidate_tenant
+from .models import Tenant, User
+
+
+@receiver([post_save, post_delete], sender=Tenant)
+def drop_cached_tenant(sender, instance, **kwargs):
+    invalidate_tenant(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=User)
+def drop_cached_user_tenant(sender, instance, **kwargs):
+    invalidate_tenant(instance.tenant_id)
@@ -1,8 +1,17 @@
 from django.test import TestCase
 from django.urls import reverse
-from rest_framework.test import APIClient
+from django.utils import timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
 from rest_framework import status
+from core.permissions import IsTenantUser
+from sales.models import Customer
 from .models import User, Tenant
+from .permissions import IsTenantMember
+from .serializers import CustomTokenObtainPairSerializer
 
 class TenantProvisioningTest(TestCase):
     def setUp(self):
@@ -72,3 +81,111 @@ class TenantProvisioningTest(TestCase):
         }
         response = client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class StatelessTenantAuthenticationTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(
+            business_name="Test Store",
+            plan="Standard",
+            status="Active",
+            sub_end_date=timezone.now() + timezone.timedelta(days=30),
+        )
+        User.objects.create_user(
+            email='owner@store.com', password='password123', tenant=self.tenant, role='Admin'
+        )
+        self.client = APIClient()
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'owner@store.com',
+            'password': 'password123'
+        })
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        # an uncached list endpoint (the catalog lists are served from cache)
+        self.url = reverse('customer-list')
+
+    def test_authenticated_request_needs_no_auth_queries(self):
+        # first request warms the tenant cache
+        self.client.get(self.url)
+        # only the customers' cache version and the page itself are queried
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_tenant_save_invalidates_cache(self):
+        self.client.get(self.url)
+        self.tenant.business_name = "Renamed Store"
+        self.tenant.save()
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+
+class TenantPermissionTest(TestCase):
+    """IsTenantUser + IsTenantMember on a bare view, with a real access token."""
+
+    def setUp(self):
+        self.tenant, self.other_tenant = [
+            Tenant.objects.create(
+                business_name=name,
+                plan="Standard",
+                status="Active",
+                sub_end_date=timezone.now() + timezone.timedelta(days=30),
+            )
+            for name in ("Test Store", "Other Store")
+        ]
+        self.user = User.objects.create_user(
+            email='owner@store.com', password='password123', tenant=self.tenant, role='Admin'
+        )
+        self.token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.own = Customer.objects.create(tenant=self.tenant, name="Walk-in")
+        self.foreign = Customer.objects.create(tenant=self.other_tenant, name="Elsewhere")
+        self.parsed = []
+
+        parsed = self.parsed
+
+        class RecordingParser(MultiPartParser):
+            def parse(self, *args, **kwargs):
+                parsed.append(True)
+                return super().parse(*args, **kwargs)
+
+        class CustomerView(APIView):
+            permission_classes = [IsTenantUser, IsTenantMember]
+            parser_classes = [RecordingParser]
+
+            def get(self, request, pk):
+                self.check_object_permissions(request, view_objects[pk])
+                return Response({"ok": True})
+
+            def post(self, request, pk):
+                return Response({"ok": True})
+
+        view_objects = {self.own.pk: self.own, self.foreign.pk: self.foreign}
+        self.view = CustomerView.as_view()
+        self.factory = APIRequestFactory()
+
+    def call(self, request, pk):
+        force_authenticate(request, user=self.user, token=self.token)
+        request.tenant = self.tenant  # set by CurrentTenantMiddleware
+        return self.view(request, pk=pk)
+
+    def test_mismatched_query_tenant_id_is_denied(self):
+        request = self.factory.get("/", {"tenant_id": self.other_tenant.pk})
+        self.assertEqual(self.call(request, self.own.pk).status_code, status.HTTP_403_FORBIDDEN)
+        request = self.factory.get("/", {"tenant_id": self.tenant.pk})
+        self.assertEqual(self.call(request, self.own.pk).status_code, status.HTTP_200_OK)
+
+    def test_cross_tenant_object_is_denied(self):
+        response = self.call(self.factory.get("/"), self.foreign.pk)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_object_check_costs_no_tenant_query(self):
+        with self.assertNumQueries(0):
+            response = self.call(self.factory.get("/"), self.own.pk)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_multipart_body_is_not_parsed_by_permissions(self):
+        upload = SimpleUploadedFile("products.csv", b"name,sku\n", content_type="text/csv")
+        request = self.factory.post(
+            "/", {"file": upload, "tenant_id": self.other_tenant.pk}, format="multipart"
+        )
+        self.assertEqual(self.call(request, self.own.pk).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.parsed, [])
@@ -1,35 +1,88 @@
 """
 Custom authentication classes for the BOS system.
 """
+from django.utils.functional import cached_property
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .tenants import get_tenant
 
 
 class JWTAuthenticationWithTenant(JWTAuthentication):
     """
     Custom JWT authentication that also sets request.tenant.
-    
+
     This solves the issue where middleware runs before JWT authentication,
     so request.tenant would be None even though the user has a tenant.
-    
+
     By setting the tenant here (after successful JWT auth), we ensure
     that request.tenant is available for permission checks and view logic.
     """
-    
+
     def authenticate(self, request):
         """
         Authenticate the request and set the tenant.
-        
+
         Returns:
             tuple: (user, token) if authentication successful
             None: if authentication failed
         """
         # Call parent JWT authentication
         result = super().authenticate(request)
-        
+
         if result is not None:
             user, token = result
-            
-            # Set tenant on request from authenticated user
-            request.tenant = getattr(user, 'tenant', None)
-        
+
+            # Set tenant on request from the process-level tenant cache
+            request.tenant = get_tenant(getattr(user, 'tenant_id', None))
+
         return result
+
+
+class TenantTokenUser(TokenUser):
+    """
+    Lightweight user built from the access token's claims.
+
+    Exposes the claims added by CustomTokenObtainPairSerializer (tenant_id,
+    role, staff_id, email, is_staff, is_superuser) without loading the User
+    row. The tenant comes from the process-level tenant cache.
+    """
+
+    @cached_property
+    def tenant_id(self):
+        return self.token.get("tenant_id")
+
+    @cached_property
+    def tenant(self):
+        return get_tenant(self.tenant_id)
+
+    @cached_property
+    def role(self):
+        return self.token.get("role")
+
+    @cached_property
+    def staff_profile(self):
+        """Linked Staff profile, loaded on first access only."""
+        staff_id = self.token.get("staff_id")
+        if not staff_id:
+            return None
+        from hr.models import Staff
+        return Staff.objects.filter(pk=staff_id, tenant_id=self.tenant_id).first()
+
+
+class JWTStatelessTenantAuthentication(JWTAuthenticationWithTenant):
+    """
+    JWT authentication that trusts the token's claims instead of loading the
+    User row, so an authenticated request needs no auth queries at all.
+
+    request.user is a TenantTokenUser and request.tenant comes from the
+    tenant cache. Changes to a user (deactivation, role change) take effect
+    when their access token expires (ACCESS_TOKEN_LIFETIME).
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return TenantTokenUser(validated_token)
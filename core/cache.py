@@ -0,0 +1,131 @@
+"""
+Caching helpers shared by the BOS apps.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CacheNamespace
+
+
+class TTLCache:
+    """
+    Thread-safe, process-level cache with a per-entry TTL and LRU eviction.
+
+    Entries live in the memory of one worker process, so they are only
+    suitable for small, hot data (tenants, lookup indexes) that is cheap to
+    reload and is invalidated explicitly on writes.
+    """
+
+    def __init__(self, ttl, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+
+    def get_or_set(self, key, loader):
+        """
+        Return the cached value for ``key``, calling ``loader()`` to fill it on
+        a miss. The loader runs outside the lock, so concurrent misses may load
+        the same value twice but never block each other.
+        """
+        sentinel = _MISSING
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_MISSING = object()
+
+
+# ------------------------------------------------ tenant-namespaced caching
+#
+# Entries cached for a tenant live in a namespace ("catalog", ...) whose
+# current version is part of every key. Writes bump the version instead of
+# deleting entries: old entries become unreachable and simply expire.
+#
+# Versions live in the database (CacheNamespace), not in the cache, so a
+# bump made by one worker process reaches every other worker even when the
+# entries themselves are cached per process. Reading the version costs one
+# primary-key-sized lookup per request. Versions start from the current time
+# in ms, so a namespace row that is recreated never comes back with a number
+# that old entries were stored under.
+
+def tenant_cache():
+    return caches[getattr(settings, "TENANT_CACHE_ALIAS", "default")]
+
+
+def namespace_version(tenant_id, namespace):
+    """Current version of a tenant's cache namespace."""
+    versions = CacheNamespace.objects.filter(tenant_id=tenant_id, namespace=namespace)
+    version = versions.values_list("version", flat=True).first()
+    if version is None:
+        try:
+            with transaction.atomic():
+                version = CacheNamespace.objects.create(
+                    tenant_id=tenant_id, namespace=namespace, version=int(time.time() * 1000)
+                ).version
+        except IntegrityError:
+            # another worker created it first
+            version = versions.values_list("version", flat=True).first()
+    return version
+
+
+def bump_namespace(tenant_id, namespace):
+    """Invalidate everything cached in a tenant's namespace, in every worker."""
+    updated = CacheNamespace.objects.filter(tenant_id=tenant_id, namespace=namespace).update(
+        version=F("version") + 1
+    )
+    if not updated:
+        # no version yet: start a new, newer one
+        namespace_version(tenant_id, namespace)
+
+
+def tenant_cache_key(tenant_id, namespace, *parts, version=None):
+    """
+    Key for an entry in the current version of a tenant's namespace, or in
+    ``version`` when the caller already read it.
+    """
+    if version is None:
+        version = namespace_version(tenant_id, namespace)
+    digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+    return f"t{tenant_id}:{namespace}:v{version}:{digest}"
@@ -0,0 +1,110 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+A client sends a unique ``Idempotency-Key`` header with a POST and reuses it
+when retrying. Keys are IdempotencyKey rows, unique per tenant, path and
+key, so they are shared by every worker process and survive restarts. The
+row is inserted in the same transaction as the view's writes and holds the
+first successful (2xx) response, so a retry with the same key gets that
+response back without running the view again. The response of a replay
+carries ``Idempotent-Replayed: true``.
+
+A retry that arrives while the first request is still running waits on the
+row's unique index and replays once the first request commits. Reusing a
+key with a different request body gets 422. Keys are honored for
+``settings.IDEMPOTENCY_KEY_TTL`` seconds.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+from .transactions import bounded_atomic
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+
+
+def expiry_cutoff():
+    """Keys first used before this time are no longer honored."""
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def _stored(tenant, path, key):
+    record = IdempotencyKey.objects.filter(tenant=tenant, path=path, key=key).first()
+    if record is not None and record.created_at < expiry_cutoff():
+        record.delete()
+        return None
+    return record
+
+
+def idempotent(view_method):
+    """Honor the Idempotency-Key header on a viewset method (tenant requests only)."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        tenant = getattr(request, "tenant", None)
+        if not key or tenant is None:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = _fingerprint(request)
+        record = _stored(tenant, request.path, key)
+        if record is not None:
+            return _replay(record, fingerprint)
+
+        with bounded_atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        tenant=tenant, path=request.path, key=key, fingerprint=fingerprint
+                    )
+            except IntegrityError:
+                # another request took the key and committed while we waited
+                record = _stored(tenant, request.path, key)
+                if record is not None:
+                    return _replay(record, fingerprint)
+                return Response(
+                    {"error": f"A request with this {HEADER} is still in progress"},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            response = view_method(self, request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                record.status_code = response.status_code
+                record.response = response.data
+                record.save(update_fields=["status_code", "response"])
+            else:
+                # failures are not stored: the key can be retried
+                record.delete()
+        return response
+
+    return wrapper
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"error": f"{HEADER} was already used with a different request body"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(
+        record.response, status=record.status_code, headers={"Idempotent-Replayed": "true"}
+    )
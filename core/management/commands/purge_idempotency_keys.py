@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from core.idempotency import expiry_cutoff
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete Idempotency-Keys older than IDEMPOTENCY_KEY_TTL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Specific tenant ID to purge idempotency keys for (optional)',
+        )
+
+    def handle(self, *args, **options):
+        keys = IdempotencyKey.objects.filter(created_at__lt=expiry_cutoff())
+        tenant_id = options.get('tenant_id')
+        if tenant_id:
+            keys = keys.filter(tenant_id=tenant_id)
+
+        deleted, _ = keys.delete()
+        self.stdout.write(
+            self.style.SUCCESS(f'{deleted} expired idempotency key(s) purged!')
+        )
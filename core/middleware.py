@@ -1,3 +1,6 @@
+from .tenants import get_tenant
+
+
 class CurrentTenantMiddleware:
     """
     Extract tenant from logged in user and attach it to request
@@ -10,8 +13,8 @@ class CurrentTenantMiddleware:
         user = getattr(request, 'user', None)
 
         if user and user.is_authenticated:
-            # Safely get tenant attribute, handle cases where it doesn't exist or is None
-            request.tenant = getattr(user, 'tenant', None)
+            # Resolve the tenant from the process-level cache instead of the FK
+            request.tenant = get_tenant(getattr(user, 'tenant_id', None))
         else:
             request.tenant = None
 
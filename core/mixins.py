@@ -1,6 +1,25 @@
 """
 Mixins for tenant-aware viewsets.
 """
+import hashlib
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import namespace_version, tenant_cache, tenant_cache_key
+
+
+def request_namespace_version(request, namespace):
+    """
+    Version of the request tenant's cache namespace, read from the database
+    once per request however many mixins need it.
+    """
+    versions = request.__dict__.setdefault('_cache_namespace_versions', {})
+    if namespace not in versions:
+        versions[namespace] = namespace_version(request.tenant.pk, namespace)
+    return versions[namespace]
+
 
 class TenantViewSetMixin:
     """
@@ -23,3 +42,82 @@ class TenantViewSetMixin:
                 return queryset.filter(tenant=self.request.tenant)
         
         return queryset
+
+
+class TenantCachedListMixin:
+    """
+    Cache the serialized ``list`` response per tenant and query string in a
+    versioned tenant cache namespace (see core.cache).
+
+    Entries are invalidated by bumping the namespace version on writes
+    (``bump_namespace(tenant_id, cache_namespace)``), usually from signal
+    receivers on the models the list is built from.
+    """
+    cache_namespace = "catalog"
+
+    def list(self, request, *args, **kwargs):
+        tenant = getattr(request, 'tenant', None)
+        if tenant is None:
+            return super().list(request, *args, **kwargs)
+
+        key = tenant_cache_key(
+            tenant.pk,
+            self.cache_namespace,
+            self.basename,
+            request.get_host(),
+            sorted(request.query_params.lists()),
+            version=request_namespace_version(request, self.cache_namespace),
+        )
+        data = tenant_cache().get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            tenant_cache().set(key, response.data, getattr(settings, 'TENANT_LIST_CACHE_TTL', 300))
+        return response
+
+
+class TenantETagMixin:
+    """
+    Strong ETags and conditional GETs for ``list`` and ``retrieve``.
+
+    The ETag is derived from the tenant's change counter for
+    ``etag_namespace`` (a versioned namespace in core.cache, bumped on
+    writes) plus the request path and query string. The version is shared
+    by all worker processes, so computing the ETag costs a single version
+    lookup and a tag goes stale everywhere as soon as any worker commits a
+    write. A request whose If-None-Match matches gets an empty 304 before
+    anything else is queried or serialized.
+    """
+    etag_namespace = None
+
+    def get_etag(self, request):
+        tenant = getattr(request, 'tenant', None)
+        if tenant is None or self.etag_namespace is None:
+            return None
+        version = request_namespace_version(request, self.etag_namespace)
+        raw = repr((tenant.pk, version, request.path, sorted(request.query_params.lists())))
+        return '"%s"' % hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def not_modified(self, request, etag):
+        header = request.headers.get('If-None-Match')
+        if not header or etag is None:
+            return False
+        candidates = [candidate.strip() for candidate in header.split(',')]
+        return '*' in candidates or etag in candidates
+
+    def conditional(self, request, render, *args, **kwargs):
+        etag = self.get_etag(request)
+        if self.not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = render(request, *args, **kwargs)
+        if etag is not None and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(request, super().retrieve, *args, **kwargs)
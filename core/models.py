@@ -0,0 +1,62 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from authentication.models import Tenant
+
+
+class CacheNamespace(models.Model):
+    """
+    Current version of a tenant's cache namespace (core.cache).
+
+    Kept in the database so that a write handled by one worker process
+    invalidates what every other worker has cached for the namespace.
+    """
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name='cache_namespaces',
+    )
+
+    namespace = models.CharField(max_length=50)
+    version = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'namespace'], name='unique_tenant_cache_namespace'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.namespace} v{self.version} (tenant {self.tenant_id})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A tenant's Idempotency-Key for one endpoint and the response of the
+    request that first used it (core.idempotency).
+    """
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+    )
+
+    path = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+    # sha256 prefix of the request body the key was first used with
+    fingerprint = models.CharField(max_length=32)
+
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant', 'path', 'key'], name='unique_tenant_idempotency_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.key} {self.path} (tenant {self.tenant_id})"
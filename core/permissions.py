@@ -30,8 +30,9 @@ class IsTenantUser(permissions.BasePermission):
         """
         Check if the object belongs to the user's tenant.
         """
-        # Check if the object has a tenant field
-        if hasattr(obj, 'tenant'):
-            return obj.tenant == request.tenant
+        # Check the model (not the instance) for a tenant field and compare ids
+        # only: touching obj.tenant would load the Tenant row for every object
+        if hasattr(type(obj), 'tenant'):
+            return obj.tenant_id == request.tenant.pk
         
         return True
@@ -48,8 +48,10 @@ INSTALLED_APPS = [
     "rest_framework_simplejwt.token_blacklist",
     'hr',
     'authentication',
+    'core',
     'inventory',
     'sales',
+    'sync',
     'corsheaders',
 ]
 
@@ -143,7 +145,9 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "core.authentication.JWTAuthenticationWithTenant",
+        # builds request.user/request.tenant from token claims without queries;
+        # use core.authentication.JWTAuthenticationWithTenant to load the User row
+        "core.authentication.JWTStatelessTenantAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -151,6 +155,9 @@ REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
     ],
+    # keyset pagination: ?cursor=<opaque>&page_size=<n> (max 500)
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.TenantKeysetPagination",
+    "PAGE_SIZE": 50,
 }
 
 SIMPLE_JWT = {
@@ -167,6 +174,63 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
 }
 
+# Seconds a worker keeps Tenant rows in its process-level cache (core.tenants)
+TENANT_CACHE_TTL = 300
+TENANT_CACHE_MAX_ENTRIES = 10000
+
+# Versioned per-tenant cache namespaces (core.cache) and the TTL of cached
+# list responses (core.mixins.TenantCachedListMixin). Namespace versions are
+# kept in the database (core.models.CacheNamespace), so the entries in this
+# alias may be process-local: a write in any worker makes them unreachable.
+TENANT_CACHE_ALIAS = 'default'
+TENANT_LIST_CACHE_TTL = 300
+
+# Per-process SKU lookup index for POS scans (inventory.lookup)
+SKU_LOOKUP_TTL = 60
+SKU_LOOKUP_MAX_TENANTS = 100
+
+# Sharded stock counters (inventory.stock). 0 keeps stock on
+# Product.current_stock; N > 0 spreads each product's stock over N
+# StockCounterSlot rows, folded back by `manage.py compact_stock_counters`.
+INVENTORY_STOCK_COUNTER_SLOTS = 0
+
+# Worker threads rendering WebP derivatives of product images after upload
+# (inventory.images); 0 renders them in the upload's on_commit callback.
+PRODUCT_IMAGE_WORKERS = 2
+
+# Caches. "bills" holds rendered bill JSON (sales.bill_cache). Invalidation
+# on the rare bill edits (admin, customer/product renames) only reaches the
+# worker that made the edit, so with LocMemCache other workers may serve the
+# old rendering for up to TIMEOUT seconds; MAX_ENTRIES bounds memory (least
+# recently used first). Point it at a shared backend (Redis, or DatabaseCache
+# after `manage.py createcachetable`) for immediate invalidation everywhere.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'bills': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bills',
+        'TIMEOUT': 10 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Seconds an Idempotency-Key (core.idempotency) is honored after first use;
+# `manage.py purge_idempotency_keys` deletes older keys
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Best-effort upper bound on write transactions of synced data
+# (core.transactions): a longer one is rolled back instead of committed
+MAX_WRITE_TRANSACTION_SECONDS = 10
+
+# Delta sync (sync.views): changes newer than this many seconds are held back
+# until transactions that started before them have committed. It must exceed
+# MAX_WRITE_TRANSACTION_SECONDS; the margin covers the COMMIT itself (not
+# measured by the bound) and clock skew between servers.
+SYNC_SETTLE_SECONDS = MAX_WRITE_TRANSACTION_SECONDS * 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -223,6 +287,18 @@ LOGGING = {
             'level': 'DEBUG' if DEBUG else 'INFO',
             'propagate': False,
         },
+        # Logger for inventory app
+        'inventory': {
+            'handlers': ['console', 'file', 'error_file'],
+            'level': 'DEBUG' if DEBUG else 'INFO',
+            'propagate': False,
+        },
+        # Logger for sales app
+        'sales': {
+            'handlers': ['console', 'file', 'error_file'],
+            'level': 'DEBUG' if DEBUG else 'INFO',
+            'propagate': False,
+        },
         # Django's internal logger
         'django': {
             'handlers': ['console', 'file', 'error_file'],
@@ -0,0 +1,80 @@
+"""
+Helpers for streaming large exports without buffering them in memory.
+"""
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    """Yield the header and each row as an encoded CSV line."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def json_chunks(head, rows, key="results"):
+    """
+    Yield a JSON object made of the ``head`` dict plus ``key``: a list of
+    ``rows``, encoding one row at a time.
+    """
+    encoder = DjangoJSONEncoder()
+    opening = encoder.encode(head)[:-1]
+    yield f'{opening}{", " if head else ""}"{key}": ['
+    for n, row in enumerate(rows):
+        yield ("" if n == 0 else ", ") + encoder.encode(row)
+    yield "]}"
+
+
+def gzip_chunks(chunks, flush_every=64 * 1024):
+    """
+    Gzip-compress an iterable of str chunks on the fly, emitting compressed
+    blocks roughly every ``flush_every`` input bytes.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        pending += len(data)
+        out = compressor.compress(data)
+        if pending >= flush_every:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def streaming_csv_response(filename, header, rows, compress=False):
+    """
+    Build a StreamingHttpResponse that writes ``rows`` as CSV as they are
+    produced. With ``compress`` the body is a gzip file named ``<filename>.gz``.
+    """
+    chunks = csv_lines(header, rows)
+    if compress:
+        response = StreamingHttpResponse(gzip_chunks(chunks), content_type="application/gzip")
+        filename = f"{filename}.gz"
+    else:
+        response = StreamingHttpResponse(chunks, content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def streaming_json_response(filename, head, rows, key="results"):
+    """
+    Build a StreamingHttpResponse that writes ``{**head, key: [rows...]}``
+    as JSON as the rows are produced.
+    """
+    response = StreamingHttpResponse(json_chunks(head, rows, key), content_type="application/json")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,41 @@
+"""
+Process-level tenant cache used to resolve request.tenant without a query.
+"""
+from django.conf import settings
+
+from .cache import TTLCache
+
+# Tenant rows rarely change, so each worker keeps them for TENANT_CACHE_TTL
+# seconds; saves to Tenant or User drop the affected entry (authentication.signals).
+_tenants = TTLCache(
+    ttl=getattr(settings, "TENANT_CACHE_TTL", 300),
+    max_entries=getattr(settings, "TENANT_CACHE_MAX_ENTRIES", 10000),
+)
+
+
+def get_tenant(tenant_id):
+    """
+    Return the Tenant with ``tenant_id`` from the process cache, loading it
+    on a miss. Returns None when ``tenant_id`` is empty or does not exist.
+
+    The returned instance is shared between requests and must be treated as
+    read-only.
+    """
+    if not tenant_id:
+        return None
+
+    def load():
+        from authentication.models import Tenant
+        return Tenant.objects.filter(pk=tenant_id).first()
+
+    return _tenants.get_or_set(int(tenant_id), load)
+
+
+def invalidate_tenant(tenant_id):
+    """Drop a tenant from this process's cache."""
+    if tenant_id:
+        _tenants.delete(int(tenant_id))
+
+
+def clear_tenant_cache():
+    _tenants.clear()
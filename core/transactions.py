@@ -0,0 +1,59 @@
+"""
+Write transactions with an upper bound on their duration.
+
+Rows carry ``updated_at`` from when they were written, not from when their
+transaction committed, so a reader paging by change time (sync.views) can
+only be sure it has seen everything older than the longest transaction
+still running. ``bounded_atomic`` keeps transactions under that bound on a
+best-effort basis: a block whose work (lock waits included) ran longer
+than ``settings.MAX_WRITE_TRANSACTION_SECONDS`` is rolled back instead of
+committed. The COMMIT itself is not covered; a commit that pushes a block
+past the bound is logged. SYNC_SETTLE_SECONDS is derived from the same
+setting with a margin for that and for clock skew.
+
+Writers of synced tables (products, categories, customers and the stock
+and bills that touch them) use it in place of ``transaction.atomic`` and
+cap the work they do in one transaction (bill batches, stock adjustments,
+import chunks) so it normally finishes well within the bound; hitting it
+means lock contention or an overloaded database, and the client retries.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionTooLong(APIException):
+    """A bounded write transaction ran too long and was rolled back."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The write took too long and was rolled back; try again."
+    default_code = "transaction_too_long"
+
+
+def max_seconds():
+    return getattr(settings, "MAX_WRITE_TRANSACTION_SECONDS", 10)
+
+
+@contextmanager
+def bounded_atomic(using=None):
+    """
+    ``transaction.atomic()`` that raises TransactionTooLong (rolling the block
+    back) if the block ran longer than MAX_WRITE_TRANSACTION_SECONDS.
+    """
+    started = time.monotonic()
+    with transaction.atomic(using=using):
+        yield
+        if time.monotonic() - started > max_seconds():
+            raise TransactionTooLong()
+    elapsed = time.monotonic() - started
+    if elapsed > max_seconds():
+        logger.warning(
+            f"Write transaction committed after {elapsed:.1f}s, past the "
+            f"{max_seconds()}s bound; delta sync may skip its rows"
+        )
@@ -33,4 +33,5 @@ urlpatterns = [
     path("api/inventory/", include("inventory.urls")),
     path("api/sales/", include("sales.urls")),
     path("api/hr/", include("hr.urls")),
+    path("api/sync/", include("sync.urls")),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
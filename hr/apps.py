@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class HrConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hr'
+
+    def ready(self):
+        # Register signal receivers for the staff change counter
+        from . import signals  # noqa: F401
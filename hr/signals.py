@@ -0,0 +1,18 @@
+"""
+Signal receivers bumping the tenant's staff change counter (used for ETags).
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_namespace
+from .models import Staff
+
+# tenant cache namespace of the staff endpoints
+STAFF_NAMESPACE = "staff"
+
+
+@receiver([post_save, post_delete], sender=Staff)
+def staff_changed(sender, instance, **kwargs):
+    tenant_id = instance.tenant_id
+    transaction.on_commit(lambda: bump_namespace(tenant_id, STAFF_NAMESPACE))
@@ -3,14 +3,15 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
-from core.mixins import TenantViewSetMixin
+from core.mixins import TenantETagMixin, TenantViewSetMixin
 from core.permissions import IsTenantUser
 
 from .models import Staff, Attendance
 from .serializers import StaffSerializer, AttendanceSerializer
+from .signals import STAFF_NAMESPACE
 
 
-class StaffViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
+class StaffViewSet(TenantETagMixin, TenantViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Staff CRUD operations with tenant isolation.
     
@@ -33,6 +34,7 @@ class StaffViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     ordering_fields = ['name', 'joining_date', 'salary', 'created_at']
     filterset_fields = ['position', 'is_active']
     ordering = ['name']
+    etag_namespace = STAFF_NAMESPACE
 
     def perform_create(self, serializer):
         """Automatically set tenant from request."""
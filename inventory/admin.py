@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product, ProductImage, StockMovement
+from .models import Category, Product, ProductImage, StockMovement, StockCheckpoint
 
 
 @admin.register(Category)
@@ -93,5 +93,14 @@ class StockMovementAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(StockCheckpoint)
+class StockCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['checkpoint_id', 'product', 'period', 'period_end', 'stock', 'tenant']
+    list_filter = ['period', 'tenant', 'period_end']
+    search_fields = ['product__name', 'product__sku']
+    readonly_fields = ['checkpoint_id', 'created_at']
+    ordering = ['-period_end']
+
+
 # Optional: Add ProductImage inline to ProductAdmin
 ProductAdmin.inlines = [ProductImageInline]
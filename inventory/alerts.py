@@ -0,0 +1,56 @@
+"""
+Low-stock alerts.
+
+A product is low on stock when it has a ``low_stock_alert`` level set (> 0)
+and its stock is at or below it. The result is kept in Product.is_low_stock,
+which a partial index covers, so listing a tenant's low-stock products reads
+only the flagged rows however large the catalog is. refresh() recomputes the
+flag with one UPDATE; stock_changed() and Product saves call it, so every
+stock write keeps it current.
+
+Days of cover are estimated from SALE movements over the last
+``days`` days, for one page of products at a time.
+"""
+import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import BooleanField, Case, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from . import stock
+from .models import Product, StockMovement
+
+# default window for the sales velocity behind days of cover
+VELOCITY_DAYS = 30
+
+
+def refresh(product_ids):
+    """Recompute is_low_stock for the given products."""
+    level = stock.live_stock() if stock.sharded() else F("current_stock")
+    Product.objects.filter(pk__in=list(product_ids)).update(
+        is_low_stock=Case(
+            When(Q(low_stock_alert__gt=0) & Q(low_stock_alert__gte=level), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def daily_sales(tenant, product_ids, days=VELOCITY_DAYS):
+    """Return {product_id: units sold per day} over the last ``days`` days."""
+    since = timezone.now() - datetime.timedelta(days=days)
+    sold = (
+        StockMovement.objects.filter(
+            tenant=tenant, type="SALE", product_id__in=list(product_ids), date__gte=since
+        )
+        .order_by().values("product_id")
+        .annotate(units=Sum("quantity"))
+    )
+    return {row["product_id"]: Decimal(row["units"]) / days for row in sold}
+
+
+def days_of_cover(level, per_day):
+    """Days the stock lasts at the given sales rate, or None without sales."""
+    if not per_day:
+        return None
+    return (Decimal(max(level, 0)) / per_day).quantize(Decimal("0.1"), rounding=ROUND_HALF_UP)
@@ -0,0 +1,125 @@
+"""
+WebP derivatives of product images.
+
+Uploads are kept as they are; after the upload commits, a worker thread
+renders three WebP derivatives (thumbnail, medium and full, each bounded by
+a maximum edge) and stores them under a name derived from their content
+hash, so identical renders share one file and the URLs can be cached
+forever. Requests never wait for the rendering: until it is done the
+derivative fields are empty and clients fall back to the original.
+
+``PRODUCT_IMAGE_WORKERS`` sets the size of the worker pool; with 0 the
+derivatives are rendered in the on_commit callback itself (useful for
+tests and local development).
+"""
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import ProductImage
+
+logger = logging.getLogger(__name__)
+
+# derivative field -> longest edge in pixels
+VARIANTS = {
+    "thumbnail": 200,
+    "medium": 800,
+    "full": 2000,
+}
+
+WEBP_QUALITY = 80
+
+DERIVED_DIR = "product_images/derived"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def worker_count():
+    return getattr(settings, "PRODUCT_IMAGE_WORKERS", 2)
+
+
+def executor():
+    """The process-wide worker pool, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=worker_count(), thread_name_prefix="product-images"
+            )
+        return _executor
+
+
+def schedule(image_id):
+    """Render the derivatives of an image once the current transaction commits."""
+    if worker_count() > 0:
+        transaction.on_commit(lambda: executor().submit(_build_in_worker, image_id))
+    else:
+        transaction.on_commit(lambda: _build_logged(image_id))
+
+
+def _build_logged(image_id):
+    # nothing reads the worker's Future, and an on_commit callback must not
+    # fail a request whose write already committed: log instead of raising
+    try:
+        build_derivatives(image_id)
+    except Exception:
+        logger.exception(f"Building derivatives of product image {image_id} failed")
+
+
+def _build_in_worker(image_id):
+    close_old_connections()
+    try:
+        _build_logged(image_id)
+    finally:
+        # worker threads get their own connection; do not leave it open
+        connection.close()
+
+
+def render(source, max_edge):
+    """Return WebP bytes of ``source`` (an open PIL image) scaled to fit ``max_edge``."""
+    image = source.copy()
+    image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format="WEBP", quality=WEBP_QUALITY, method=4)
+    return output.getvalue()
+
+
+def store(data):
+    """Save derivative bytes under their content hash and return the storage name."""
+    name = f"{DERIVED_DIR}/{hashlib.sha256(data).hexdigest()[:32]}.webp"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def build_derivatives(image_id):
+    """
+    Render and store the derivatives of one ProductImage. Returns True on
+    success, False when the image is gone, was replaced while rendering, or
+    cannot be decoded.
+    """
+    product_image = ProductImage.objects.filter(pk=image_id).first()
+    if product_image is None or not product_image.image:
+        return False
+    try:
+        with product_image.image.open("rb") as file:
+            with Image.open(file) as source:
+                source = ImageOps.exif_transpose(source)
+                if source.mode not in ("RGB", "RGBA"):
+                    source = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+                names = {field: store(render(source, edge)) for field, edge in VARIANTS.items()}
+    except (OSError, UnidentifiedImageError, ValueError) as e:
+        logger.warning(f"Could not render derivatives of product image {image_id}: {e}")
+        return False
+    # a newer upload replacing the image keeps its own derivatives
+    current = ProductImage.objects.filter(pk=image_id, image=product_image.image.name)
+    return current.update(**names) > 0
@@ -0,0 +1,216 @@
+"""
+Point-in-time stock queries over the StockMovement ledger.
+
+SALE and OUT movements store positive quantities, so every query goes
+through SIGNED_QUANTITY. Stock "as of" an instant means the stock after all
+movements dated before it.
+
+Queries start from the nearest StockCheckpoint at or before the requested
+instant and replay only the movements after it. Products without a usable
+checkpoint are walked back from their live stock instead (counter slots
+included, see inventory.stock), which only replays the movements after the
+requested instant.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, When, Window
+from django.utils import timezone
+
+from . import stock as stock_counters
+from .models import Product, StockCheckpoint, StockMovement
+
+# movement types that take stock out (their quantity is stored positive)
+OUTBOUND_TYPES = ("OUT", "SALE")
+
+SIGNED_QUANTITY = Case(
+    When(type__in=OUTBOUND_TYPES, then=-F("quantity")),
+    default=F("quantity"),
+    output_field=IntegerField(),
+)
+
+
+def movement_deltas(movements):
+    """Return {product_id: signed quantity sum} for a StockMovement queryset."""
+    return dict(
+        movements.order_by()
+        .values("product_id")
+        .annotate(delta=Sum(SIGNED_QUANTITY))
+        .values_list("product_id", "delta")
+    )
+
+
+# running sum of SIGNED_QUANTITY, oldest movement first
+RUNNING_TOTAL = Window(
+    Sum(SIGNED_QUANTITY),
+    order_by=[F("date").asc(), F("movement_id").asc()],
+)
+
+
+def history(tenant, product_id, since=None, until=None):
+    """
+    A product's movements dated in [since, until), annotated with
+    ``signed_quantity`` and ``running_total``. The running total is computed
+    by the database over the rows the final query selects, so it is only
+    meaningful relative to other rows of the same page (see set_balances).
+    """
+    movements = StockMovement.objects.filter(tenant=tenant, product_id=product_id)
+    if since is not None:
+        movements = movements.filter(date__gte=since)
+    if until is not None:
+        movements = movements.filter(date__lt=until)
+    return movements.annotate(signed_quantity=SIGNED_QUANTITY, running_total=RUNNING_TOTAL)
+
+
+def set_balances(rows, current_stock):
+    """
+    Set ``balance`` (the product's stock right after the movement) on a page
+    of consecutive history() rows.
+
+    The oldest row's balance is the current stock minus every movement after
+    it (one aggregate query); the other rows follow from the difference of
+    their running totals, whatever rows the page query started its window at.
+    """
+    if not rows:
+        return
+    oldest = min(rows, key=lambda row: (row.date, row.movement_id))
+    later = StockMovement.objects.filter(
+        tenant_id=oldest.tenant_id, product_id=oldest.product_id
+    ).filter(
+        Q(date__gt=oldest.date) | Q(date=oldest.date, movement_id__gt=oldest.movement_id)
+    )
+    base = current_stock - movement_deltas(later).get(oldest.product_id, 0)
+    for row in rows:
+        row.balance = base + row.running_total - oldest.running_total
+
+
+def stock_as_of(tenant, at, product_ids=None):
+    """
+    Return {product_id: stock} for the tenant's products as of ``at``.
+
+    Products created after ``at`` are left out.
+    """
+    products = Product.objects.for_tenant(tenant).filter(created_at__lte=at)
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    latest = StockCheckpoint.objects.filter(
+        product=OuterRef("pk"), period_end__lte=at
+    ).order_by("-period_end")
+    level = stock_counters.live_stock() if stock_counters.sharded() else F("current_stock")
+    rows = products.annotate(
+        level=level,
+        checkpoint_end=Subquery(latest.values("period_end")[:1]),
+        checkpoint_stock=Subquery(latest.values("stock")[:1]),
+    ).values_list("pk", "level", "checkpoint_end", "checkpoint_stock")
+
+    stock = {}
+    by_checkpoint = defaultdict(list)
+    without_checkpoint = {}
+    for pk, current_stock, checkpoint_end, checkpoint_stock in rows:
+        if checkpoint_end is None:
+            without_checkpoint[pk] = current_stock
+        else:
+            stock[pk] = checkpoint_stock
+            by_checkpoint[checkpoint_end].append(pk)
+
+    movements = StockMovement.objects.filter(tenant=tenant)
+
+    # replay forward from each checkpoint; checkpoints are built for all
+    # products at once, so this is normally a single query
+    for checkpoint_end, pks in by_checkpoint.items():
+        deltas = movement_deltas(
+            movements.filter(product_id__in=pks, date__gte=checkpoint_end, date__lt=at)
+        )
+        for pk, delta in deltas.items():
+            stock[pk] += delta
+
+    # walk back from current stock for products that have no checkpoint yet
+    if without_checkpoint:
+        deltas = movement_deltas(
+            movements.filter(product_id__in=list(without_checkpoint), date__gte=at)
+        )
+        for pk, current_stock in without_checkpoint.items():
+            stock[pk] = current_stock - deltas.get(pk, 0)
+
+    return stock
+
+
+def valuation_as_of(tenant, at):
+    """
+    Value the tenant's inventory as of ``at`` at current purchase prices.
+
+    Returns (total_value, [{"product_id", "stock", "value"}, ...]).
+    """
+    stock = stock_as_of(tenant, at)
+    prices = dict(
+        Product.objects.filter(pk__in=list(stock)).values_list("pk", "purchase_price")
+    )
+    items = [
+        {"product_id": pk, "stock": qty, "value": qty * prices[pk]}
+        for pk, qty in stock.items()
+    ]
+    return sum(item["value"] for item in items), items
+
+
+# ------------------------------------------------------------------ periods
+
+def period_start(moment, period):
+    """Start of the day or month containing ``moment``, in the current timezone."""
+    local = timezone.localtime(moment)
+    day = local.date() if period == "DAY" else local.date().replace(day=1)
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def next_period_start(moment, period):
+    start = period_start(moment, period)
+    if period == "DAY":
+        day = start.date() + datetime.timedelta(days=1)
+    else:
+        day = (start.date().replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def build_checkpoints(tenant, period, until=None):
+    """
+    Write checkpoints for every complete period since the tenant's last
+    checkpoint of this ``period`` (or since its first movement), up to
+    ``until`` (default: now). Each period builds on the previous one.
+
+    Returns the number of periods written.
+    """
+    until = until or timezone.now()
+    last = (
+        StockCheckpoint.objects.filter(tenant=tenant, period=period)
+        .order_by("-period_end")
+        .values_list("period_end", flat=True)
+        .first()
+    )
+    if last is None:
+        first = (
+            StockMovement.objects.filter(tenant=tenant)
+            .order_by("date")
+            .values_list("date", flat=True)
+            .first()
+        )
+        if first is None:
+            return 0
+        last = period_start(first, period)
+
+    written = 0
+    period_end = next_period_start(last, period)
+    while period_end <= until:
+        stock = stock_as_of(tenant, period_end)
+        StockCheckpoint.objects.bulk_create(
+            [
+                StockCheckpoint(
+                    tenant=tenant, product_id=pk, period=period,
+                    period_end=period_end, stock=qty,
+                )
+                for pk, qty in stock.items()
+            ],
+            ignore_conflicts=True,
+        )
+        written += 1
+        period_end = next_period_start(period_end, period)
+    return written
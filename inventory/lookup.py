@@ -0,0 +1,105 @@
+"""
+Per-process SKU lookup index for POS barcode scanning.
+
+Each worker keeps, per tenant, a dict of sku -> compact product record, so
+finding the scanned product is a single hash lookup. Stock changes with
+every sale, so it is not part of the record: a scan reads the product's
+live stock (inventory.stock) with one primary-key query. Tenants are loaded
+lazily on their first scan and evicted least-recently-used beyond
+SKU_LOOKUP_MAX_TENANTS. A saved or deleted product only replaces or drops
+its own record (inventory.signals), found through a product -> SKU map, and
+indexes expire after SKU_LOOKUP_TTL seconds, which bounds staleness from
+writes made by other worker processes.
+"""
+import threading
+
+from django.conf import settings
+
+from core.cache import TTLCache
+from . import stock
+from .models import Product
+
+_index = TTLCache(
+    ttl=getattr(settings, "SKU_LOOKUP_TTL", 60),
+    max_entries=getattr(settings, "SKU_LOOKUP_MAX_TENANTS", 100),
+)
+
+# serializes writes to loaded indexes; scans read them without locking, as
+# single-key dict reads and writes are atomic
+_writes = threading.Lock()
+
+FIELDS = ("product_id", "sku", "name", "selling_price", "gst_percent")
+
+
+def _record(product_id, sku, name, selling_price, gst_percent):
+    return {
+        "product_id": product_id,
+        "sku": sku,
+        "name": name,
+        "selling_price": str(selling_price),
+        "gst_percent": str(gst_percent),
+    }
+
+
+class _TenantIndex:
+    """A tenant's records by SKU, plus each product's SKU to find its record on writes."""
+
+    def __init__(self, records):
+        self.by_sku = records
+        self.sku_of = {record["product_id"]: sku for sku, record in records.items()}
+
+
+def _load(tenant_id):
+    rows = Product.objects.filter(tenant_id=tenant_id).values_list(*FIELDS)
+    return _TenantIndex({row[1]: _record(*row) for row in rows})
+
+
+def lookup_sku(tenant, sku):
+    """Return the compact record for ``sku`` in ``tenant`` with its live stock, or None."""
+    if tenant is None or not sku:
+        return None
+    index = _index.get_or_set(tenant.pk, lambda: _load(tenant.pk))
+    record = index.by_sku.get(sku)
+    if record is None:
+        return None
+    live = stock.current_stock([record["product_id"]])
+    if record["product_id"] not in live:
+        # deleted by another worker
+        return None
+    return {**record, "current_stock": live[record["product_id"]]}
+
+
+def _drop(index, product_id):
+    sku = index.sku_of.pop(product_id, None)
+    if sku is not None:
+        index.by_sku.pop(sku, None)
+
+
+def product_saved(product):
+    """Replace ``product``'s record in this process's index of its tenant, if loaded."""
+    index = _index.get(product.tenant_id)
+    if index is None:
+        return
+    with _writes:
+        # the SKU itself may have changed
+        _drop(index, product.pk)
+        index.by_sku[product.sku] = _record(*(getattr(product, field) for field in FIELDS))
+        index.sku_of[product.pk] = product.sku
+
+
+def product_deleted(tenant_id, product_id):
+    """Drop a product's record from this process's index of its tenant, if loaded."""
+    index = _index.get(tenant_id)
+    if index is None:
+        return
+    with _writes:
+        _drop(index, product_id)
+
+
+def invalidate(tenant_id):
+    """Drop a tenant's index from this process."""
+    _index.delete(tenant_id)
+
+
+def clear():
+    _index.clear()
@@ -0,0 +1,113 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from authentication.models import Tenant
+from inventory import stock
+from inventory.models import Category, Product
+from sales.models import Bill
+from sales.services import InsufficientStock, create_bill
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent bills on one hot product with and without sharded stock counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bills',
+            type=int,
+            default=400,
+            help='Number of bills per run',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Number of concurrent tills (threads, one DB connection each)',
+        )
+        parser.add_argument(
+            '--slots',
+            type=int,
+            default=8,
+            help='Counter slots per product for the sharded run',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes all writers, so both runs are expected to be '
+                'similar here; run against PostgreSQL for meaningful numbers.'
+            ))
+
+        self.stdout.write(
+            f'Stock counter benchmark ({options["bills"]} bills, {options["threads"]} threads)\n'
+        )
+        for label, slots in [('current_stock row', 0), (f'{options["slots"]} counter slots', options['slots'])]:
+            with override_settings(INVENTORY_STOCK_COUNTER_SLOTS=slots):
+                rate, failed, final_stock, expected = self.run(options['bills'], options['threads'])
+            self.stdout.write(
+                f'  {label:<20} {rate:8.1f} bills/s, {failed} failed, '
+                f'final stock {final_stock} (expected {expected})'
+            )
+        self.stdout.write(self.style.SUCCESS('\nDone.'))
+
+    def run(self, bills, threads):
+        tenant = Tenant.objects.create(
+            business_name='Stock counter benchmark',
+            plan='Basic',
+            status='Active',
+            sub_end_date=timezone.now() + timezone.timedelta(days=1),
+        )
+        try:
+            return self.run_bills(tenant, bills, threads)
+        finally:
+            Bill.objects.filter(tenant=tenant).delete()
+            tenant.delete()
+
+    def run_bills(self, tenant, bills, threads):
+        category = Category.objects.create(tenant=tenant, name='Benchmark')
+        # one unit more than the bills need, so every bill can succeed
+        product = Product.objects.create(
+            tenant=tenant, category=category, name='Hot product', sku='BENCH-HOT',
+            purchase_price=Decimal('50'), selling_price=Decimal('100'),
+            current_stock=bills + 1,
+        )
+        payload = {'payment_type': 'CASH', 'items': [{'product_id': product.pk, 'quantity': 1}]}
+
+        per_thread = [bills // threads + (n < bills % threads) for n in range(threads)]
+        failed = []
+
+        def till(count):
+            try:
+                for _ in range(count):
+                    for attempt in range(20):
+                        try:
+                            create_bill(tenant, None, payload)
+                            break
+                        except OperationalError:
+                            # lock timeouts / "database is locked": retry the bill
+                            time.sleep(0.01 * (attempt + 1))
+                        except InsufficientStock:
+                            failed.append(1)
+                            break
+                    else:
+                        failed.append(1)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=till, args=(count,)) for count in per_thread]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        sold = Bill.objects.filter(tenant=tenant).count()
+        final_stock = stock.current_stock([product.pk])[product.pk]
+        return sold / elapsed, len(failed), final_stock, bills + 1 - sold
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from authentication.models import Tenant
+from inventory.images import build_derivatives
+from inventory.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = 'Render WebP derivatives for product images that have none (all tenants or one tenant)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Specific tenant ID to build image derivatives for (optional)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of images rendered in parallel',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render images that already have derivatives',
+        )
+
+    def handle(self, *args, **options):
+        tenant_id = options.get('tenant_id')
+        images = ProductImage.objects.all()
+
+        if tenant_id:
+            if not Tenant.objects.filter(tenant_id=tenant_id).exists():
+                self.stdout.write(
+                    self.style.ERROR(f'Tenant with ID {tenant_id} does not exist')
+                )
+                return
+            images = images.filter(product__tenant_id=tenant_id)
+        if not options['force']:
+            images = images.filter(thumbnail='')
+
+        image_ids = list(images.order_by('pk').values_list('pk', flat=True))
+        self.stdout.write(f'Rendering derivatives for {len(image_ids)} image(s)...')
+
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            results = list(pool.map(self.build, image_ids))
+
+        failed = results.count(False)
+        if failed:
+            self.stdout.write(
+                self.style.WARNING(f'  {failed} image(s) could not be rendered (see the log)')
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Image derivatives built for {results.count(True)} image(s)!')
+        )
+
+    def build(self, image_id):
+        try:
+            return build_derivatives(image_id)
+        finally:
+            # each worker thread has its own connection
+            connection.close()
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from authentication.models import Tenant
+from inventory.ledger import build_checkpoints
+
+
+class Command(BaseCommand):
+    help = 'Build stock ledger checkpoints incrementally for all tenants (or one tenant)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            choices=['day', 'month'],
+            default='month',
+            help='Checkpoint granularity (default: month)',
+        )
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Specific tenant ID to build checkpoints for (optional)',
+        )
+
+    def handle(self, *args, **options):
+        period = options['period'].upper()
+        tenant_id = options.get('tenant_id')
+
+        if tenant_id:
+            tenants = Tenant.objects.filter(tenant_id=tenant_id)
+            if not tenants.exists():
+                self.stdout.write(
+                    self.style.ERROR(f'Tenant with ID {tenant_id} does not exist')
+                )
+                return
+        else:
+            tenants = Tenant.objects.all()
+
+        for tenant in tenants:
+            with transaction.atomic():
+                written = build_checkpoints(tenant, period)
+            self.stdout.write(f'  {tenant.business_name}: {written} new {period.lower()} checkpoint(s)')
+
+        self.stdout.write(
+            self.style.SUCCESS('Stock checkpoints are up to date!')
+        )
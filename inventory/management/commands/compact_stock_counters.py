@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from authentication.models import Tenant
+from inventory import stock
+from inventory.models import StockCounterSlot
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded stock counter slots back into Product.current_stock and rebalance them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Specific tenant ID to compact stock counters for (optional)',
+        )
+
+    def handle(self, *args, **options):
+        tenant_id = options.get('tenant_id')
+
+        if tenant_id:
+            tenants = Tenant.objects.filter(tenant_id=tenant_id)
+            if not tenants.exists():
+                self.stdout.write(
+                    self.style.ERROR(f'Tenant with ID {tenant_id} does not exist')
+                )
+                return
+        else:
+            tenants = Tenant.objects.all()
+
+        for tenant in tenants:
+            product_ids = (
+                StockCounterSlot.objects.filter(product__tenant=tenant)
+                .values_list('product_id', flat=True).distinct()
+            )
+            compacted = stock.compact(list(product_ids))
+            self.stdout.write(f'  {tenant.business_name}: {compacted} product(s) compacted')
+
+        if not stock.sharded():
+            self.stdout.write('Sharded stock counters are off: slots were folded and removed.')
+        self.stdout.write(
+            self.style.SUCCESS('Stock counters compacted!')
+        )
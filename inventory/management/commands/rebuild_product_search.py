@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from authentication.models import Tenant
+from inventory import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index for all tenants (or one tenant)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Specific tenant ID to rebuild the index for (optional)',
+        )
+
+    def handle(self, *args, **options):
+        tenant = None
+        tenant_id = options.get('tenant_id')
+
+        if tenant_id:
+            try:
+                tenant = Tenant.objects.get(tenant_id=tenant_id)
+            except Tenant.DoesNotExist:
+                self.stdout.write(
+                    self.style.ERROR(f'Tenant with ID {tenant_id} does not exist')
+                )
+                return
+
+        with transaction.atomic():
+            count = search.rebuild_index(tenant)
+
+        scope = f'tenant: {tenant.business_name}' if tenant else 'all tenants'
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {count} products ({scope})')
+        )
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:14
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS inventory_product_fts "
+            "USING fts5(tenant, name, sku, brand, tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO inventory_product_fts (rowid, tenant, name, sku, brand) "
+            "SELECT product_id, 't' || tenant_id, name, sku, COALESCE(brand, '') "
+            "FROM inventory_product"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS inventory_product_search ("
+            " product_id bigint PRIMARY KEY"
+            "  REFERENCES inventory_product (product_id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,"
+            " tenant_id bigint NOT NULL,"
+            " document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS inventory_product_search_document_idx "
+            "ON inventory_product_search USING GIN (document)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS inventory_product_search_tenant_idx "
+            "ON inventory_product_search (tenant_id)"
+        )
+        schema_editor.execute(
+            "INSERT INTO inventory_product_search (product_id, tenant_id, document) "
+            "SELECT product_id, tenant_id, "
+            " setweight(to_tsvector('simple', name), 'A') || "
+            " setweight(to_tsvector('simple', sku), 'A') || "
+            " setweight(to_tsvector('simple', COALESCE(brand, '')), 'B') "
+            "FROM inventory_product"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS inventory_product_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP TABLE IF EXISTS inventory_product_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
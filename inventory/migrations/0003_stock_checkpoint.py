@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('inventory', '0002_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('checkpoint_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('DAY', 'Day'), ('MONTH', 'Month')], max_length=10)),
+                ('period_end', models.DateTimeField(help_text='Exclusive end of the period; stock is as of this instant')),
+                ('stock', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='inventory.product')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_checkpoints', to='authentication.tenant')),
+            ],
+            options={
+                'ordering': ['-period_end'],
+                'indexes': [models.Index(fields=['tenant', 'product', 'period_end'], name='inventory_s_tenant__aa331a_idx'), models.Index(fields=['tenant', 'period', 'period_end'], name='inventory_s_tenant__eace74_idx')],
+                'unique_together': {('product', 'period', 'period_end')},
+            },
+        ),
+    ]
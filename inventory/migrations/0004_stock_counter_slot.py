@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCounterSlot',
+            fields=[
+                ('slot_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_slots', to='inventory.product')),
+            ],
+            options={
+                'ordering': ['product', 'slot'],
+                'unique_together': {('product', 'slot')},
+            },
+        ),
+    ]
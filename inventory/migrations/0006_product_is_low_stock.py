@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:42
+
+from django.db import migrations, models
+
+
+def flag_low_stock(apps, schema_editor):
+    Product = apps.get_model('inventory', 'Product')
+    Product.objects.filter(
+        low_stock_alert__gt=0, current_stock__lte=models.F('low_stock_alert')
+    ).update(is_low_stock=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('inventory', '0005_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='is_low_stock',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_low_stock', True)), fields=['tenant', 'name'], name='product_low_stock_idx'),
+        ),
+        migrations.RunPython(flag_low_stock, migrations.RunPython.noop),
+    ]
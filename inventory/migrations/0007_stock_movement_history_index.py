@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('inventory', '0006_product_is_low_stock'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['tenant', 'product', 'date'], name='inventory_s_tenant__4581f8_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('inventory', '0007_stock_movement_history_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['tenant', '-date', '-movement_id'], name='inventory_s_tenant__0366b9_idx'),
+        ),
+    ]
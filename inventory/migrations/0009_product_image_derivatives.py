@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_stock_movement_list_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='full',
+            field=models.ImageField(blank=True, editable=False, upload_to='product_images/derived/'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='medium',
+            field=models.ImageField(blank=True, editable=False, upload_to='product_images/derived/'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='product_images/derived/'),
+        ),
+    ]
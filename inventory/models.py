@@ -25,6 +25,9 @@ class Category(models.Model):
         #but same category name cannot be used by same tenant
         unique_together = ('tenant', 'name')
         ordering = ['name'] 
+        indexes = [
+            models.Index(fields=['tenant', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.tenant.business_name})"
@@ -77,6 +80,8 @@ class Product(models.Model):
     #-------------stock-------------------------
     current_stock = models.IntegerField(default=0)
     low_stock_alert = models.IntegerField(default=0)
+    # maintained by inventory.alerts.refresh() on every stock write
+    is_low_stock = models.BooleanField(default=False, editable=False)
 
     #--------------tax--------------------------
     hsn_code = models.CharField(max_length=100, blank=True, null=True)
@@ -85,6 +90,8 @@ class Product(models.Model):
     #-------------status------------------------
     status = models.CharField(max_length = 50, default='active')
     created_at = models.DateTimeField(auto_now_add=True)
+    # bulk and F() updates must set this themselves (delta sync relies on it)
+    updated_at = models.DateTimeField(auto_now=True)
     
 
     objects = TenantManager()
@@ -94,7 +101,14 @@ class Product(models.Model):
         ordering = ['name'] 
         indexes =[
             models.Index(fields=['tenant']),
-            models.Index(fields=['sku'])
+            models.Index(fields=['sku']),
+            models.Index(fields=['tenant', 'updated_at']),
+            # only the flagged rows, in list order
+            models.Index(
+                fields=['tenant', 'name'],
+                condition=models.Q(is_low_stock=True),
+                name='product_low_stock_idx',
+            ),
         ]
 
     def __str__(self):
@@ -112,6 +126,11 @@ class ProductImage(models.Model):
 
     image = models.ImageField(upload_to='product_images/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    # WebP derivatives rendered after upload by inventory.images
+    thumbnail = models.ImageField(upload_to='product_images/derived/', blank=True, editable=False)
+    medium = models.ImageField(upload_to='product_images/derived/', blank=True, editable=False)
+    full = models.ImageField(upload_to='product_images/derived/', blank=True, editable=False)
     
     objects = TenantManager()
 
@@ -160,6 +179,87 @@ class StockMovement(models.Model):
 
     class Meta:
         ordering = ['-date']  
+        indexes = [
+            # movement lists, newest first
+            models.Index(fields=['tenant', '-date', '-movement_id']),
+            # per-product history, newest first
+            models.Index(fields=['tenant', 'product', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.type} - {self.quantity} of {self.product.name}"
+
+class StockCheckpoint(models.Model):
+    """
+    Stock of a product at the end of a day or month, derived from the
+    StockMovement ledger by the build_stock_checkpoints command.
+
+    ``stock`` is the product's stock after every movement dated before
+    ``period_end`` (the exclusive end of the period), so point-in-time
+    queries only replay the movements after the nearest checkpoint.
+    """
+    checkpoint_id = models.BigAutoField(primary_key=True)
+
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name='stock_checkpoints',
+        db_index=True,
+    )
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='checkpoints',
+    )
+
+    PERIODS = (
+        ("DAY", "Day"),
+        ("MONTH", "Month"),
+    )
+
+    period = models.CharField(max_length=10, choices=PERIODS)
+    period_end = models.DateTimeField(help_text="Exclusive end of the period; stock is as of this instant")
+    stock = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        unique_together = ('product', 'period', 'period_end')
+        ordering = ['-period_end']
+        indexes = [
+            models.Index(fields=['tenant', 'product', 'period_end']),
+            models.Index(fields=['tenant', 'period', 'period_end']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.period_end}: {self.stock}"
+
+
+class StockCounterSlot(models.Model):
+    """
+    One shard of a product's stock when sharded stock counters are enabled
+    (INVENTORY_STOCK_COUNTER_SLOTS > 0).
+
+    A product's live stock is the sum of its slots; each slot is kept
+    non-negative, so concurrent sales decrement independent rows instead of
+    contending on Product.current_stock. See inventory.stock.
+    """
+    slot_id = models.BigAutoField(primary_key=True)
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_slots',
+    )
+
+    slot = models.PositiveSmallIntegerField()
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('product', 'slot')
+        ordering = ['product', 'slot']
 
     def __str__(self):
-        return f"{self.type} - {self.quantity} of {self.product.name}"
\ No newline at end of file
+        return f"{self.product_id}[{self.slot}] = {self.quantity}"
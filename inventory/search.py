@@ -0,0 +1,149 @@
+"""
+Full-text search index for products.
+
+The index is created by migration 0002_product_search_index, lives next to
+the Product table and is kept in sync by the receivers in inventory.signals
+(and explicitly by bulk writers such as the CSV import):
+
+- SQLite: an FTS5 virtual table ``inventory_product_fts`` whose rowid is the
+  product_id; the tenant is stored as an indexed ``t<tenant_id>`` token so
+  matches are restricted to one tenant inside the index, and results are
+  ranked with bm25.
+- PostgreSQL: a side table ``inventory_product_search`` holding a weighted
+  tsvector per product with a GIN index, ranked with ts_rank.
+- Other databases fall back to ``icontains`` lookups.
+
+Every query term is matched as a prefix, so "nik air" finds "Nike Air Max".
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Product
+
+SQLITE_TABLE = "inventory_product_fts"
+POSTGRES_TABLE = "inventory_product_search"
+
+# bm25 column weights for (tenant, name, sku, brand)
+SQLITE_WEIGHTS = "0.0, 10.0, 5.0, 2.0"
+
+# products re-indexed per statement by index_products / rebuild
+INDEX_BATCH_SIZE = 500
+
+
+def _vendor():
+    return connection.vendor
+
+
+def _terms(query):
+    return re.findall(r"\w+", (query or "").lower())[:10]
+
+
+# ---------------------------------------------------------------- indexing
+
+def index_products(product_ids):
+    """(Re)index the given products, dropping ids that no longer exist."""
+    product_ids = list(product_ids)
+    vendor = _vendor()
+    if vendor not in ("sqlite", "postgresql") or not product_ids:
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(product_ids), INDEX_BATCH_SIZE):
+            batch = product_ids[start:start + INDEX_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            if vendor == "sqlite":
+                cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})", batch)
+                cursor.execute(
+                    f"INSERT INTO {SQLITE_TABLE} (rowid, tenant, name, sku, brand) "
+                    f"SELECT product_id, 't' || tenant_id, name, sku, COALESCE(brand, '') "
+                    f"FROM inventory_product WHERE product_id IN ({placeholders})",
+                    batch,
+                )
+            else:
+                cursor.execute(f"DELETE FROM {POSTGRES_TABLE} WHERE product_id IN ({placeholders})", batch)
+                cursor.execute(
+                    f"INSERT INTO {POSTGRES_TABLE} (product_id, tenant_id, document) "
+                    f"SELECT product_id, tenant_id, "
+                    f" setweight(to_tsvector('simple', name), 'A') || "
+                    f" setweight(to_tsvector('simple', sku), 'A') || "
+                    f" setweight(to_tsvector('simple', COALESCE(brand, '')), 'B') "
+                    f"FROM inventory_product WHERE product_id IN ({placeholders})",
+                    batch,
+                )
+
+
+def remove_products(product_ids):
+    product_ids = list(product_ids)
+    vendor = _vendor()
+    if vendor not in ("sqlite", "postgresql") or not product_ids:
+        return
+    table, column = (SQLITE_TABLE, "rowid") if vendor == "sqlite" else (POSTGRES_TABLE, "product_id")
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", product_ids)
+
+
+def rebuild_index(tenant=None):
+    """
+    Rebuild the index for one tenant (or all tenants) in bulk.
+
+    Returns the number of products indexed.
+    """
+    products = Product.objects.all()
+    if tenant is not None:
+        products = products.filter(tenant=tenant)
+    product_ids = list(products.values_list("product_id", flat=True))
+
+    vendor = _vendor()
+    if vendor in ("sqlite", "postgresql"):
+        table = SQLITE_TABLE if vendor == "sqlite" else POSTGRES_TABLE
+        with connection.cursor() as cursor:
+            if tenant is None:
+                cursor.execute(f"DELETE FROM {table}")
+            elif vendor == "sqlite":
+                cursor.execute(f"DELETE FROM {table} WHERE tenant = %s", [f"t{tenant.pk}"])
+            else:
+                cursor.execute(f"DELETE FROM {table} WHERE tenant_id = %s", [tenant.pk])
+    index_products(product_ids)
+    return len(product_ids)
+
+
+# ------------------------------------------------------------------ search
+
+def search_product_ids(tenant, query, limit=20):
+    """Return ids of the tenant's products matching ``query``, best match first."""
+    terms = _terms(query)
+    if tenant is None or not terms:
+        return []
+
+    vendor = _vendor()
+    if vendor == "sqlite":
+        match = 'tenant:"t%d" AND {name sku brand}:(%s)' % (
+            tenant.pk, " AND ".join(f'"{term}"*' for term in terms)
+        )
+        sql = (
+            f"SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s "
+            f"ORDER BY bm25({SQLITE_TABLE}, {SQLITE_WEIGHTS}) LIMIT %s"
+        )
+        params = [match, limit]
+    elif vendor == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        sql = (
+            f"SELECT product_id FROM {POSTGRES_TABLE}, to_tsquery('simple', %s) query "
+            f"WHERE tenant_id = %s AND document @@ query "
+            f"ORDER BY ts_rank(document, query) DESC, product_id LIMIT %s"
+        )
+        params = [tsquery, tenant.pk, limit]
+    else:
+        condition = Q()
+        for term in terms:
+            condition &= Q(name__icontains=term) | Q(sku__icontains=term) | Q(brand__icontains=term)
+        return list(
+            Product.objects.for_tenant(tenant).filter(condition)
+            .values_list("product_id", flat=True)[:limit]
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
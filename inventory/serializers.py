@@ -30,6 +30,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "mrp",
             "current_stock",
             "low_stock_alert",
+            "is_low_stock",
             "hsn_code",
             "gst_percent",
             "status",
@@ -42,6 +43,14 @@ class ProductSerializer(serializers.ModelSerializer):
             "current_stock",  # stock should be updated via StockMovement only
         ]
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # live stock annotated when sharded stock counters are enabled
+        live_stock = getattr(instance, "live_stock", None)
+        if live_stock is not None:
+            data["current_stock"] = live_stock
+        return data
+
     def validate(self, data):
         request = self.context.get("request")
         tenant = request.tenant
@@ -56,8 +65,9 @@ class ProductSerializer(serializers.ModelSerializer):
 class ProductImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductImage
-        fields = ["image_id", "product", "image", "uploaded_at"] 
-        read_only_fields = ["image_id", "uploaded_at"]
+        fields = ["image_id", "product", "image", "thumbnail", "medium", "full", "uploaded_at"]
+        # derivatives are empty (null) until the background render is done
+        read_only_fields = ["image_id", "thumbnail", "medium", "full", "uploaded_at"]
 
 class StockMovementSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.name", read_only=True)
@@ -73,4 +83,40 @@ class StockMovementSerializer(serializers.ModelSerializer):
             "date",
             "product_name",
         ]
-        read_only_fields = fields
\ No newline at end of file
+        read_only_fields = fields
+
+
+class StockHistorySerializer(StockMovementSerializer):
+    """Movement with its signed quantity and the stock balance right after it."""
+    signed_quantity = serializers.IntegerField(read_only=True)
+    balance = serializers.IntegerField(read_only=True)
+
+    class Meta(StockMovementSerializer.Meta):
+        fields = StockMovementSerializer.Meta.fields + ["signed_quantity", "balance"]
+        read_only_fields = fields
+
+class StockAdjustmentLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(help_text="Positive to add stock, negative to remove it")
+    reason = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_quantity(self, value):
+        if value == 0:
+            raise serializers.ValidationError("Quantity must not be zero.")
+        return value
+
+
+class StockAdjustmentSerializer(serializers.Serializer):
+    # an adjustment is one transaction, sized to commit well within
+    # MAX_WRITE_TRANSACTION_SECONDS (core.transactions)
+    MAX_LINES = 500
+
+    mode = serializers.ChoiceField(choices=["atomic", "partial"], default="atomic")
+    reference_type = serializers.CharField(max_length=100, default="Bulk Stock Adjustment")
+    reason = serializers.CharField(required=False, allow_blank=True, default="")
+    lines = StockAdjustmentLineSerializer(many=True, allow_empty=False)
+
+    def validate_lines(self, value):
+        if len(value) > self.MAX_LINES:
+            raise serializers.ValidationError(f"At most {self.MAX_LINES} lines per adjustment.")
+        return value
@@ -0,0 +1,311 @@
+import codecs
+import csv
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.transactions import bounded_atomic
+from . import lookup, search, stock
+from .models import Category, Product, StockMovement
+from .signals import stock_changed
+
+logger = logging.getLogger(__name__)
+
+# rows parsed and written per bulk_create / bulk_update round
+IMPORT_CHUNK_SIZE = 1000
+
+# Product columns written by the CSV import (besides tenant and sku)
+IMPORT_FIELDS = [
+    "name", "category", "brand", "size", "description", "unit",
+    "purchase_price", "selling_price", "mrp", "current_stock",
+    "low_stock_alert", "hsn_code", "gst_percent", "status",
+]
+
+
+def _decimal(value):
+    try:
+        return Decimal(value or 0)
+    except InvalidOperation:
+        raise ValueError(f"Invalid number: {value!r}")
+
+
+def _parse_row(row):
+    """Convert a CSV row into Product field values (category as a name)."""
+    return {
+        'name': (row.get('name') or '').strip(),
+        'category': (row.get('category') or '').strip(),
+        'brand': (row.get('brand') or '').strip() or None,
+        'size': (row.get('size') or '').strip() or None,
+        'description': (row.get('description') or '').strip() or None,
+        'unit': (row.get('unit') or 'pcs').strip(),
+        'purchase_price': _decimal(row.get('purchase_price')),
+        'selling_price': _decimal(row.get('selling_price')),
+        'mrp': _decimal(row.get('mrp')) if row.get('mrp') else None,
+        'current_stock': int(row.get('current_stock') or 0),
+        'low_stock_alert': int(row.get('low_stock_alert') or 0),
+        'hsn_code': (row.get('hsn_code') or '').strip() or None,
+        'gst_percent': _decimal(row.get('gst_percent')),
+        'status': (row.get('status') or 'active').strip(),
+    }
+
+
+class ProductImporter:
+    """
+    Batched CSV import of products for one tenant.
+
+    Existing SKUs and categories are loaded once up front; each chunk of rows
+    then costs one bulk_create for new categories, one bulk_create for new
+    products and one bulk_update for existing ones. If a chunk fails in the
+    database, its rows are retried one by one so the row-level error report
+    stays accurate.
+    """
+
+    def __init__(self, tenant, chunk_size=IMPORT_CHUNK_SIZE):
+        self.tenant = tenant
+        self.chunk_size = chunk_size
+        self.sku_to_pk = dict(
+            Product.objects.filter(tenant=tenant).values_list("sku", "pk")
+        )
+        self.category_to_pk = dict(
+            Category.objects.filter(tenant=tenant).values_list("name", "pk")
+        )
+        self.generated_skus = set()
+        self.success_count = 0
+        self.created_count = 0
+        self.updated_count = 0
+        self.errors = []
+
+    def run(self, uploaded_file):
+        """Import ``uploaded_file`` and return the result stats."""
+        started = time.perf_counter()
+        reader = csv.DictReader(codecs.iterdecode(uploaded_file, "utf-8-sig"))
+
+        chunk = []
+        row_count = 0
+        for row_num, row in enumerate(reader, start=2):  # Start at 2 to account for header
+            row_count += 1
+            chunk.append((row_num, row))
+            if len(chunk) >= self.chunk_size:
+                self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Imported {self.success_count}/{row_count} products for tenant {self.tenant.pk} in {elapsed:.2f}s"
+        )
+        return {
+            "row_count": row_count,
+            "success_count": self.success_count,
+            "created_count": self.created_count,
+            "updated_count": self.updated_count,
+            "error_count": len(self.errors),
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(row_count / elapsed, 1) if elapsed else None,
+        }
+
+    def import_chunk(self, chunk):
+        parsed = []
+        for row_num, row in chunk:
+            try:
+                data = _parse_row(row)
+            except (TypeError, ValueError) as e:
+                self.errors.append(f"Row {row_num}: {str(e)}")
+                continue
+            if not data['category']:
+                self.errors.append(f"Row {row_num}: Category is required")
+                continue
+            if not data['name']:
+                self.errors.append(f"Row {row_num}: Product name is required")
+                continue
+            data['sku'] = (row.get('sku') or '').strip() or self.generate_sku()
+            parsed.append((row_num, data))
+
+        if not parsed:
+            return
+
+        try:
+            with self.rollback_guard():
+                self.ensure_categories({data['category'] for _, data in parsed})
+                created, updated = self.write_products(parsed)
+        except Exception as e:
+            logger.warning(f"Bulk import chunk failed ({e}), retrying rows individually")
+            self.import_rows_individually(parsed)
+            return
+
+        self.created_count += created
+        self.updated_count += updated
+        self.success_count += len(parsed)
+
+    @contextmanager
+    def rollback_guard(self):
+        """Run a write in a transaction, restoring the lookup maps if it rolls back."""
+        skus, categories = dict(self.sku_to_pk), dict(self.category_to_pk)
+        try:
+            with bounded_atomic():
+                yield
+        except Exception:
+            self.sku_to_pk, self.category_to_pk = skus, categories
+            raise
+
+    def ensure_categories(self, names):
+        missing = [name for name in names if name not in self.category_to_pk]
+        if not missing:
+            return
+        Category.objects.bulk_create(
+            [Category(tenant=self.tenant, name=name, status='active') for name in missing],
+            ignore_conflicts=True,
+        )
+        self.category_to_pk.update(
+            Category.objects.filter(tenant=self.tenant, name__in=missing).values_list("name", "pk")
+        )
+
+    def build_product(self, data):
+        values = dict(data, category_id=self.category_to_pk[data['category']])
+        del values['category']
+        pk = self.sku_to_pk.get(data['sku'])
+        return Product(pk=pk, tenant=self.tenant, **values)
+
+    def write_products(self, parsed):
+        # later rows for the same SKU win, as with row-by-row saves
+        by_sku = {data['sku']: data for _, data in parsed}
+        to_create, to_update = [], []
+        for data in by_sku.values():
+            product = self.build_product(data)
+            (to_update if product.pk else to_create).append(product)
+
+        if to_update:
+            # bulk_update does not apply auto_now
+            now = timezone.now()
+            for product in to_update:
+                product.updated_at = now
+            Product.objects.bulk_update(to_update, IMPORT_FIELDS + ["updated_at"])
+            # the imported current_stock replaces any sharded counter slots
+            stock.reset([p.pk for p in to_update])
+        if to_create:
+            Product.objects.bulk_create(to_create)
+            self.sku_to_pk.update(
+                Product.objects.filter(
+                    tenant=self.tenant, sku__in=[p.sku for p in to_create]
+                ).values_list("sku", "pk")
+            )
+
+        # bulk writes skip the post_save receivers, so sync derived data here
+        product_ids = [self.sku_to_pk[sku] for sku in by_sku]
+        search.index_products(product_ids)
+        stock_changed(self.tenant.pk, product_ids)
+        # imports are rare and may touch most of the catalog: reload the SKU index
+        tenant_id = self.tenant.pk
+        transaction.on_commit(lambda: lookup.invalidate(tenant_id))
+        return len(to_create), len(to_update)
+
+    def import_rows_individually(self, parsed):
+        for row_num, data in parsed:
+            try:
+                with self.rollback_guard():
+                    self.ensure_categories({data['category']})
+                    created, updated = self.write_products([(row_num, data)])
+            except Exception as e:
+                self.errors.append(f"Row {row_num}: {str(e)}")
+                continue
+            self.created_count += created
+            self.updated_count += updated
+            self.success_count += 1
+
+    def generate_sku(self):
+        # Generate a random SKU if not provided
+        while True:
+            sku = str(random.randint(10000, 99999))
+            if sku not in self.sku_to_pk and sku not in self.generated_skus:
+                self.generated_skus.add(sku)
+                return sku
+
+
+def import_products_csv(tenant, uploaded_file, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import products from an uploaded CSV file, parsing it incrementally.
+
+    Returns a dict of counts, row-level errors and timing/throughput stats.
+    """
+    return ProductImporter(tenant, chunk_size=chunk_size).run(uploaded_file)
+
+
+class AdjustmentAborted(Exception):
+    """Raised inside an atomic adjustment to roll back every line of it."""
+
+
+def adjust_stock(tenant, lines, mode="atomic", reference_type="Bulk Stock Adjustment", reason=""):
+    """
+    Apply many signed stock changes (a goods receipt, a stock-take) in one call.
+
+    Each line is ``{"product_id", "quantity", "reason"}`` where a positive
+    quantity adds stock and a negative one removes it. Lines of the same
+    product are netted and succeed or fail together. The stock changes are
+    made by stock.adjust(), which checks for insufficient stock in the
+    UPDATE itself, and the movements are written with one bulk insert.
+
+    - ``"atomic"``: any failing line rolls the whole adjustment back.
+    - ``"partial"``: failing lines are reported and the rest are applied.
+
+    Returns ``(results, committed)`` with one result per line, in order:
+    ``{"index", "product_id", "quantity", "status", "new_stock", "error"}``
+    where status is "applied", "error" or "rolled_back".
+    """
+    product_ids = {line["product_id"] for line in lines}
+    known = set(
+        Product.objects.filter(tenant=tenant, pk__in=product_ids).values_list("pk", flat=True)
+    )
+
+    results, deltas = [], defaultdict(int)
+    for index, line in enumerate(lines):
+        result = {
+            "index": index, "product_id": line["product_id"], "quantity": line["quantity"],
+            "status": None, "new_stock": None, "error": None,
+        }
+        results.append(result)
+        if line["product_id"] in known:
+            deltas[line["product_id"]] += line["quantity"]
+        else:
+            result.update(status="error", error="Product not found or not in tenant")
+
+    committed = True
+    try:
+        with bounded_atomic():
+            if mode == "atomic" and any(result["status"] == "error" for result in results):
+                raise AdjustmentAborted
+            short = stock.adjust(tenant, deltas)
+            for result in results:
+                if result["product_id"] in short:
+                    result.update(status="error", error="Insufficient stock")
+            if mode == "atomic" and short:
+                raise AdjustmentAborted
+
+            applied = [(result, lines[result["index"]]) for result in results if result["status"] is None]
+            StockMovement.objects.bulk_create([
+                StockMovement(
+                    tenant=tenant,
+                    product_id=line["product_id"],
+                    type="IN" if line["quantity"] > 0 else "OUT",
+                    quantity=abs(line["quantity"]),
+                    reference_type=reference_type,
+                    reason=line.get("reason") or reason,
+                )
+                for result, line in applied
+            ])
+            levels = stock.current_stock({result["product_id"] for result, _ in applied})
+            for result, _ in applied:
+                result.update(status="applied", new_stock=levels[result["product_id"]])
+    except AdjustmentAborted:
+        committed = False
+        for result in results:
+            if result["status"] is None:
+                result["status"] = "rolled_back"
+    return results, committed
@@ -0,0 +1,73 @@
+"""
+Signal receivers keeping derived product data (search index, SKU lookup
+index, low-stock flag, cached catalog lists, image derivatives) in sync.
+
+Bulk writers that bypass save() (bulk_create, bulk_update, update()) must
+call the same helpers themselves, e.g. stock_changed() after stock updates.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_namespace
+from . import alerts, images, lookup, search
+from .models import Category, Product, ProductImage, StockMovement
+
+# tenant cache namespace of the product and category lists
+CATALOG_NAMESPACE = "catalog"
+
+# fields stored in the search index; saves touching only other fields skip re-indexing
+SEARCH_FIELDS = {"name", "sku", "brand"}
+
+# fields the low-stock flag depends on
+ALERT_FIELDS = {"current_stock", "low_stock_alert"}
+
+# fields kept in the SKU lookup index
+LOOKUP_FIELDS = set(lookup.FIELDS)
+
+
+def stock_changed(tenant_id, product_ids):
+    """
+    Call after writes to Product.current_stock that bypass Product.save().
+    The low-stock flag is refreshed right away and cached catalog lists
+    expire once the transaction commits (the SKU lookup index holds no
+    stock, so it is left alone).
+    """
+    alerts.refresh(product_ids)
+    catalog_changed(tenant_id)
+
+
+def catalog_changed(tenant_id):
+    """Expire the tenant's cached catalog lists once the transaction commits."""
+    transaction.on_commit(lambda: bump_namespace(tenant_id, CATALOG_NAMESPACE))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or SEARCH_FIELDS & set(update_fields):
+        search.index_products([instance.pk])
+    if update_fields is None or ALERT_FIELDS & set(update_fields):
+        alerts.refresh([instance.pk])
+    if update_fields is None or LOOKUP_FIELDS & set(update_fields):
+        transaction.on_commit(lambda: lookup.product_saved(instance))
+    catalog_changed(instance.tenant_id)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+    tenant_id, product_id = instance.tenant_id, instance.pk
+    transaction.on_commit(lambda: lookup.product_deleted(tenant_id, product_id))
+    catalog_changed(instance.tenant_id)
+
+
+@receiver(post_save, sender=ProductImage)
+def product_image_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or "image" in update_fields:
+        images.schedule(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=StockMovement)
+def catalog_row_changed(sender, instance, **kwargs):
+    catalog_changed(instance.tenant_id)
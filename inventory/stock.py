@@ -0,0 +1,308 @@
+"""
+Stock level writes and reads.
+
+By default a product's stock lives on Product.current_stock and is changed
+with conditional ``UPDATE ... SET current_stock = current_stock - n WHERE
+current_stock >= n`` statements, so stock can never go negative.
+
+With ``INVENTORY_STOCK_COUNTER_SLOTS = N`` (N > 0) a product's stock is
+spread over N StockCounterSlot rows instead, so concurrent sales of the same
+product decrement different rows rather than queueing on one:
+
+- Slots are seeded lazily from current_stock the first time a product's
+  stock changes; from then on current_stock is only a snapshot and the
+  live stock is the sum of the slots.
+- A decrement takes one slot that is not locked by another transaction
+  (``SKIP LOCKED`` where supported) and holds enough stock. If none does,
+  it locks all of the product's slots in slot order and drains them, so
+  the stock is only short when the total is short. Each slot stays
+  non-negative, hence so does the total.
+- ``manage.py compact_stock_counters`` folds the slots back into
+  current_stock and rebalances them; run it periodically, and once more
+  after turning the mode off. Slot writes leave Product.updated_at alone,
+  so delta sync clients see sharded stock changes after compaction.
+
+Callers must be inside transaction.atomic().
+"""
+import random
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Product, StockCounterSlot
+from . import signals
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+def slot_count():
+    return getattr(settings, "INVENTORY_STOCK_COUNTER_SLOTS", 0)
+
+
+def sharded():
+    return slot_count() > 0
+
+
+# ------------------------------------------------------------------ writes
+
+def add(tenant, product_id, quantity):
+    """Add ``quantity`` units to a product's stock."""
+    if sharded():
+        _ensure_slots([product_id])
+        _add_to_slot(product_id, quantity)
+    else:
+        Product.objects.filter(pk=product_id, tenant=tenant).update(
+            current_stock=F("current_stock") + quantity, updated_at=timezone.now()
+        )
+    signals.stock_changed(tenant.pk, [product_id])
+
+
+def remove(tenant, product_id, quantity, name=None):
+    """Take ``quantity`` units out of a product's stock or raise InsufficientStock."""
+    deduct(tenant, {product_id: quantity}, names={product_id: name} if name else None)
+
+
+def deduct(tenant, quantities, names=None):
+    """
+    Take stock out for several products at once.
+
+    ``quantities`` is {product_id: quantity}; products are processed in
+    primary key order so concurrent callers take their locks in the same
+    order. Raises InsufficientStock naming the first product that is short.
+    """
+    product_ids = sorted(quantities)
+    names = names or {}
+    if sharded():
+        _ensure_slots(product_ids)
+        for product_id in product_ids:
+            if not _take_from_slots(product_id, quantities[product_id]):
+                raise InsufficientStock(
+                    f"Insufficient stock for product {names.get(product_id, product_id)}"
+                )
+    else:
+        for product_id in product_ids:
+            qty = quantities[product_id]
+            updated = Product.objects.filter(
+                pk=product_id, tenant=tenant, current_stock__gte=qty
+            ).update(current_stock=F("current_stock") - qty, updated_at=timezone.now())
+            if not updated:
+                raise InsufficientStock(
+                    f"Insufficient stock for product {names.get(product_id, product_id)}"
+                )
+    signals.stock_changed(tenant.pk, product_ids)
+
+
+def adjust(tenant, deltas):
+    """
+    Apply signed stock changes to several products at once.
+
+    ``deltas`` is {product_id: delta}. Products whose stock would go below
+    zero, or that are not the tenant's, are left unchanged and their ids are
+    returned; all other changes are applied.
+
+    Without counter slots the rows are locked in primary key order and
+    changed by one conditional UPDATE, which checks the stock of every
+    product it decrements. Only when a product is short does it fall back to
+    one conditional UPDATE per product to find out which.
+    """
+    product_ids = sorted(pk for pk, delta in deltas.items() if delta)
+    short = set()
+    if sharded():
+        _ensure_slots(product_ids)
+        for product_id in product_ids:
+            delta = deltas[product_id]
+            if delta > 0:
+                _add_to_slot(product_id, delta)
+            elif not _take_from_slots(product_id, -delta):
+                short.add(product_id)
+    elif product_ids:
+        short = _adjust_rows(tenant, {pk: deltas[pk] for pk in product_ids})
+    signals.stock_changed(tenant.pk, [pk for pk in product_ids if pk not in short])
+    return short
+
+
+def _adjust_rows(tenant, deltas):
+    products = Product.objects.filter(tenant=tenant)
+    removals = {pk: -delta for pk, delta in deltas.items() if delta < 0}
+    condition = Q(pk__in=[pk for pk, delta in deltas.items() if delta > 0])
+    if removals:
+        required = Case(
+            *[When(pk=pk, then=Value(quantity)) for pk, quantity in removals.items()],
+            output_field=IntegerField(),
+        )
+        condition |= Q(pk__in=list(removals), current_stock__gte=required)
+    change = Case(
+        *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    try:
+        with transaction.atomic():
+            # same lock order as deduct(), so concurrent bills cannot deadlock with us
+            list(products.select_for_update().filter(pk__in=list(deltas)).order_by("pk").values_list("pk"))
+            updated = products.filter(condition).update(
+                current_stock=F("current_stock") + change, updated_at=timezone.now()
+            )
+            if updated < len(deltas):
+                raise InsufficientStock
+        return set()
+    except InsufficientStock:
+        pass
+
+    short = set()
+    for product_id, delta in deltas.items():
+        rows = products.filter(pk=product_id)
+        if delta < 0:
+            rows = rows.filter(current_stock__gte=-delta)
+        if not rows.update(current_stock=F("current_stock") + delta, updated_at=timezone.now()):
+            short.add(product_id)
+    return short
+
+
+def reset(product_ids):
+    """
+    Drop the slots of products whose current_stock was just overwritten
+    (e.g. by the CSV import); they are re-seeded from it on next use.
+    """
+    StockCounterSlot.objects.filter(product_id__in=list(product_ids)).delete()
+
+
+def _ensure_slots(product_ids):
+    """Create the slots of products that have none, seeded from current_stock."""
+    seeded = set(
+        StockCounterSlot.objects.filter(product_id__in=product_ids)
+        .values_list("product_id", flat=True).distinct()
+    )
+    missing = [pk for pk in product_ids if pk not in seeded]
+    if not missing:
+        return
+    # the product row lock makes concurrent seeding of one product wait;
+    # ignore_conflicts covers backends without row locks
+    products = (
+        Product.objects.select_for_update()
+        .filter(pk__in=missing).order_by("pk")
+        .values_list("pk", "current_stock")
+    )
+    StockCounterSlot.objects.bulk_create(
+        [
+            slot
+            for pk, current_stock in products
+            for slot in _split(pk, current_stock, slot_count())
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _add_to_slot(product_id, quantity):
+    StockCounterSlot.objects.filter(
+        product_id=product_id, slot=random.randrange(slot_count())
+    ).update(quantity=F("quantity") + quantity)
+
+
+def _split(product_id, total, count):
+    share, remainder = divmod(max(total, 0), count)
+    return [
+        StockCounterSlot(product_id=product_id, slot=n, quantity=share + (n < remainder))
+        for n in range(count)
+    ]
+
+
+def _take_from_slots(product_id, quantity):
+    slots = StockCounterSlot.objects.filter(product_id=product_id)
+
+    # fast path: one free slot that covers the whole quantity
+    if connection.features.has_select_for_update_skip_locked:
+        candidate = (
+            slots.select_for_update(skip_locked=True)
+            .filter(quantity__gte=quantity).order_by("?")
+            .values_list("pk", flat=True).first()
+        )
+        if candidate is not None:
+            slots.filter(pk=candidate).update(quantity=F("quantity") - quantity)
+            return True
+    else:
+        start = random.randrange(slot_count())
+        for n in range(slot_count()):
+            if slots.filter(
+                slot=(start + n) % slot_count(), quantity__gte=quantity
+            ).update(quantity=F("quantity") - quantity):
+                return True
+
+    # slow path: lock every slot and drain them in order
+    locked = list(slots.select_for_update().order_by("slot"))
+    if sum(slot.quantity for slot in locked) < quantity:
+        return False
+    remaining = quantity
+    for slot in locked:
+        taken = min(slot.quantity, remaining)
+        slot.quantity -= taken
+        remaining -= taken
+    StockCounterSlot.objects.bulk_update(locked, ["quantity"])
+    return True
+
+
+# ------------------------------------------------------------------- reads
+
+def live_stock():
+    """Expression for a product's live stock, for Product querysets."""
+    slot_sum = (
+        StockCounterSlot.objects.filter(product=OuterRef("pk"))
+        .order_by().values("product")
+        .annotate(total=Sum("quantity")).values("total")
+    )
+    return Coalesce(Subquery(slot_sum), F("current_stock"), Value(0))
+
+
+def with_live_stock(queryset):
+    """Annotate ``live_stock`` on a Product queryset when the mode is on."""
+    if not sharded():
+        return queryset
+    return queryset.annotate(live_stock=live_stock())
+
+
+def current_stock(product_ids):
+    """Return {product_id: live stock} for the given products."""
+    products = Product.objects.filter(pk__in=list(product_ids))
+    if sharded():
+        return dict(products.annotate(live=live_stock()).values_list("pk", "live"))
+    return dict(products.values_list("pk", "current_stock"))
+
+
+# -------------------------------------------------------------- compaction
+
+def compact(product_ids):
+    """
+    Fold the slots of the given products into current_stock and rebalance
+    them over the configured slot count (dropping them when the mode is
+    off). Returns the number of products compacted.
+    """
+    compacted = 0
+    for product_id in sorted(product_ids):
+        with transaction.atomic():
+            product = Product.objects.select_for_update().filter(pk=product_id).first()
+            locked = list(
+                StockCounterSlot.objects.select_for_update()
+                .filter(product_id=product_id).order_by("slot")
+            )
+            if product is None or not locked:
+                continue
+            total = sum(slot.quantity for slot in locked)
+            Product.objects.filter(pk=product_id).update(current_stock=total, updated_at=timezone.now())
+            # rewrite the slots in place: transactions waiting on their
+            # locks must find the rows again once this one commits
+            balanced = _split(product_id, total, slot_count()) if sharded() else []
+            for slot, target in zip(locked, balanced):
+                slot.quantity = target.quantity
+            StockCounterSlot.objects.bulk_update(locked[:len(balanced)], ["quantity"])
+            StockCounterSlot.objects.filter(
+                pk__in=[slot.pk for slot in locked[len(balanced):]]
+            ).delete()
+            StockCounterSlot.objects.bulk_create(balanced[len(locked):])
+            signals.stock_changed(product.tenant_id, [product_id])
+            compacted += 1
+    return compacted
@@ -1,3 +1,925 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import shutil
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from PIL import Image
+from rest_framework.test import APIClient
+
+from authentication.models import Tenant, User
+from core.models import CacheNamespace
+from . import images, ledger, lookup, stock
+from .models import Category, Product, ProductImage, StockCheckpoint, StockCounterSlot, StockMovement
+
+
+def create_tenant_client(business_name, email):
+    """Create a tenant with an admin user and return (tenant, authenticated client)."""
+    # cache entries outlive each test's rollback, and primary keys are reused
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    lookup.clear()
+    tenant = Tenant.objects.create(
+        business_name=business_name,
+        plan="Standard",
+        status="Active",
+        sub_end_date=timezone.now() + timezone.timedelta(days=30),
+    )
+    User.objects.create_user(email=email, password="password123", tenant=tenant, role="Admin")
+    client = APIClient()
+    response = client.post(reverse("token_obtain_pair"), {"email": email, "password": "password123"})
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+    return tenant, client
+
+
+class ProductPaginationTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        # duplicate names force the primary key tie-breaker
+        for i, name in enumerate(["b", "a", "c", "a", "b", "d", "a"]):
+            Product.objects.create(
+                tenant=self.tenant,
+                category=category,
+                name=name,
+                sku=f"SKU-{i}",
+                purchase_price=Decimal("10.00"),
+                selling_price=Decimal("20.00"),
+            )
+        self.url = reverse("product-list")
+
+    def test_walks_pages_forward_and_back(self):
+        expected = list(
+            Product.objects.filter(tenant=self.tenant)
+            .order_by("name", "product_id")
+            .values_list("product_id", flat=True)
+        )
+
+        seen, pages = [], []
+        url = f"{self.url}?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids = [row["product_id"] for row in response.data["results"]]
+            seen.extend(ids)
+            pages.append((ids, response.data["previous"]))
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+
+        # the previous link of the last page returns the middle page
+        response = self.client.get(pages[-1][1])
+        self.assertEqual([row["product_id"] for row in response.data["results"]], pages[1][0])
+
+    def test_cursor_is_bound_to_tenant(self):
+        response = self.client.get(f"{self.url}?page_size=2")
+        next_url = response.data["next"]
+
+        _, other_client = create_tenant_client("Other Store", "owner@other.com")
+        response = other_client.get(next_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(INVENTORY_STOCK_COUNTER_SLOTS=4)
+    def test_sharded_stock_ordering_reads_the_slots(self):
+        products = list(Product.objects.filter(tenant=self.tenant).order_by("product_id"))
+        for quantity, product in enumerate(products):
+            stock.add(self.tenant, product.pk, quantity)
+        expected = [product.pk for product in reversed(products)]
+
+        seen = []
+        url = f"{self.url}?ordering=-current_stock&page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row["product_id"] for row in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+
+
+class ProductExportTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        for i in range(3):
+            Product.objects.create(
+                tenant=self.tenant,
+                category=category,
+                name=f"Runner {i}",
+                sku=f"SKU-{i}",
+                purchase_price=Decimal("10.00"),
+                selling_price=Decimal("20.00"),
+            )
+        self.url = reverse("product-export-csv")
+
+    def test_streams_csv_rows(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith("Runner 0,SKU-0,Shoes,"))
+
+    @override_settings(INVENTORY_STOCK_COUNTER_SLOTS=4)
+    def test_sharded_export_reads_the_slots(self):
+        product = Product.objects.get(tenant=self.tenant, sku="SKU-0")
+        stock.add(self.tenant, product.pk, 7)
+        response = self.client.get(self.url)
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0]["current_stock"], "7")
+
+    def test_gzip_export(self):
+        response = self.client.get(f"{self.url}?compress=gzip")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        body = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertEqual(len(body.splitlines()), 4)
+
+
+class ProductImportTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name="Old name",
+            sku="SKU-1",
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+        )
+        self.url = reverse("product-import-csv")
+
+    def test_imports_in_bulk_and_reports_errors(self):
+        content = (
+            "name,sku,category,purchase_price,selling_price,current_stock\n"
+            "New name,SKU-1,Shoes,11,22,5\n"
+            "Sandal,SKU-2,Sandals,5,9.50,3\n"
+            ",SKU-3,Sandals,5,9,1\n"
+            "Slipper,SKU-4,,5,9,1\n"
+            "Boot,SKU-5,Shoes,abc,9,1\n"
+        )
+        upload = SimpleUploadedFile("products.csv", content.encode(), content_type="text/csv")
+        response = self.client.post(self.url, {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["success_count"], 2)
+        self.assertEqual(response.data["created_count"], 1)
+        self.assertEqual(response.data["updated_count"], 1)
+        self.assertEqual(response.data["error_count"], 3)
+        self.assertIn("rows_per_second", response.data)
+
+        updated = Product.objects.get(tenant=self.tenant, sku="SKU-1")
+        self.assertEqual(updated.name, "New name")
+        self.assertEqual(updated.current_stock, 5)
+        created = Product.objects.get(tenant=self.tenant, sku="SKU-2")
+        self.assertEqual(created.category.name, "Sandals")
+        self.assertEqual(created.selling_price, Decimal("9.50"))
+
+    def test_imported_skus_are_found_by_lookup(self):
+        lookup_url = reverse("product-lookup-sku")
+        self.client.get(lookup_url, {"sku": "SKU-1"})  # loads the SKU index
+
+        content = (
+            "name,sku,category,purchase_price,selling_price,current_stock\n"
+            "Old name,SKU-1,Shoes,10,99,5\n"
+            "Sandal,SKU-2,Sandals,5,9.50,3\n"
+        )
+        upload = SimpleUploadedFile("products.csv", content.encode(), content_type="text/csv")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {"file": upload}, format="multipart")
+
+        self.assertEqual(self.client.get(lookup_url, {"sku": "SKU-1"}).data["selling_price"], "99.00")
+        self.assertEqual(self.client.get(lookup_url, {"sku": "SKU-2"}).data["selling_price"], "9.50")
+
+
+class ProductSearchTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        other_tenant, _ = create_tenant_client("Other Store", "owner@other.com")
+        for tenant in (self.tenant, other_tenant):
+            category = Category.objects.create(tenant=tenant, name="Shoes")
+            for name, sku, brand in [
+                ("Air Max 90", "NK-AM90", "Nike"),
+                ("Nimbus Runner", "AS-NIM", "Asics"),
+                ("Court Classic", "PU-CC", "Puma"),
+            ]:
+                Product.objects.create(
+                    tenant=tenant,
+                    category=category,
+                    name=name,
+                    sku=sku,
+                    brand=brand,
+                    purchase_price=Decimal("10.00"),
+                    selling_price=Decimal("20.00"),
+                )
+        self.url = reverse("product-search-products")
+
+    def search(self, q):
+        response = self.client.get(self.url, {"q": q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["name"] for row in response.data]
+
+    def test_prefix_search_is_ranked_and_tenant_scoped(self):
+        self.assertEqual(self.search("ni"), ["Nimbus Runner", "Air Max 90"])
+        self.assertEqual(self.search("nik air"), ["Air Max 90"])
+        self.assertEqual(self.search("pu-cc"), ["Court Classic"])
+
+    def test_index_follows_saves_and_deletes(self):
+        product = Product.objects.get(tenant=self.tenant, sku="PU-CC")
+        product.name = "Suede Classic"
+        product.save()
+        self.assertEqual(self.search("suede"), ["Suede Classic"])
+        product.delete()
+        self.assertEqual(self.search("classic"), [])
+
+
+class SkuLookupTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name="Air Max 90",
+            sku="8901234567890",
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+            current_stock=4,
+        )
+        self.url = reverse("product-lookup-sku")
+
+    def test_scan_is_served_from_index_and_invalidated_on_save(self):
+        response = self.client.get(self.url, {"sku": "8901234567890"})
+        self.assertEqual(response.data["selling_price"], "20.00")
+
+        # only the live stock is read
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"sku": "8901234567890"})
+        self.assertEqual(response.data["product_id"], self.product.pk)
+        self.assertEqual(response.data["current_stock"], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.selling_price = Decimal("25.00")
+            self.product.save()
+        response = self.client.get(self.url, {"sku": "8901234567890"})
+        self.assertEqual(response.data["selling_price"], "25.00")
+
+    def test_writes_patch_only_the_changed_product(self):
+        other = Product.objects.create(
+            tenant=self.tenant, category=self.product.category, name="Pegasus", sku="8901234567891",
+            purchase_price=Decimal("10.00"), selling_price=Decimal("30.00"),
+        )
+        self.client.get(self.url, {"sku": "8901234567890"})
+
+        # sales and adjustments leave the index loaded
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("product-add-stock", args=[self.product.pk]), {"quantity": 3})
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"sku": "8901234567890"})
+        self.assertEqual(response.data["current_stock"], 7)
+
+        # a new SKU replaces the old one, and a deleted product is dropped
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.sku = "8901234567899"
+            self.product.save()
+            other.delete()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"sku": "8901234567899"})
+        self.assertEqual(response.data["product_id"], self.product.pk)
+        for sku in ["8901234567890", "8901234567891"]:
+            response = self.client.get(self.url, {"sku": sku})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_concurrent_saves_do_not_corrupt_the_index(self):
+        self.client.get(self.url, {"sku": "8901234567890"})
+
+        def save_many(offset):
+            for n in range(200):
+                product = Product(
+                    pk=self.product.pk + offset, tenant_id=self.tenant.pk, sku=f"T{offset}-{n}",
+                    name="x", selling_price=Decimal("1.00"), gst_percent=Decimal("0"),
+                )
+                lookup.product_saved(product)
+
+        threads = [threading.Thread(target=save_many, args=(offset,)) for offset in range(1, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        index = lookup._index.get(self.tenant.pk)
+        # one record per product, each under its latest SKU
+        self.assertEqual(len(index.by_sku), 5)
+        self.assertEqual(index.sku_of[self.product.pk + 1], "T1-199")
+
+    @override_settings(INVENTORY_STOCK_COUNTER_SLOTS=4)
+    def test_sharded_scan_reads_the_slots(self):
+        self.client.get(self.url, {"sku": "8901234567890"})
+        stock.add(self.tenant, self.product.pk, 6)
+        response = self.client.get(self.url, {"sku": "8901234567890"})
+        self.assertEqual(response.data["current_stock"], 10)
+
+    def test_unknown_sku(self):
+        response = self.client.get(self.url, {"sku": "missing"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class StockLedgerTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name="Air Max 90",
+            sku="NK-AM90",
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+            current_stock=13,
+        )
+        Product.objects.filter(pk=self.product.pk).update(
+            created_at=timezone.make_aware(timezone.datetime(2025, 1, 1))
+        )
+        # 20 in on Jan 5, 5 sold on Feb 10, 2 out on Mar 3  -> 13 now
+        for kind, qty, day in [("IN", 20, (1, 5)), ("SALE", 5, (2, 10)), ("OUT", 2, (3, 3))]:
+            movement = StockMovement.objects.create(
+                tenant=self.tenant, product=self.product, type=kind, quantity=qty
+            )
+            StockMovement.objects.filter(pk=movement.pk).update(
+                date=timezone.make_aware(timezone.datetime(2025, *day, 12))
+            )
+
+    def assert_stock(self, expected):
+        for (month, day), qty in expected.items():
+            at = timezone.make_aware(timezone.datetime(2025, month, day))
+            self.assertEqual(ledger.stock_as_of(self.tenant, at)[self.product.pk], qty)
+
+    def test_stock_as_of_with_and_without_checkpoints(self):
+        expected = {(1, 2): 0, (1, 6): 20, (2, 11): 15, (3, 1): 15, (3, 4): 13}
+        self.assert_stock(expected)
+
+        written = ledger.build_checkpoints(
+            self.tenant, "MONTH", until=timezone.make_aware(timezone.datetime(2025, 3, 15))
+        )
+        self.assertEqual(written, 2)
+        self.assertEqual(
+            list(StockCheckpoint.objects.order_by("period_end").values_list("stock", flat=True)),
+            [20, 15],
+        )
+        self.assert_stock(expected)
+
+    @override_settings(INVENTORY_STOCK_COUNTER_SLOTS=4)
+    def test_sharded_stock_as_of_walks_back_from_the_slots(self):
+        # 4 more in today: 17 live, while current_stock still says 13
+        self.client.post(reverse("product-add-stock", args=[self.product.pk]), {"quantity": 4})
+        self.assert_stock({(3, 4): 13, (1, 6): 20})
+        response = self.client.get(reverse("product-stock-valuation"), {"at": "2025-03-04"})
+        self.assertEqual(response.data["totals"]["quantity"], 13)
+
+    def test_stock_as_of_endpoint(self):
+        response = self.client.get(reverse("product-stock-as-of"), {"at": "2025-02-10"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["products"][0]["stock"], 15)
+        self.assertEqual(response.data["total_value"], "150.00")
+
+
+@override_settings(INVENTORY_STOCK_COUNTER_SLOTS=4)
+class StockCounterTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name="Runner",
+            sku="RUN-1",
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+            current_stock=10,
+        )
+
+    def test_slots_are_seeded_and_never_go_negative(self):
+        stock.remove(self.tenant, self.product.pk, 3)
+        slots = StockCounterSlot.objects.filter(product=self.product)
+        self.assertEqual(slots.count(), 4)
+        self.assertEqual(stock.current_stock([self.product.pk])[self.product.pk], 7)
+
+        # more than any single slot holds: drained across slots
+        stock.remove(self.tenant, self.product.pk, 6)
+        self.assertEqual(stock.current_stock([self.product.pk])[self.product.pk], 1)
+        with self.assertRaises(stock.InsufficientStock):
+            stock.remove(self.tenant, self.product.pk, 2)
+        self.assertFalse(slots.filter(quantity__lt=0).exists())
+
+        stock.compact([self.product.pk])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 1)
+        self.assertEqual(sum(slots.values_list("quantity", flat=True)), 1)
+
+        # turning the mode off folds the slots away
+        with override_settings(INVENTORY_STOCK_COUNTER_SLOTS=0):
+            stock.compact([self.product.pk])
+        self.assertFalse(slots.exists())
+
+    def test_stock_endpoints_read_the_slots(self):
+        url = reverse("product-add-stock", args=[self.product.pk])
+        response = self.client.post(url, {"quantity": 5})
+        self.assertEqual(response.data["new_stock"], 15)
+
+        url = reverse("product-remove-stock", args=[self.product.pk])
+        response = self.client.post(url, {"quantity": 16})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {"quantity": 4})
+        self.assertEqual(response.data["new_stock"], 11)
+
+        response = self.client.get(reverse("product-detail", args=[self.product.pk]))
+        self.assertEqual(response.data["current_stock"], 11)
+        self.assertEqual(StockMovement.objects.filter(product=self.product).count(), 2)
+
+    def test_stock_adjustments_honor_idempotency_key(self):
+        url = reverse("product-remove-stock", args=[self.product.pk])
+        headers = {"HTTP_IDEMPOTENCY_KEY": "adjust-1"}
+        response = self.client.post(url, {"quantity": 4}, **headers)
+        self.assertEqual(response.data["new_stock"], 6)
+        with self.assertNumQueries(1):
+            response = self.client.post(url, {"quantity": 4}, **headers)
+        self.assertEqual(response.data["new_stock"], 6)
+        self.assertEqual(stock.current_stock([self.product.pk])[self.product.pk], 6)
+
+        # keys are per endpoint, and failures are not stored
+        url = reverse("product-add-stock", args=[self.product.pk])
+        response = self.client.post(url, {"quantity": 0}, **headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {"quantity": 1}, **headers)
+        self.assertEqual(response.data["new_stock"], 7)
+        self.assertEqual(StockMovement.objects.filter(product=self.product).count(), 2)
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        self.category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=self.category,
+            name="Runner",
+            sku="RUN-1",
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+            current_stock=10,
+        )
+        self.url = reverse("product-list")
+
+    def test_lists_are_cached_per_query_and_expire_on_writes(self):
+        self.client.get(self.url)
+        # only the shared namespace version is read
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["results"][0]["current_stock"], 10)
+
+        # a different filter/ordering combination is a different entry
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {"ordering": "-selling_price"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("product-add-stock", args=[self.product.pk]), {"quantity": 5})
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["results"][0]["current_stock"], 15)
+
+        categories = reverse("category-list")
+        self.client.get(categories)
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(tenant=self.tenant, name="Bags")
+        self.assertEqual(len(self.client.get(categories).data["results"]), 2)
+
+    def test_writes_in_another_worker_expire_local_entries(self):
+        self.client.get(self.url)
+        # another process changes the product and bumps the namespace; this
+        # process's cached list is left alone
+        Product.objects.filter(pk=self.product.pk).update(current_stock=4)
+        CacheNamespace.objects.filter(tenant=self.tenant, namespace="catalog").update(
+            version=F("version") + 1
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["results"][0]["current_stock"], 4)
+
+    def test_tenants_do_not_share_entries(self):
+        self.client.get(self.url)
+        _, other = create_tenant_client("Other Store", "owner@other.com")
+        self.client.get(self.url)  # create_tenant_client cleared the cache
+        self.assertEqual(other.get(self.url).data["results"], [])
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name="Runner",
+            sku="RUN-1",
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+        )
+
+    def test_list_and_detail_return_304_until_a_write(self):
+        for url in [reverse("product-list"), reverse("product-detail", args=[self.product.pk])]:
+            response = self.client.get(url)
+            etag = response["ETag"]
+            self.assertTrue(etag.startswith('"'))
+
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response["ETag"], etag)
+
+        # the list and the detail have different tags
+        list_etag = self.client.get(reverse("product-list"))["ETag"]
+        self.assertNotEqual(list_etag, etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "Trail Runner"
+            self.product.save()
+        response = self.client.get(reverse("product-list"), HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], list_etag)
+
+    def test_etags_are_shared_by_all_workers(self):
+        url = reverse("product-list")
+        etag = self.client.get(url)["ETag"]
+
+        # a worker with nothing cached computes the same tag
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # and a write committed by another worker makes it stale here
+        CacheNamespace.objects.filter(tenant=self.tenant, namespace="catalog").update(
+            version=F("version") + 1
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BulkStockAdjustmentTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.products = [
+            Product.objects.create(
+                tenant=self.tenant,
+                category=category,
+                name=f"Runner {i}",
+                sku=f"RUN-{i}",
+                purchase_price=Decimal("10.00"),
+                selling_price=Decimal("20.00"),
+                current_stock=5,
+            )
+            for i in range(3)
+        ]
+        self.url = reverse("product-adjust-stock")
+
+    def stock_levels(self):
+        return [
+            product.current_stock
+            for product in Product.objects.filter(tenant=self.tenant).order_by("pk")
+        ]
+
+    def test_atomic_adjustment(self):
+        first, second, third = self.products
+        lines = [
+            {"product_id": first.pk, "quantity": 10},
+            {"product_id": second.pk, "quantity": -5},
+            {"product_id": first.pk, "quantity": -3, "reason": "damaged"},
+            {"product_id": third.pk, "quantity": -6},  # more than in stock
+        ]
+        response = self.client.post(self.url, {"lines": lines}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["rolled_back", "rolled_back", "rolled_back", "error"],
+        )
+        self.assertEqual(self.stock_levels(), [5, 5, 5])
+        self.assertFalse(StockMovement.objects.exists())
+
+        lines[3]["quantity"] = -5
+        response = self.client.post(self.url, {"lines": lines, "reason": "recount"}, format="json")
+        self.assertTrue(response.data["committed"])
+        self.assertEqual([result["new_stock"] for result in response.data["results"]], [12, 0, 12, 0])
+        self.assertEqual(self.stock_levels(), [12, 0, 0])
+        self.assertEqual(
+            sorted(StockMovement.objects.values_list("type", "quantity", "reason")),
+            [("IN", 10, "recount"), ("OUT", 3, "damaged"), ("OUT", 5, "recount"), ("OUT", 5, "recount")],
+        )
+
+    def test_partial_adjustment_keeps_the_lines_that_fit(self):
+        first, second, _ = self.products
+        lines = [
+            {"product_id": first.pk, "quantity": -2},
+            {"product_id": second.pk, "quantity": -9},
+            {"product_id": 999999, "quantity": 1},
+        ]
+        response = self.client.post(self.url, {"mode": "partial", "lines": lines}, format="json")
+        self.assertTrue(response.data["committed"])
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], ["applied", "error", "error"])
+        self.assertEqual(results[1]["error"], "Insufficient stock")
+        self.assertEqual(self.stock_levels(), [3, 5, 5])
+        self.assertEqual(StockMovement.objects.count(), 1)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        lines = [{"product_id": product.pk, "quantity": 1} for product in self.products]
+        self.client.post(self.url, {"lines": lines[:1]}, format="json")  # warms the tenant cache
+        with self.assertNumQueries(10):
+            self.client.post(self.url, {"lines": lines[:1]}, format="json")
+        with self.assertNumQueries(10):
+            self.client.post(self.url, {"lines": lines}, format="json")
+        self.assertEqual(self.stock_levels(), [8, 6, 6])
+
+    @override_settings(INVENTORY_STOCK_COUNTER_SLOTS=4)
+    def test_sharded_stock_counters(self):
+        first, second, _ = self.products
+        lines = [{"product_id": first.pk, "quantity": 4}, {"product_id": second.pk, "quantity": -6}]
+        response = self.client.post(self.url, {"mode": "partial", "lines": lines}, format="json")
+        self.assertEqual([result["new_stock"] for result in response.data["results"]], [9, None])
+        self.assertEqual(stock.current_stock([first.pk, second.pk]), {first.pk: 9, second.pk: 5})
+
+
+class LowStockTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        self.category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.runner = self.product("Runner", stock=12, alert=5)
+        self.trail = self.product("Trail", stock=2, alert=5)
+        self.untracked = self.product("Sandal", stock=0, alert=0)
+        self.url = reverse("product-low-stock")
+
+    def product(self, name, stock, alert):
+        return Product.objects.create(
+            tenant=self.tenant,
+            category=self.category,
+            name=name,
+            sku=name.upper(),
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+            current_stock=stock,
+            low_stock_alert=alert,
+        )
+
+    def low_stock_names(self):
+        return [item["name"] for item in self.client.get(self.url).data["results"]]
+
+    def test_flag_follows_stock_writes(self):
+        self.assertEqual(self.low_stock_names(), ["Trail"])
+
+        self.client.post(reverse("product-remove-stock", args=[self.runner.pk]), {"quantity": 7})
+        self.client.post(reverse("product-add-stock", args=[self.trail.pk]), {"quantity": 4})
+        self.assertEqual(self.low_stock_names(), ["Runner"])
+
+        self.client.post(reverse("product-adjust-stock"), {
+            "lines": [{"product_id": self.trail.pk, "quantity": -1}],
+        }, format="json")
+        self.client.patch(
+            reverse("product-detail", args=[self.runner.pk]), {"low_stock_alert": 2}, format="json"
+        )
+        self.assertEqual(self.low_stock_names(), ["Trail"])
+
+    def test_days_of_cover_from_sales(self):
+        StockMovement.objects.create(
+            tenant=self.tenant, product=self.trail, type="SALE", quantity=30, reference_type="Bill"
+        )
+        StockMovement.objects.create(
+            tenant=self.tenant, product=self.trail, type="IN", quantity=50, reference_type="Manual"
+        )
+        item = self.client.get(self.url).data["results"][0]
+        self.assertEqual((item["daily_sales"], item["days_of_cover"]), ("1.00", "2.0"))
+
+        item = self.client.get(self.url, {"days": 10}).data["results"][0]
+        self.assertEqual((item["daily_sales"], item["days_of_cover"]), ("3.00", "0.7"))
+
+
+class ValuationTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        shoes = Category.objects.create(tenant=self.tenant, name="Shoes")
+        socks = Category.objects.create(tenant=self.tenant, name="Socks")
+        self.runner = self.product(shoes, "Runner", "Acme", stock=4, mrp="30.00")
+        self.product(shoes, "Trail", None, stock=2, mrp=None)
+        self.product(socks, "Ankle", "Acme", stock=10, mrp="5.00", cost="1.00", price="4.00")
+        self.url = reverse("product-stock-valuation")
+
+    def product(self, category, name, brand, stock, mrp, cost="10.00", price="20.00"):
+        return Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name=name,
+            sku=name.upper(),
+            brand=brand,
+            purchase_price=Decimal(cost),
+            selling_price=Decimal(price),
+            mrp=Decimal(mrp) if mrp else None,
+            current_stock=stock,
+        )
+
+    def test_groups_by_category_and_brand(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        shoes, socks = response.data["groups"]
+        self.assertEqual(
+            (shoes["category"], shoes["quantity"], shoes["cost_value"], shoes["retail_value"], shoes["mrp_value"]),
+            ("Shoes", 6, "60.00", "120.00", "160.00"),
+        )
+        self.assertEqual(socks["mrp_value"], "50.00")
+        self.assertEqual(response.data["totals"]["cost_value"], "70.00")
+
+        response = self.client.get(self.url, {"group_by": "brand"})
+        self.assertEqual(
+            [(group["brand"], group["quantity"]) for group in response.data["groups"]],
+            [("", 2), ("Acme", 14)],
+        )
+        response = self.client.get(self.url, {"group_by": "supplier"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cached_until_stock_changes(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("product-add-stock", args=[self.runner.pk]), {"quantity": 6})
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["totals"]["quantity"], 22)
+
+    def test_point_in_time(self):
+        before = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("product-remove-stock", args=[self.runner.pk]), {"quantity": 3})
+        response = self.client.get(self.url, {"at": before.isoformat()})
+        self.assertEqual(response.data["groups"][0]["quantity"], 6)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["groups"][0]["quantity"], 3)
+
+
+class StockHistoryTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name="Runner",
+            sku="RUN-1",
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+            current_stock=10,
+        )
+        for path, quantity in [("add-stock", 5), ("remove-stock", 3), ("add-stock", 2), ("remove-stock", 4)]:
+            self.client.post(reverse(f"product-{path}", args=[self.product.pk]), {"quantity": quantity})
+        self.url = reverse("product-stock-history", args=[self.product.pk])
+
+    def test_pages_carry_the_running_balance(self):
+        rows, url = [], f"{self.url}?page_size=3"
+        while url:
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            rows += response.data["results"]
+            url = response.data["next"]
+        self.assertEqual([row["signed_quantity"] for row in rows], [-4, 2, -3, 5])
+        self.assertEqual([row["balance"] for row in rows], [10, 14, 12, 15])
+        self.assertEqual({row["product_name"] for row in rows}, {"Runner"})
+
+        # going back yields the same balances
+        response = self.client.get(self.client.get(f"{self.url}?page_size=3").data["next"])
+        response = self.client.get(response.data["previous"])
+        self.assertEqual([row["balance"] for row in response.data["results"]], [10, 14, 12])
+
+    def test_date_range(self):
+        StockMovement.objects.filter(product=self.product, type="IN", quantity=5).update(
+            date=timezone.now() - timezone.timedelta(days=3)
+        )
+        since = timezone.localdate() - timezone.timedelta(days=1)
+        response = self.client.get(self.url, {"from": since.isoformat()})
+        self.assertEqual([row["balance"] for row in response.data["results"]], [10, 14, 12])
+
+        response = self.client.get(self.url, {"to": since.isoformat()})
+        self.assertEqual([row["balance"] for row in response.data["results"]], [15])
+        response = self.client.get(self.url, {"from": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StockMovementListTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        for i in range(3):
+            product = Product.objects.create(
+                tenant=self.tenant,
+                category=category,
+                name=f"Runner {i}",
+                sku=f"RUN-{i}",
+                purchase_price=Decimal("10.00"),
+                selling_price=Decimal("20.00"),
+            )
+            StockMovement.objects.create(tenant=self.tenant, product=product, type="IN", quantity=5)
+        self.client.get(reverse("stock-movement-list"))  # warms the tenant cache
+
+    def test_lists_with_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("stock-movement-list"))
+        self.assertEqual(
+            [row["product_name"] for row in response.data["results"]],
+            ["Runner 2", "Runner 1", "Runner 0"],
+        )
+
+
+class ProductImageDerivativeTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        overrides = self.settings(MEDIA_ROOT=media_root, PRODUCT_IMAGE_WORKERS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name="Runner",
+            sku="RUN-1",
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+        )
+
+    def upload(self):
+        output = io.BytesIO()
+        Image.new("RGB", (1200, 600), "red").save(output, format="PNG")
+        upload = SimpleUploadedFile("shoe.png", output.getvalue(), content_type="image/png")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("product-image-list"), {"product": self.product.pk, "image": upload}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return ProductImage.objects.get(pk=response.data["image_id"])
+
+    def test_derivatives_are_rendered_after_upload(self):
+        image = self.upload()
+        sizes = {}
+        for field in images.VARIANTS:
+            derived = getattr(image, field)
+            self.assertTrue(derived.name.startswith("product_images/derived/"))
+            self.assertTrue(derived.name.endswith(".webp"))
+            with Image.open(derived.path) as rendered:
+                self.assertEqual(rendered.format, "WEBP")
+                sizes[field] = rendered.size
+        self.assertEqual(sizes, {"thumbnail": (200, 100), "medium": (800, 400), "full": (1200, 600)})
+
+        response = self.client.get(reverse("product-images", args=[self.product.pk]))
+        self.assertTrue(response.data[0]["thumbnail"].endswith(image.thumbnail.url))
+
+        # same content, same derivative files
+        again = self.upload()
+        self.assertEqual(again.medium.name, image.medium.name)
+
+    def test_failures_are_logged_not_raised(self):
+        with mock.patch.object(images, "store", side_effect=RuntimeError("storage down")):
+            with self.assertLogs("inventory.images", "ERROR") as logs:
+                image = self.upload()
+        self.assertIn("storage down", "\n".join(logs.output))
+        self.assertFalse(image.thumbnail)
+
+    def test_render_of_a_replaced_upload_is_discarded(self):
+        image = self.upload()
+        ProductImage.objects.filter(pk=image.pk).update(thumbnail="", medium="", full="")
+        render = images.render
+
+        def replace_then_render(source, max_edge):
+            # a newer upload lands while the old one is being rendered
+            ProductImage.objects.filter(pk=image.pk).update(image="product_images/newer.png")
+            return render(source, max_edge)
+
+        with mock.patch.object(images, "render", side_effect=replace_then_render):
+            self.assertFalse(images.build_derivatives(image.pk))
+        image.refresh_from_db()
+        self.assertFalse(image.thumbnail)
+
+    def test_backfill_skips_undecodable_images(self):
+        image = self.upload()
+        ProductImage.objects.filter(pk=image.pk).update(thumbnail="", medium="", full="")
+        broken = ProductImage.objects.create(
+            product=self.product, image=SimpleUploadedFile("broken.png", b"not an image")
+        )
+        self.assertFalse(images.build_derivatives(broken.pk))
+        self.assertTrue(images.build_derivatives(image.pk))
+        image.refresh_from_db()
+        self.assertTrue(image.thumbnail.name.endswith(".webp"))
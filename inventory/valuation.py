@@ -0,0 +1,128 @@
+"""
+Inventory valuation per category and/or brand.
+
+Current valuation is one aggregated query over Product: stock times the
+purchase price (cost), selling price (retail) and MRP, summed per group.
+Products without an MRP are valued at their selling price on the MRP
+column. Point-in-time valuation takes the stock from the StockMovement
+ledger (ledger.stock_as_of) and values it at current prices.
+
+Results are cached in the tenant's catalog namespace, which every stock
+write, product save and category save bumps (see inventory.signals), so a
+cached valuation is served until the next change that could affect it.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from core.cache import tenant_cache, tenant_cache_key
+from . import ledger, stock
+from .models import Product
+from .signals import CATALOG_NAMESPACE
+
+CENT = Decimal("0.01")
+
+# cached valuations outlive no write: the namespace version changes first
+VALUATION_CACHE_TTL = 24 * 60 * 60
+
+# group_by option -> Product values() fields, in sort order
+GROUPINGS = {
+    "category": ("category__name", "category_id"),
+    "brand": ("brand_name",),
+    "category,brand": ("category__name", "category_id", "brand_name"),
+}
+
+# products without a brand are grouped under ""
+BRAND_NAME = Coalesce(F("brand"), Value(""))
+
+PRICES = {
+    "cost_value": F("purchase_price"),
+    "retail_value": F("selling_price"),
+    "mrp_value": Coalesce(F("mrp"), F("selling_price")),
+}
+
+VALUE_FIELDS = ("quantity", *PRICES)
+
+
+def valuation(tenant, group_by="category", at=None):
+    """
+    Return {"groups": [...], "totals": {...}} for the tenant's stock, now or
+    as of ``at``. Each group has its grouping fields (category_id, category,
+    brand), product_count, quantity and the three values.
+    """
+    key = tenant_cache_key(tenant.pk, CATALOG_NAMESPACE, "valuation", group_by, at)
+    result = tenant_cache().get(key)
+    if result is None:
+        rows = current_rows(tenant, group_by) if at is None else rows_as_of(tenant, group_by, at)
+        result = _summarize(rows, GROUPINGS[group_by])
+        tenant_cache().set(key, result, VALUATION_CACHE_TTL)
+    return result
+
+
+def current_rows(tenant, group_by):
+    """The single aggregated query: one row per group."""
+    level = stock.live_stock() if stock.sharded() else F("current_stock")
+    return (
+        Product.objects.filter(tenant=tenant)
+        .annotate(level=level, brand_name=BRAND_NAME)
+        .values(*GROUPINGS[group_by])
+        .annotate(
+            product_count=Count("pk"),
+            quantity=Sum("level"),
+            **{
+                name: Sum(ExpressionWrapper(
+                    F("level") * price, output_field=DecimalField(max_digits=20, decimal_places=2)
+                ))
+                for name, price in PRICES.items()
+            },
+        )
+        .order_by(*GROUPINGS[group_by])
+    )
+
+
+def rows_as_of(tenant, group_by, at):
+    """Group rows for the ledger stock as of ``at``, valued at current prices."""
+    levels = ledger.stock_as_of(tenant, at)
+    fields = GROUPINGS[group_by]
+    products = (
+        Product.objects.filter(pk__in=list(levels))
+        .annotate(brand_name=BRAND_NAME, **{f"price_{name}": price for name, price in PRICES.items()})
+        .values_list("pk", *fields, *(f"price_{name}" for name in PRICES))
+    )
+    groups = {}
+    for pk, *values in products:
+        group_key, prices = tuple(values[:len(fields)]), values[len(fields):]
+        row = groups.get(group_key)
+        if row is None:
+            row = groups[group_key] = {
+                **dict(zip(fields, group_key)), "product_count": 0,
+                **{field: 0 for field in VALUE_FIELDS},
+            }
+        level = levels[pk]
+        row["product_count"] += 1
+        row["quantity"] += level
+        for name, price in zip(PRICES, prices):
+            row[name] += level * price
+    return [groups[group_key] for group_key in sorted(groups)]
+
+
+def _summarize(rows, fields):
+    groups = []
+    totals = {"product_count": 0, **{field: 0 for field in VALUE_FIELDS}}
+    for row in rows:
+        group = {}
+        if "category_id" in fields:
+            group.update(category_id=row["category_id"], category=row["category__name"])
+        if "brand_name" in fields:
+            group["brand"] = row["brand_name"]
+        group["product_count"] = row["product_count"]
+        group["quantity"] = row["quantity"] or 0
+        for name in PRICES:
+            group[name] = Decimal(row[name] or 0).quantize(CENT)
+        for field in totals:
+            totals[field] += group[field]
+        groups.append(group)
+    for name in PRICES:
+        totals[name] = Decimal(totals[name]).quantize(CENT)
+    return {"groups": groups, "totals": totals}
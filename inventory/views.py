@@ -2,55 +2,268 @@ from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import HttpResponse
-import csv
-import io
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+import datetime
+from decimal import Decimal
 
-from core.mixins import TenantViewSetMixin
+from core.idempotency import idempotent
+from core.mixins import TenantCachedListMixin, TenantETagMixin, TenantViewSetMixin
 from core.permissions import IsTenantUser
+from core.transactions import bounded_atomic
+from core.streaming import streaming_csv_response
 
 from .models import Category, Product, ProductImage, StockMovement
 from .serializers import (
     CategorySerializer,
     ProductSerializer,
     ProductImageSerializer,
+    StockAdjustmentSerializer,
+    StockHistorySerializer,
     StockMovementSerializer
 )
+from .services import adjust_stock, import_products_csv
+from . import alerts, ledger, lookup, search, stock, valuation
+from .signals import CATALOG_NAMESPACE
 
-class CategoryViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
+# rows fetched per round trip by the streaming CSV export
+EXPORT_CHUNK_SIZE = 2000
+
+
+class StockOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that sorts ``current_stock`` by the live stock annotation
+    when sharded stock counters are on (see ProductViewSet.get_queryset).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or "live_stock" not in queryset.query.annotations:
+            return ordering
+        return [
+            term.replace("current_stock", "live_stock") if term.lstrip("-") == "current_stock" else term
+            for term in ordering
+        ]
+
+
+def parse_point_in_time(value, end_of_day=True):
+    """
+    Parse an ISO datetime, or a date meaning the end of that day (the start
+    of it with ``end_of_day=False``).
+    """
+    try:
+        day = parse_date(value)
+        moment = parse_datetime(value) if day is None else None
+    except ValueError:
+        return None
+    if day is not None and not end_of_day:
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    if day is not None:
+        return ledger.next_period_start(
+            timezone.make_aware(datetime.datetime.combine(day, datetime.time.min)), "DAY"
+        )
+    if moment is not None:
+        return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+    return None
+
+
+def format_values(row):
+    """Render the Decimal values of a valuation row as strings."""
+    return {
+        name: str(value) if name in valuation.PRICES else value
+        for name, value in row.items()
+    }
+
+
+class CategoryViewSet(TenantETagMixin, TenantCachedListMixin, TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated, IsTenantUser]
     filter_backends = [filters.SearchFilter]
     search_fields = ["name"]
+    etag_namespace = CATALOG_NAMESPACE
 
     def perform_create(self, serializer):
         serializer.save(tenant=self.request.tenant)
 
-class ProductViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
+class ProductViewSet(TenantETagMixin, TenantCachedListMixin, TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [
         filters.SearchFilter,
-        filters.OrderingFilter,
+        StockOrderingFilter,
         DjangoFilterBackend,
     ]
     search_fields = ["name", "sku", "brand"]
     ordering_fields = ["selling_price", "current_stock"]
     filterset_fields = ["category", "status"]
+    etag_namespace = CATALOG_NAMESPACE
+
+    def get_queryset(self):
+        # with sharded stock counters, current_stock is read from the slots
+        return stock.with_live_stock(super().get_queryset())
 
     def perform_create(self, serializer):
         serializer.save(tenant=self.request.tenant)
 
+    @action(detail=False, methods=["GET"], url_path="search")
+    def search_products(self, request):
+        """
+        Ranked full-text search over name, SKU and brand with prefix matching.
+
+        Query params: ``q`` (required) and ``limit`` (default 20, max 100).
+        """
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            limit = 20
+
+        product_ids = search.search_product_ids(request.tenant, request.query_params.get("q"), limit)
+        products = Product.objects.for_tenant(request.tenant).in_bulk(product_ids)
+        ranked = [products[pk] for pk in product_ids if pk in products]
+        serializer = self.get_serializer(ranked, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["GET"], url_path="lookup")
+    def lookup_sku(self, request):
+        """
+        Scan-to-price lookup by exact SKU/barcode: ``?sku=<code>``.
+
+        Served from the in-process SKU index (inventory.lookup), so once the
+        tenant's index is loaded a scan only reads the product's live stock.
+        """
+        record = lookup.lookup_sku(request.tenant, request.query_params.get("sku", "").strip())
+        if record is None:
+            return Response(
+                {"error": "Product not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(record)
+
+    @action(detail=False, methods=["GET"], url_path="low-stock")
+    def low_stock(self, request):
+        """
+        Products at or below their low-stock alert level, paginated, each with
+        ``daily_sales`` and ``days_of_cover`` estimated from the SALE
+        movements of the last ``days`` days (default 30).
+        """
+        try:
+            days = min(max(int(request.query_params.get("days", alerts.VELOCITY_DAYS)), 1), 365)
+        except ValueError:
+            return Response({"error": "days must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset().filter(is_low_stock=True)
+        page = self.paginate_queryset(queryset)
+        products = page if page is not None else list(queryset)
+        per_day = alerts.daily_sales(request.tenant, [p.pk for p in products], days)
+
+        data = ProductSerializer(products, many=True, context={"request": request}).data
+        for product, item in zip(products, data):
+            rate = per_day.get(product.pk)
+            item["daily_sales"] = str(rate.quantize(Decimal("0.01"))) if rate else "0.00"
+            cover = alerts.days_of_cover(item["current_stock"], rate)
+            item["days_of_cover"] = str(cover) if cover is not None else None
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @action(detail=False, methods=["GET"], url_path="stock-as-of")
+    def stock_as_of(self, request):
+        """
+        Point-in-time stock and valuation (at current purchase prices).
+
+        ``?at=`` takes an ISO datetime, or a date meaning the end of that day.
+        Served from the nearest stock checkpoint plus the movements after it.
+        """
+        at = parse_point_in_time(request.query_params.get("at", ""))
+        if at is None:
+            return Response(
+                {"error": "Query parameter 'at' must be an ISO date or datetime"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        total_value, items = ledger.valuation_as_of(request.tenant, at)
+        return Response({
+            "at": at,
+            "total_value": str(total_value),
+            "products": [
+                {"product_id": item["product_id"], "stock": item["stock"], "value": str(item["value"])}
+                for item in items
+            ],
+        })
+
+    @action(detail=False, methods=["GET"], url_path="valuation")
+    def stock_valuation(self, request):
+        """
+        Stock value at cost, selling price and MRP per category and/or brand.
+
+        ``?group_by=category`` (default), ``brand`` or ``category,brand``;
+        ``?at=`` (ISO datetime, or a date meaning the end of that day) values
+        the stock held at that moment, read from the movement ledger.
+        """
+        group_by = request.query_params.get("group_by", "category")
+        if group_by not in valuation.GROUPINGS:
+            return Response(
+                {"error": f"group_by must be one of: {', '.join(valuation.GROUPINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        at = None
+        if request.query_params.get("at"):
+            at = parse_point_in_time(request.query_params["at"])
+            if at is None:
+                return Response(
+                    {"error": "Query parameter 'at' must be an ISO date or datetime"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        result = valuation.valuation(request.tenant, group_by, at)
+        return Response({
+            "group_by": group_by,
+            "at": at,
+            "groups": [format_values(group) for group in result["groups"]],
+            "totals": format_values(result["totals"]),
+        })
+
     @action(detail=True, methods=["GET"], url_path="stock-history")
     def stock_history(self, request, pk=None):
+        """
+        A product's movements, newest first and paginated, each with its
+        ``signed_quantity`` and the ``balance`` right after it.
+
+        ``?from=`` and ``?to=`` (ISO dates, inclusive, or datetimes) limit
+        the range. Every page costs the same few queries: the product, the
+        page with its running totals, and one aggregate for the balance.
+        """
         product = self.get_object()
-        movements = product.movements.order_by("-date")
-        serializer = StockMovementSerializer(movements, many=True)
-        return Response(serializer.data)
+        bounds = {}
+        for param, end_of_day in (("from", False), ("to", True)):
+            if request.query_params.get(param):
+                bounds[param] = parse_point_in_time(request.query_params[param], end_of_day)
+                if bounds[param] is None:
+                    return Response(
+                        {"error": f"Query parameter '{param}' must be an ISO date or datetime"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+        movements = ledger.history(
+            request.tenant, product.pk, bounds.get("from"), bounds.get("to")
+        ).order_by("-date", "-movement_id")
+        page = self.paginate_queryset(movements)
+        rows = page if page is not None else list(movements)
+
+        live_stock = getattr(product, "live_stock", None)
+        ledger.set_balances(rows, product.current_stock if live_stock is None else live_stock)
+        for row in rows:
+            # product_name without a query per row
+            row.product = product
+        data = StockHistorySerializer(rows, many=True).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
 
     @action(detail=True, methods=["POST"], url_path="add-stock")
+    @idempotent
     def add_stock(self, request, pk=None):
         product = self.get_object()
         quantity = int(request.data.get("quantity", 0))
@@ -61,26 +274,28 @@ class ProductViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Update product stock
-        product.current_stock += quantity
-        product.save()
-
-        # Create stock movement
-        StockMovement.objects.create(
-            tenant=self.request.tenant,
-            product=product,
-            type="IN",
-            quantity=quantity,
-            reference_type="Manual Stock Add",
-            reason=request.data.get("reason", ""),
-        )
+        with bounded_atomic():
+            # Update product stock
+            stock.add(self.request.tenant, product.pk, quantity)
+
+            # Create stock movement
+            StockMovement.objects.create(
+                tenant=self.request.tenant,
+                product=product,
+                type="IN",
+                quantity=quantity,
+                reference_type="Manual Stock Add",
+                reason=request.data.get("reason", ""),
+            )
+            new_stock = stock.current_stock([product.pk])[product.pk]
 
         return Response(
-            {"message": "Stock added successfully", "new_stock": product.current_stock},
+            {"message": "Stock added successfully", "new_stock": new_stock},
             status=status.HTTP_200_OK
         )
 
     @action(detail=True, methods=["POST"], url_path="remove-stock")
+    @idempotent
     def remove_stock(self, request, pk=None):
         product = self.get_object()
         quantity = int(request.data.get("quantity", 0))
@@ -91,29 +306,49 @@ class ProductViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if product.current_stock < quantity:
+        try:
+            with bounded_atomic():
+                # Update stock; fails instead of going below zero
+                stock.remove(self.request.tenant, product.pk, quantity)
+
+                # Log stock movement
+                StockMovement.objects.create(
+                    tenant=self.request.tenant,
+                    product=product,
+                    type="OUT",
+                    quantity=quantity,
+                    reference_type="Manual Stock Deduction",
+                    reason=request.data.get("reason", "")
+                )
+                new_stock = stock.current_stock([product.pk])[product.pk]
+        except stock.InsufficientStock:
             return Response(
                 {"error": "Insufficient stock."}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Update stock
-        product.current_stock -= quantity
-        product.save()
-
-        # Log stock movement
-        StockMovement.objects.create(
-            tenant=self.request.tenant,
-            product=product,
-            type="OUT",
-            quantity=quantity,
-            reference_type="Manual Stock Deduction",
-            reason=request.data.get("reason", "")
+        return Response(
+            {"message": "Stock reduced successfully.", "new_stock": new_stock},
+            status=status.HTTP_200_OK
         )
 
+    @action(detail=False, methods=["POST"], url_path="adjust-stock")
+    @idempotent
+    def adjust_stock(self, request):
+        """
+        Add or remove stock for many products in one request.
+
+        Body: ``{"mode": "atomic" | "partial", "reference_type", "reason",
+        "lines": [{"product_id", "quantity", "reason"}]}`` with positive
+        quantities added and negative ones removed. Returns per-line results;
+        an atomic adjustment that failed returns 400.
+        """
+        serializer = StockAdjustmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results, committed = adjust_stock(request.tenant, **serializer.validated_data)
         return Response(
-            {"message": "Stock reduced successfully.", "new_stock": product.current_stock},
-            status=status.HTTP_200_OK
+            {"committed": committed, "results": results},
+            status=status.HTTP_200_OK if committed else status.HTTP_400_BAD_REQUEST
         )
 
     @action(detail=True, methods=["GET"], url_path="images")
@@ -126,44 +361,72 @@ class ProductViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=["GET"], url_path="export-csv")
     def export_csv(self, request):
-        """Export all products as CSV file"""
-        products = self.get_queryset()
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="products_export.csv"'
-        
-        writer = csv.writer(response)
-        # Header row
-        writer.writerow([
-            'name', 'sku', 'category', 'brand', 'size', 'description', 'unit',
-            'purchase_price', 'selling_price', 'mrp', 'current_stock', 
-            'low_stock_alert', 'hsn_code', 'gst_percent', 'status'
-        ])
-        
-        for product in products:
-            writer.writerow([
-                product.name,
-                product.sku,
-                product.category.name if product.category else '',
-                product.brand or '',
-                product.size or '',
-                product.description or '',
-                product.unit,
-                str(product.purchase_price),
-                str(product.selling_price),
-                str(product.mrp) if product.mrp else '',
-                product.current_stock,
-                product.low_stock_alert,
-                product.hsn_code or '',
-                str(product.gst_percent),
-                product.status
-            ])
-        
-        return response
+        """
+        Stream all products as a CSV file.
+
+        Rows are read in chunks through a server-side cursor with the category
+        joined in, and written to the client as they are produced, so memory
+        stays flat regardless of catalog size. Pass ``?compress=gzip`` to
+        receive a gzip-compressed file.
+        """
+        queryset = self.get_queryset()
+        # get_queryset annotates live_stock when stock counters are sharded
+        level = "live_stock" if "live_stock" in queryset.query.annotations else "current_stock"
+        products = (
+            queryset
+            .order_by("product_id")
+            .values_list(
+                "name", "sku", "category__name", "brand", "size", "description", "unit",
+                "purchase_price", "selling_price", "mrp", level,
+                "low_stock_alert", "hsn_code", "gst_percent", "status",
+            )
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+
+        rows = (
+            [
+                name,
+                sku,
+                category_name or '',
+                brand or '',
+                size or '',
+                description or '',
+                unit,
+                str(purchase_price),
+                str(selling_price),
+                str(mrp) if mrp else '',
+                current_stock,
+                low_stock_alert,
+                hsn_code or '',
+                str(gst_percent),
+                product_status,
+            ]
+            for (
+                name, sku, category_name, brand, size, description, unit,
+                purchase_price, selling_price, mrp, current_stock,
+                low_stock_alert, hsn_code, gst_percent, product_status,
+            ) in products
+        )
+
+        return streaming_csv_response(
+            "products_export.csv",
+            [
+                'name', 'sku', 'category', 'brand', 'size', 'description', 'unit',
+                'purchase_price', 'selling_price', 'mrp', 'current_stock',
+                'low_stock_alert', 'hsn_code', 'gst_percent', 'status'
+            ],
+            rows,
+            compress=request.query_params.get("compress") == "gzip",
+        )
 
     @action(detail=False, methods=["POST"], url_path="import-csv")
     def import_csv(self, request):
-        """Import products from a CSV file"""
+        """
+        Import products from a CSV file.
+
+        The upload is parsed incrementally and written in bulk chunks; the
+        response includes timing and throughput stats.
+        """
         csv_file = request.FILES.get('file')
         
         if not csv_file:
@@ -179,94 +442,24 @@ class ProductViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
             )
         
         try:
-            # Read and decode the file
-            decoded_file = csv_file.read().decode('utf-8')
-            io_string = io.StringIO(decoded_file)
-            reader = csv.DictReader(io_string)
-            
-            success_count = 0
-            error_count = 0
-            errors = []
-            
-            for row_num, row in enumerate(reader, start=2):  # Start at 2 to account for header
-                try:
-                    # Get or create category
-                    category_name = row.get('category', '').strip()
-                    if not category_name:
-                        errors.append(f"Row {row_num}: Category is required")
-                        error_count += 1
-                        continue
-                    
-                    category, _ = Category.objects.get_or_create(
-                        tenant=request.tenant,
-                        name=category_name,
-                        defaults={'status': 'active'}
-                    )
-                    
-                    # Check if product with same SKU exists
-                    sku = row.get('sku', '').strip()
-                    if not sku:
-                        # Generate a random SKU if not provided
-                        import random
-                        sku = str(random.randint(10000, 99999))
-                    
-                    existing_product = Product.objects.filter(
-                        tenant=request.tenant, 
-                        sku=sku
-                    ).first()
-                    
-                    product_data = {
-                        'name': row.get('name', '').strip(),
-                        'sku': sku,
-                        'category': category,
-                        'brand': row.get('brand', '').strip() or None,
-                        'size': row.get('size', '').strip() or None,
-                        'description': row.get('description', '').strip() or None,
-                        'unit': row.get('unit', 'pcs').strip(),
-                        'purchase_price': float(row.get('purchase_price', 0) or 0),
-                        'selling_price': float(row.get('selling_price', 0) or 0),
-                        'mrp': float(row.get('mrp', 0) or 0) if row.get('mrp') else None,
-                        'current_stock': int(row.get('current_stock', 0) or 0),
-                        'low_stock_alert': int(row.get('low_stock_alert', 0) or 0),
-                        'hsn_code': row.get('hsn_code', '').strip() or None,
-                        'gst_percent': float(row.get('gst_percent', 0) or 0),
-                        'status': row.get('status', 'active').strip(),
-                    }
-                    
-                    if not product_data['name']:
-                        errors.append(f"Row {row_num}: Product name is required")
-                        error_count += 1
-                        continue
-                    
-                    if existing_product:
-                        # Update existing product
-                        for key, value in product_data.items():
-                            setattr(existing_product, key, value)
-                        existing_product.save()
-                    else:
-                        # Create new product
-                        product_data['tenant'] = request.tenant
-                        Product.objects.create(**product_data)
-                    
-                    success_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
-                    error_count += 1
-            
-            return Response({
-                "message": f"Import completed. {success_count} products imported successfully.",
-                "success_count": success_count,
-                "error_count": error_count,
-                "errors": errors[:10]  # Limit errors to first 10
-            }, status=status.HTTP_200_OK)
-            
+            stats = import_products_csv(request.tenant, csv_file)
         except Exception as e:
             return Response(
                 {"error": f"Failed to process CSV: {str(e)}"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        return Response({
+            "message": f"Import completed. {stats['success_count']} products imported successfully.",
+            "success_count": stats["success_count"],
+            "created_count": stats["created_count"],
+            "updated_count": stats["updated_count"],
+            "error_count": stats["error_count"],
+            "errors": stats["errors"][:10],  # Limit errors to first 10
+            "elapsed_seconds": stats["elapsed_seconds"],
+            "rows_per_second": stats["rows_per_second"],
+        }, status=status.HTTP_200_OK)
+
 
 class ProductImageViewSet(viewsets.ModelViewSet):
     queryset = ProductImage.objects.all()
@@ -287,4 +480,5 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ["-date"]
 
     def get_queryset(self):
-        return StockMovement.objects.filter(product__tenant=self.request.tenant)
+        # StockMovement carries its own tenant column; no join through Product
+        return StockMovement.objects.filter(tenant=self.request.tenant).select_related("product")
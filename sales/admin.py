@@ -1,5 +1,5 @@
 from django.contrib import admin
-from sales.models import Customer, CustomerPayment, Bill, BillItem
+from sales.models import Customer, CustomerPayment, Bill, BillItem, DailySalesRollup
 # Register your models here.
 
 
@@ -7,4 +7,4 @@ admin.site.register(Customer)
 admin.site.register(CustomerPayment)
 admin.site.register(BillItem)
 admin.site.register(Bill)
-
+admin.site.register(DailySalesRollup)
@@ -0,0 +1,76 @@
+"""
+Cache of rendered bills (BillDetailSerializer output).
+
+Bills are not changed after create_bill commits, so a bill is rendered once
+and served from the "bills" cache alias on retrieve, reprints and list
+pages. Entries are keyed by bill_id and carry the tenant id, which is
+checked on read. The receivers in sales.signals drop entries when a bill,
+its items, or a name shown on it change (e.g. edits in the admin). That
+only reaches the process's own cache unless the alias uses a shared
+backend, so the alias TIMEOUT bounds how long other workers may serve an
+edited bill's old rendering (see CACHES in settings).
+"""
+from django.core.cache import caches
+from django.db.models import Prefetch, prefetch_related_objects
+
+from .models import BillItem
+from .serializers import BillDetailSerializer
+
+CACHE_ALIAS = "bills"
+
+# bill items with their product joined in, for nested item serialization
+BILL_ITEMS = Prefetch("items", queryset=BillItem.objects.select_related("product"))
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(bill_id):
+    return f"bill:{bill_id}"
+
+
+def get(tenant_id, bill_id):
+    """Rendered bill, or None on a miss or a bill of another tenant."""
+    return get_many(tenant_id, [bill_id]).get(bill_id)
+
+
+def get_many(tenant_id, bill_ids):
+    """Return {bill_id: rendered bill} for the cached bills of this tenant."""
+    entries = _cache().get_many([_key(bill_id) for bill_id in bill_ids])
+    found = {}
+    for bill_id in bill_ids:
+        entry = entries.get(_key(bill_id))
+        if entry is not None and entry["tenant_id"] == tenant_id:
+            found[bill_id] = entry["data"]
+    return found
+
+
+def store(bills_data):
+    """Cache rendered bills given as [(bill, data), ...]."""
+    _cache().set_many({
+        _key(bill.pk): {"tenant_id": bill.tenant_id, "data": data}
+        for bill, data in bills_data
+    })
+
+
+def delete_many(bill_ids):
+    _cache().delete_many([_key(bill_id) for bill_id in bill_ids])
+
+
+def render(bills):
+    """
+    Return rendered bills for ``bills`` (Bill instances of one tenant) in
+    order, serializing and caching only the ones not cached yet. Items are
+    prefetched for the misses in one query.
+    """
+    if not bills:
+        return []
+    cached = get_many(bills[0].tenant_id, [bill.pk for bill in bills])
+    misses = [bill for bill in bills if bill.pk not in cached]
+    if misses:
+        prefetch_related_objects(misses, "customer", BILL_ITEMS)
+        rendered = [(bill, dict(BillDetailSerializer(bill).data)) for bill in misses]
+        store(rendered)
+        cached.update((bill.pk, data) for bill, data in rendered)
+    return [cached[bill.pk] for bill in bills]
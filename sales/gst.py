@@ -0,0 +1,116 @@
+"""
+GST summary by HSN code and tax rate, for filing returns.
+
+Bill items are grouped by the product's HSN code and GST rate, and split
+into B2B (the customer has a GST number) and B2C sales, in one aggregated
+query. Rows come back ordered by HSN code and rate and are folded into one
+row per (HSN, rate) as they stream, so a full financial year never has to be
+held in memory.
+
+Taxable value is the item subtotal (after per-unit discounts, before
+bill-level discounts) and tax is computed at the product's GST rate, the
+same way create_bill computes gst_total.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db.models import (
+    BooleanField, Case, DecimalField, ExpressionWrapper, F, Q, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import BillItem
+
+CENT = Decimal("0.01")
+
+# aggregated rows fetched per round trip while streaming
+GST_CHUNK_SIZE = 2000
+
+COLUMNS = [
+    "hsn_code", "gst_percent", "quantity", "taxable_value", "tax_amount",
+    "b2b_quantity", "b2b_taxable_value", "b2b_tax_amount",
+    "b2c_quantity", "b2c_taxable_value", "b2c_tax_amount",
+]
+
+TAX_AMOUNT = ExpressionWrapper(
+    F("subtotal") * F("product__gst_percent") / Value(100),
+    output_field=DecimalField(max_digits=20, decimal_places=4),
+)
+
+IS_B2B = Case(
+    When(
+        Q(bill__customer__gst_number__isnull=False) & ~Q(bill__customer__gst_number=""),
+        then=Value(True),
+    ),
+    default=Value(False),
+    output_field=BooleanField(),
+)
+
+
+def day_bounds(start, end):
+    """Aware datetimes covering the local dates ``start`` to ``end`` inclusive."""
+    def midnight(day):
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return midnight(start), midnight(end + datetime.timedelta(days=1))
+
+
+def grouped_items(tenant, start, end):
+    """The single aggregated query: one row per (HSN, rate, B2B flag)."""
+    since, until = day_bounds(start, end)
+    return (
+        BillItem.objects.filter(bill__tenant=tenant, bill__date__gte=since, bill__date__lt=until)
+        .annotate(
+            hsn=Coalesce("product__hsn_code", Value("")),
+            rate=F("product__gst_percent"),
+            b2b=IS_B2B,
+        )
+        .values("hsn", "rate", "b2b")
+        .annotate(
+            qty=Sum("quantity"),
+            taxable=Sum("subtotal"),
+            tax=Sum(TAX_AMOUNT),
+        )
+        .order_by("hsn", "rate", "b2b")
+    )
+
+
+def summary_rows(tenant, start, end):
+    """Yield one dict per (HSN code, GST rate), keyed by COLUMNS."""
+    row = None
+    for group in grouped_items(tenant, start, end).iterator(chunk_size=GST_CHUNK_SIZE):
+        key = (group["hsn"], Decimal(group["rate"]).quantize(CENT))
+        if row is None or (row["hsn_code"], row["gst_percent"]) != key:
+            if row is not None:
+                yield row
+            row = _empty_row(*key)
+        side = "b2b" if group["b2b"] else "b2c"
+        quantity = group["qty"] or 0
+        taxable = Decimal(group["taxable"] or 0).quantize(CENT)
+        tax = Decimal(group["tax"] or 0).quantize(CENT)
+        row[f"{side}_quantity"] += quantity
+        row[f"{side}_taxable_value"] += taxable
+        row[f"{side}_tax_amount"] += tax
+        row["quantity"] += quantity
+        row["taxable_value"] += taxable
+        row["tax_amount"] += tax
+    if row is not None:
+        yield row
+
+
+def summary(tenant, start, end):
+    """Return (rows, totals) for the date range."""
+    rows = list(summary_rows(tenant, start, end))
+    totals = _empty_row(None, None)
+    for row in rows:
+        for column in COLUMNS[2:]:
+            totals[column] += row[column]
+    del totals["hsn_code"], totals["gst_percent"]
+    return rows, totals
+
+
+def _empty_row(hsn_code, gst_percent):
+    row = {"hsn_code": hsn_code, "gst_percent": gst_percent}
+    for column in COLUMNS[2:]:
+        row[column] = 0 if column.endswith("quantity") else Decimal("0.00")
+    return row
@@ -0,0 +1,255 @@
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import Tenant, User
+from inventory.models import Category, Product, StockMovement
+from sales.models import Bill, BillItem
+
+# composite indexes behind the list endpoints: (model, index fields)
+LIST_INDEXES = [
+    (StockMovement, ['tenant', '-date', '-movement_id']),
+    (StockMovement, ['tenant', 'product', 'date']),
+    (Bill, ['tenant', '-date', '-bill_id']),
+]
+
+PAGE_SIZE = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large temporary tenant, then print EXPLAIN plans and timings '
+        'for the stock movement and bill list endpoints'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products',
+            type=int,
+            default=500,
+            help='Number of products to seed',
+        )
+        parser.add_argument(
+            '--bills',
+            type=int,
+            default=20000,
+            help='Number of bills to seed (two items and two SALE movements each)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Spread the seeded bills over this many days',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per measurement; the median is reported',
+        )
+        parser.add_argument(
+            '--compare-indexes',
+            action='store_true',
+            help=(
+                'Also measure with the composite list indexes dropped (they are restored '
+                'afterwards). This drops indexes on the configured database, so it only '
+                'runs with DEBUG on; point DATABASES at a scratch copy, never at production'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['compare_indexes'] and not settings.DEBUG:
+            raise CommandError(
+                '--compare-indexes drops indexes on the configured database and only runs '
+                'with DEBUG on; use a scratch database'
+            )
+        tenant = Tenant.objects.create(
+            business_name='List query benchmark',
+            plan='Basic',
+            status='Active',
+            sub_end_date=timezone.now() + timezone.timedelta(days=1),
+        )
+        try:
+            started = time.perf_counter()
+            product = self.seed(tenant, options['products'], options['bills'], options['days'])
+            self.stdout.write(
+                f'Seeded {options["products"]} products and {options["bills"]} bills '
+                f'in {time.perf_counter() - started:.1f}s\n'
+            )
+            cases = self.cases(tenant, product, options['days'])
+            client = self.login(tenant)
+
+            if options['compare_indexes']:
+                indexes = self.list_indexes()
+                self.drop_indexes(indexes)
+                try:
+                    self.stdout.write(self.style.MIGRATE_HEADING('Without composite indexes'))
+                    self.measure(cases, client, options['repeat'])
+                finally:
+                    self.create_indexes(indexes)
+                self.stdout.write(self.style.MIGRATE_HEADING('With composite indexes'))
+            self.measure(cases, client, options['repeat'])
+        finally:
+            Bill.objects.filter(tenant=tenant).delete()
+            tenant.delete()
+
+        self.stdout.write(self.style.SUCCESS('Done.'))
+
+    # ------------------------------------------------------------- seeding
+
+    def seed(self, tenant, products, bills, days):
+        category = Category.objects.create(tenant=tenant, name='Benchmark')
+        Product.objects.bulk_create([
+            Product(
+                tenant=tenant, category=category, name=f'Product {n}', sku=f'BENCH-{n}',
+                purchase_price=Decimal('50'), selling_price=Decimal('100'), current_stock=1000,
+            )
+            for n in range(products)
+        ], batch_size=1000)
+        product_ids = list(Product.objects.filter(tenant=tenant).values_list('pk', flat=True))
+
+        Bill.objects.bulk_create([
+            Bill(
+                tenant=tenant, item_total=Decimal('200'), bill_discount=0,
+                gst_total=0, grand_total=Decimal('200'), payment_type='CASH',
+            )
+            for _ in range(bills)
+        ], batch_size=2000)
+        bill_ids = list(Bill.objects.filter(tenant=tenant).order_by('pk').values_list('pk', flat=True))
+
+        items, movements = [], []
+        for n, bill_id in enumerate(bill_ids):
+            for product_id in (product_ids[n % len(product_ids)], product_ids[(n * 7 + 1) % len(product_ids)]):
+                items.append(BillItem(
+                    bill_id=bill_id, product_id=product_id, quantity=1,
+                    price=Decimal('100'), discount=0, subtotal=Decimal('100'),
+                ))
+                movements.append(StockMovement(
+                    tenant=tenant, product_id=product_id, type='SALE', quantity=1,
+                    reference_type='Bill', reason=f'Sale - Bill {bill_id}',
+                ))
+        BillItem.objects.bulk_create(items, batch_size=2000)
+        StockMovement.objects.bulk_create(movements, batch_size=2000)
+
+        # date columns are auto_now_add: spread them over the period afterwards
+        movement_ids = list(
+            StockMovement.objects.filter(tenant=tenant).order_by('pk').values_list('pk', flat=True)
+        )
+        now = timezone.now()
+        per_day = max(len(bill_ids) // days, 1)
+        for day in range(days):
+            date = now - timezone.timedelta(days=days - day)
+            chunk = bill_ids[day * per_day:(day + 1) * per_day]
+            if not chunk:
+                break
+            Bill.objects.filter(pk__in=chunk).update(date=date)
+            StockMovement.objects.filter(
+                pk__in=movement_ids[2 * day * per_day:2 * (day + 1) * per_day]
+            ).update(date=date)
+        return product_ids[0]
+
+    def login(self, tenant):
+        email = f'bench-{uuid.uuid4().hex[:12]}@example.com'
+        password = uuid.uuid4().hex
+        User.objects.create_user(email=email, password=password, tenant=tenant, role='Admin')
+        client = APIClient()
+        response = client.post(reverse('token_obtain_pair'), {'email': email, 'password': password})
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+        return client
+
+    # --------------------------------------------------------------- cases
+
+    def cases(self, tenant, product_id, days):
+        """(label, endpoint URL, [(query shape, queryset)]) per list endpoint."""
+        since = timezone.localdate() - timezone.timedelta(days=min(days, 30))
+        since_at = timezone.now() - timezone.timedelta(days=min(days, 30))
+        movements = StockMovement.objects.order_by('-date', '-movement_id')
+        bills = Bill.objects.order_by('-date', '-bill_id')
+        return [
+            (
+                'stock movements',
+                reverse('stock-movement-list'),
+                [
+                    ('join via product', movements.filter(product__tenant=tenant)),
+                    ('tenant column', movements.filter(tenant=tenant).select_related('product')),
+                ],
+            ),
+            (
+                'stock movements of a product',
+                f'{reverse("stock-movement-list")}?product={product_id}',
+                [
+                    ('join via product', movements.filter(product__tenant=tenant, product_id=product_id)),
+                    ('tenant column', movements.filter(tenant=tenant, product_id=product_id)),
+                ],
+            ),
+            (
+                'stock history',
+                reverse('product-stock-history', args=[product_id]),
+                [
+                    ('tenant column', movements.filter(tenant=tenant, product_id=product_id)),
+                ],
+            ),
+            (
+                'bills, last 30 days',
+                f'{reverse("bill-list")}?view=summary&date__gte={since.isoformat()}',
+                [
+                    ('tenant + date range', bills.filter(tenant=tenant, date__gte=since_at)),
+                ],
+            ),
+        ]
+
+    # ----------------------------------------------------------- measuring
+
+    def measure(self, cases, client, repeat):
+        for label, url, shapes in cases:
+            self.stdout.write(f'\n{label}  ({url})')
+            for shape, queryset in shapes:
+                page = queryset[:PAGE_SIZE]
+                query_ms = self.median_ms(lambda: list(page), repeat)
+                self.stdout.write(f'  {shape:<24} query {query_ms:8.2f} ms')
+                for line in page.explain().splitlines():
+                    self.stdout.write(f'      {line}')
+            endpoint_ms = self.median_ms(lambda: self.get(client, url), repeat)
+            self.stdout.write(f'  {"endpoint":<24} total {endpoint_ms:8.2f} ms')
+        self.stdout.write('')
+
+    def get(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {url} returned {response.status_code}')
+
+    def median_ms(self, run, repeat):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    # ------------------------------------------------------------- indexes
+
+    def list_indexes(self):
+        indexes = []
+        for model, fields in LIST_INDEXES:
+            for index in model._meta.indexes:
+                if list(index.fields) == fields:
+                    indexes.append((model, index))
+        return indexes
+
+    def drop_indexes(self, indexes):
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+
+    def create_indexes(self, indexes):
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.add_index(model, index)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from authentication.models import Tenant
+from sales.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild daily sales rollups from Bill history for all tenants (or one tenant)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            help='Specific tenant ID to rebuild sales rollups for (optional)',
+        )
+
+    def handle(self, *args, **options):
+        tenant_id = options.get('tenant_id')
+
+        if tenant_id:
+            tenants = Tenant.objects.filter(tenant_id=tenant_id)
+            if not tenants.exists():
+                self.stdout.write(
+                    self.style.ERROR(f'Tenant with ID {tenant_id} does not exist')
+                )
+                return
+        else:
+            tenants = Tenant.objects.all()
+
+        for tenant in tenants:
+            rows = rebuild(tenant)
+            self.stdout.write(f'  {tenant.business_name}: {rows} rollup row(s)')
+
+        self.stdout.write(
+            self.style.SUCCESS('Sales rollups rebuilt!')
+        )
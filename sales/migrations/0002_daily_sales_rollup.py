@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('rollup_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('payment_type', models.CharField(blank=True, default='', max_length=50)),
+                ('bill_count', models.PositiveIntegerField(default=0)),
+                ('item_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('bill_discount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('gst_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('grand_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='authentication.tenant')),
+            ],
+            options={
+                'ordering': ['-day', 'payment_type'],
+                'unique_together': {('tenant', 'day', 'payment_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('hr', '0001_initial'),
+        ('sales', '0003_customer_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='bill',
+            constraint=models.UniqueConstraint(fields=('tenant', 'idempotency_key'), name='unique_bill_idempotency_key'),
+        ),
+    ]
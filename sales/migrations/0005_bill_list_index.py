@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('hr', '0001_initial'),
+        ('sales', '0004_bill_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['tenant', '-date', '-bill_id'], name='sales_bill_tenant__37c2bd_idx'),
+        ),
+    ]
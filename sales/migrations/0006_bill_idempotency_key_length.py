@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_bill_list_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bill',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_bill_idempotency_key_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='idempotency_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -19,11 +19,16 @@ class Customer(models.Model):
         max_digits=14, decimal_places=2, default=0
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # updates with update_fields must include it (delta sync relies on it)
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = TenantManager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["tenant", "updated_at"]),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.tenant.business_name})"
@@ -50,17 +55,30 @@ class Bill(models.Model):
     gst_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
     grand_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
     payment_type = models.CharField(max_length=50, blank=True, null=True)
+    # client-supplied key making offline replays of the same bill safe
+    idempotency_key = models.CharField(max_length=255, blank=True, null=True)
+    # hash of the payload first sent with idempotency_key (sales.services)
+    idempotency_fingerprint = models.CharField(max_length=32, blank=True, default="")
 
     objects = TenantManager()
 
     class Meta:
         ordering = ["-date"]
+        indexes = [
+            # bill lists and date ranges, newest first
+            models.Index(fields=["tenant", "-date", "-bill_id"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "idempotency_key"], name="unique_bill_idempotency_key"
+            ),
+        ]
 
     def __str__(self):
         return f"Bill {self.bill_id} - {self.tenant.business_name}"
 
     def recalculate_totals(self):
-        items = self.items.all()
+        items = self.items.select_related("product")
         item_total = sum([it.subtotal for it in items])
         self.item_total = item_total
         # Simple GST calculation if gst_total not provided; you can change logic
@@ -100,4 +118,33 @@ class CustomerPayment(models.Model):
     objects = TenantManager()
 
     def __str__(self):
-        return f"Payment {self.payment_id} - {self.amount}"
\ No newline at end of file
+        return f"Payment {self.payment_id} - {self.amount}"
+
+class DailySalesRollup(models.Model):
+    """
+    Bill totals per tenant, local calendar day and payment type, maintained
+    by create_bill (see sales.rollups) and rebuilt from Bill history by
+    `manage.py rebuild_sales_rollups`.
+    """
+    rollup_id = models.BigAutoField(primary_key=True)
+
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.CASCADE, related_name="sales_rollups"
+    )
+
+    day = models.DateField()
+    # upper-cased Bill.payment_type, "" when the bill has none
+    payment_type = models.CharField(max_length=50, blank=True, default="")
+
+    bill_count = models.PositiveIntegerField(default=0)
+    item_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    bill_discount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    gst_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    grand_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("tenant", "day", "payment_type")
+        ordering = ["-day", "payment_type"]
+
+    def __str__(self):
+        return f"{self.day} {self.payment_type or '-'}: {self.grand_total} ({self.tenant.business_name})"
@@ -0,0 +1,124 @@
+"""
+Daily sales rollups.
+
+create_bill adds every bill to its (tenant, local day, payment type)
+DailySalesRollup row inside the bill's transaction, so reports read a few
+rows per day instead of scanning Bill and BillItem. rebuild() recomputes the
+rows from Bill history, e.g. after bills were edited or deleted in the admin.
+"""
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, Count, Value
+from django.db.models.functions import Coalesce, Trim, TruncDate, TruncMonth, TruncWeek, Upper
+from django.utils import timezone
+
+from .models import Bill, DailySalesRollup
+
+TOTAL_FIELDS = ("item_total", "bill_discount", "gst_total", "grand_total")
+CENT = Decimal("0.01")
+
+# report granularity -> truncation of DailySalesRollup.day
+PERIODS = {
+    "daily": None,
+    "weekly": TruncWeek,
+    "monthly": TruncMonth,
+}
+
+
+def payment_key(payment_type):
+    return (payment_type or "").strip().upper()
+
+
+def record_bill(bill):
+    """Add a newly created bill to its rollup row. Call inside the bill's transaction."""
+    key = {
+        "tenant_id": bill.tenant_id,
+        "day": timezone.localdate(bill.date),
+        "payment_type": payment_key(bill.payment_type),
+    }
+    # the bill's in-memory totals are not yet rounded to the column's scale
+    increments = {
+        field: Decimal(getattr(bill, field) or 0).quantize(CENT) for field in TOTAL_FIELDS
+    }
+    update = {field: F(field) + value for field, value in increments.items()}
+
+    if DailySalesRollup.objects.filter(**key).update(bill_count=F("bill_count") + 1, **update):
+        return
+    try:
+        with transaction.atomic():
+            DailySalesRollup.objects.create(bill_count=1, **key, **increments)
+    except IntegrityError:
+        # another bill created the day's row first
+        DailySalesRollup.objects.filter(**key).update(bill_count=F("bill_count") + 1, **update)
+
+
+def rebuild(tenant):
+    """Recompute all of a tenant's rollup rows from Bill. Returns the row count."""
+    rows = (
+        Bill.objects.filter(tenant=tenant)
+        .order_by()
+        .annotate(
+            day=TruncDate("date"),
+            key=Upper(Trim(Coalesce("payment_type", Value("")))),
+        )
+        .values("day", "key")
+        .annotate(
+            bills=Count("pk"),
+            **{f"sum_{field}": Sum(field) for field in TOTAL_FIELDS},
+        )
+    )
+    rollups = [
+        DailySalesRollup(
+            tenant=tenant,
+            day=row["day"],
+            payment_type=row["key"],
+            bill_count=row["bills"],
+            **{field: row[f"sum_{field}"] or 0 for field in TOTAL_FIELDS},
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        DailySalesRollup.objects.filter(tenant=tenant).delete()
+        DailySalesRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def report(tenant, period, start, end):
+    """
+    Sales totals per day, week (starting Monday) or month between the dates
+    ``start`` and ``end`` (inclusive), with a per-payment-type breakdown.
+
+    Returns (rows, totals), oldest period first.
+    """
+    rollups = DailySalesRollup.objects.filter(tenant=tenant, day__gte=start, day__lte=end)
+    trunc = PERIODS[period]
+    bucket = trunc("day") if trunc else F("day")
+    grouped = (
+        rollups.order_by()
+        .annotate(bucket=bucket)
+        .values("bucket", "payment_type")
+        .annotate(
+            bills=Sum("bill_count"),
+            **{f"sum_{field}": Sum(field) for field in TOTAL_FIELDS},
+        )
+        .order_by("bucket", "payment_type")
+    )
+
+    rows = OrderedDict()
+    totals = _empty_totals()
+    for entry in grouped:
+        row = rows.get(entry["bucket"])
+        if row is None:
+            row = rows[entry["bucket"]] = {"period_start": entry["bucket"], **_empty_totals(), "payment_types": {}}
+        values = {"bill_count": entry["bills"], **{field: entry[f"sum_{field}"] for field in TOTAL_FIELDS}}
+        row["payment_types"][entry["payment_type"] or "UNSPECIFIED"] = values
+        for target in (row, totals):
+            for name, value in values.items():
+                target[name] += value
+    return list(rows.values()), totals
+
+
+def _empty_totals():
+    return {"bill_count": 0, **{field: Decimal("0") for field in TOTAL_FIELDS}}
@@ -25,6 +25,7 @@ class BillCreateSerializer(serializers.Serializer):
     customer_id = serializers.IntegerField(required=False, allow_null=True)
     bill_discount = serializers.DecimalField(max_digits=14, decimal_places=2, required=False, default=0)
     payment_type = serializers.CharField(required=False, allow_blank=True)
+    idempotency_key = serializers.CharField(required=False, max_length=255)
     items = BillItemInputSerializer(many=True)
 
     def validate(self, data):
@@ -48,6 +49,36 @@ class BillCreateSerializer(serializers.Serializer):
         return bill
 
 
+class BillBatchEntrySerializer(BillCreateSerializer):
+    """One bill of a batch; products are validated for the whole batch at once."""
+
+    def validate(self, data):
+        return data
+
+
+class BillBatchSerializer(serializers.Serializer):
+    MAX_BILLS = 500
+    # bills written in one transaction, sized to commit well within
+    # MAX_WRITE_TRANSACTION_SECONDS (core.transactions)
+    MAX_TRANSACTION_BILLS = 100
+
+    mode = serializers.ChoiceField(choices=["atomic", "chunked"], default="chunked")
+    chunk_size = serializers.IntegerField(default=50, min_value=1, max_value=MAX_TRANSACTION_BILLS)
+    bills = BillBatchEntrySerializer(many=True, allow_empty=False)
+
+    def validate_bills(self, value):
+        if len(value) > self.MAX_BILLS:
+            raise serializers.ValidationError(f"At most {self.MAX_BILLS} bills per batch.")
+        return value
+
+    def validate(self, data):
+        if data["mode"] == "atomic" and len(data["bills"]) > self.MAX_TRANSACTION_BILLS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_TRANSACTION_BILLS} bills per atomic batch; use chunked mode."
+            )
+        return data
+
+
 class BillItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.name", read_only=True)
     class Meta:
@@ -63,6 +94,15 @@ class BillDetailSerializer(serializers.ModelSerializer):
         fields = ["bill_id", "date", "customer", "customer_name", "created_by", "item_total", "bill_discount", "gst_total", "grand_total", "payment_type", "items"]
 
 
+class BillSummarySerializer(serializers.ModelSerializer):
+    """Header-only bill row; ``item_count`` is annotated by the queryset."""
+    customer_name = serializers.CharField(source="customer.name", read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
+    class Meta:
+        model = Bill
+        fields = ["bill_id", "date", "customer", "customer_name", "created_by", "item_total", "bill_discount", "gst_total", "grand_total", "payment_type", "item_count"]
+
+
 class CustomerPaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomerPayment
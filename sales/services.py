@@ -1,12 +1,74 @@
-from django.db import transaction
+import hashlib
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from django.db import IntegrityError
 from django.db.models import F
+from django.utils import timezone
 from decimal import Decimal
+from core.transactions import TransactionTooLong, bounded_atomic
+from inventory import stock
 from inventory.models import Product, StockMovement
+from inventory.signals import stock_changed
+from inventory.stock import InsufficientStock
+from . import rollups
 from .models import Bill, BillItem, Customer
 
+logger = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """
+    Collects wall-clock timings (in milliseconds) for the named phases of a
+    service call, e.g. ``{"lock": 1.2, "compute": 0.1, "write": 3.4}``.
+    """
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.timings[name] = round(self.timings.get(name, 0) + elapsed, 3)
+
+
+class IdempotencyKeyReused(ValueError):
+    """An idempotency key was sent again with a different bill payload."""
+
+
+def payload_fingerprint(payload):
+    """Hash of a bill payload, ignoring its idempotency key."""
+    body = {name: value for name, value in payload.items() if name != "idempotency_key"}
+    raw = json.dumps(body, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def check_fingerprint(key, stored, fingerprint):
+    # bills created before fingerprints were stored cannot be compared
+    if stored and stored != fingerprint:
+        raise IdempotencyKeyReused(
+            f"Idempotency key {key!r} was already used with a different bill"
+        )
+
 
-class InsufficientStock(Exception):
-    pass
+def replayed_bill(tenant, key, fingerprint):
+    """
+    The tenant's bill created with idempotency ``key``, marked as replayed,
+    or None. Raises IdempotencyKeyReused if it was created from a payload
+    with a different ``fingerprint``.
+    """
+    bill = Bill.objects.filter(tenant=tenant, idempotency_key=key).first()
+    if bill is not None:
+        check_fingerprint(key, bill.idempotency_fingerprint, fingerprint)
+        bill.replayed = True
+        bill.timings = {}
+    return bill
 
 
 def create_bill(tenant, created_by_staff, payload):
@@ -20,75 +82,272 @@ def create_bill(tenant, created_by_staff, payload):
             ...
         ]
     }
+
+    All products on the bill are locked with a single ``SELECT ... FOR UPDATE``
+    ordered by primary key, so two concurrent bills always acquire their row
+    locks in the same order and cannot deadlock. Totals are computed in memory
+    from the locked rows, and items, stock movements and stock levels are
+    written with one bulk statement each.
+
+    With sharded stock counters enabled (INVENTORY_STOCK_COUNTER_SLOTS) the
+    product rows are read without locks and stock is taken from the
+    products' counter slots instead (see inventory.stock).
+
+    An optional ``"idempotency_key"`` makes replays safe: if the tenant
+    already has a bill with that key, it is returned unchanged with
+    ``bill.replayed = True`` and nothing is written. Reusing a key with a
+    different payload raises IdempotencyKeyReused.
+
+    The returned bill carries ``bill.timings``, the per-phase timings in ms.
     """
     items = payload.get("items", [])
     if not items:
         raise ValueError("Bill must contain at least one item.")
 
-    with transaction.atomic():
-        customer = None
-        if payload.get("customer_id"):
-            customer = Customer.objects.select_for_update().get(pk=payload["customer_id"], tenant=tenant)
-
-        # create bill skeleton
-        bill = Bill.objects.create(
-            tenant=tenant,
-            customer=customer,
-            created_by=created_by_staff,
-            bill_discount=Decimal(payload.get("bill_discount", 0)),
-            payment_type=payload.get("payment_type")
+    timer = PhaseTimer()
+
+    key = payload.get("idempotency_key") or None
+    fingerprint = payload_fingerprint(payload) if key else ""
+    if key:
+        existing = replayed_bill(tenant, key, fingerprint)
+        if existing is not None:
+            return existing
+
+    try:
+        with bounded_atomic():
+            with timer.phase("lock"):
+                customer = None
+                if payload.get("customer_id"):
+                    customer = Customer.objects.select_for_update().get(pk=payload["customer_id"], tenant=tenant)
+
+                sharded = stock.sharded()
+                product_ids = sorted({int(it["product_id"]) for it in items})
+                queryset = Product.objects.all() if sharded else Product.objects.select_for_update()
+                products = {
+                    p.pk: p
+                    for p in queryset.filter(pk__in=product_ids, tenant=tenant).order_by("pk")
+                }
+                missing = set(product_ids) - set(products)
+                if missing:
+                    raise Product.DoesNotExist(f"Products not found: {sorted(missing)}")
+
+            with timer.phase("compute"):
+                lines = []
+                requested = {}
+                for it in items:
+                    product = products[int(it["product_id"])]
+
+                    qty = int(it["quantity"])
+                    if qty <= 0:
+                        raise ValueError("Quantity must be > 0")
+
+                    # the same product may appear on several lines of one bill
+                    requested[product.pk] = requested.get(product.pk, 0) + qty
+                    if not sharded and product.current_stock < requested[product.pk]:
+                        raise InsufficientStock(f"Insufficient stock for product {product.name}")
+
+                    price = Decimal(it.get("price", product.selling_price))
+                    discount = Decimal(it.get("discount", 0))
+                    subtotal = (price - discount) * qty
+                    lines.append((product, qty, price, discount, subtotal))
+
+                item_total = sum(subtotal for _, _, _, _, subtotal in lines)
+                # Simple GST calculation, same as Bill.recalculate_totals
+                gst_total = sum(
+                    (product.gst_percent / 100) * (price * qty - discount * qty)
+                    for product, qty, price, discount, _ in lines
+                )
+                bill_discount = Decimal(payload.get("bill_discount", 0))
+
+            with timer.phase("write"):
+                bill = Bill.objects.create(
+                    tenant=tenant,
+                    customer=customer,
+                    created_by=created_by_staff,
+                    idempotency_key=key,
+                    idempotency_fingerprint=fingerprint,
+                    item_total=item_total,
+                    bill_discount=bill_discount,
+                    gst_total=gst_total,
+                    grand_total=item_total + gst_total - bill_discount,
+                    payment_type=payload.get("payment_type")
+                )
+
+                BillItem.objects.bulk_create([
+                    BillItem(
+                        bill=bill,
+                        product=product,
+                        quantity=qty,
+                        price=price,
+                        discount=discount,
+                        subtotal=subtotal
+                    )
+                    for product, qty, price, discount, subtotal in lines
+                ])
+
+                if sharded:
+                    stock.deduct(
+                        tenant, requested, names={pk: products[pk].name for pk in requested}
+                    )
+                else:
+                    # rows are locked, so the new stock can be computed in memory
+                    now = timezone.now()
+                    for product_id, qty in requested.items():
+                        products[product_id].current_stock -= qty
+                        products[product_id].updated_at = now
+                    Product.objects.bulk_update(
+                        [products[pk] for pk in requested], ["current_stock", "updated_at"]
+                    )
+                    stock_changed(tenant.pk, list(requested))
+
+                StockMovement.objects.bulk_create([
+                    StockMovement(
+                        tenant=tenant,
+                        product=product,
+                        type="SALE",
+                        quantity=qty,
+                        reference_type="Bill",
+                        reason=f"Sale - Bill {bill.bill_id}"
+                    )
+                    for product, qty, _, _, _ in lines
+                ])
+
+                rollups.record_bill(bill)
+
+            with timer.phase("customer"):
+                # update customer spending_balance
+                if customer:
+                    # increase spending_balance by grand_total if payment_type indicates credit, else maybe no change
+                    # Here we assume spending_balance increases on credit sale; change per your business logic
+                    if payload.get("payment_type") and payload.get("payment_type").upper() == "CREDIT":
+                        customer.spending_balance = F('spending_balance') + bill.grand_total
+                        customer.save(update_fields=['spending_balance', 'updated_at'])
+    except IntegrityError:
+        # a concurrent request with the same idempotency key won the race
+        existing = replayed_bill(tenant, key, fingerprint) if key else None
+        if existing is None:
+            raise
+        return existing
+
+    bill.timings = timer.timings
+    bill.replayed = False
+    logger.debug(f"Bill {bill.bill_id} created with {len(lines)} items in {timer.timings}")
+    return bill
+
+
+class BatchAborted(Exception):
+    """Raised inside an atomic batch to roll back every bill of it."""
+
+
+# per-bill failures reported in batch results instead of failing the request
+BILL_ERRORS = (InsufficientStock, ValueError, Product.DoesNotExist, Customer.DoesNotExist)
+
+
+def create_bills_batch(tenant, created_by_staff, bills, mode="chunked", chunk_size=50):
+    """
+    Create many bills (e.g. queued by an offline till) in one call.
+
+    Product and customer ids of all bills are checked with one query each,
+    and bills whose idempotency key the tenant already used are reported as
+    duplicates without being replayed (one query for all keys). A key reused
+    with a different payload is reported as an error.
+
+    - ``"atomic"``: all bills in one transaction; any failing bill rolls the
+      whole batch back.
+    - ``"chunked"``: one transaction per ``chunk_size`` bills; a failing bill
+      is rolled back to its own savepoint and the rest are kept.
+
+    A transaction that runs past MAX_WRITE_TRANSACTION_SECONDS (see
+    core.transactions) is rolled back and its bills reported as rolled_back.
+
+    Returns ``(results, committed)`` with one result per bill, in order:
+    ``{"index", "idempotency_key", "status", "bill_id", "error"}`` where
+    status is "created", "duplicate", "error" or "rolled_back".
+    """
+    product_ids = {int(it["product_id"]) for payload in bills for it in payload["items"]}
+    known_products = set(
+        Product.objects.filter(tenant=tenant, pk__in=product_ids).values_list("pk", flat=True)
+    )
+    customer_ids = {payload["customer_id"] for payload in bills if payload.get("customer_id")}
+    known_customers = set(
+        Customer.objects.filter(tenant=tenant, pk__in=customer_ids).values_list("pk", flat=True)
+    )
+    keys = [payload["idempotency_key"] for payload in bills if payload.get("idempotency_key")]
+    existing = {
+        key: (pk, fingerprint)
+        for key, pk, fingerprint in Bill.objects.filter(tenant=tenant, idempotency_key__in=keys)
+        .values_list("idempotency_key", "pk", "idempotency_fingerprint")
+    }
+
+    results, planned, first_with_key = [], [], {}
+    for index, payload in enumerate(bills):
+        key = payload.get("idempotency_key")
+        result = {"index": index, "idempotency_key": key, "status": None, "bill_id": None, "error": None}
+        results.append(result)
+        missing = {int(it["product_id"]) for it in payload["items"]} - known_products
+        try:
+            if key in existing:
+                check_fingerprint(key, existing[key][1], payload_fingerprint(payload))
+            elif key in first_with_key:
+                first = bills[first_with_key[key]]
+                check_fingerprint(key, payload_fingerprint(first), payload_fingerprint(payload))
+        except IdempotencyKeyReused as e:
+            result.update(status="error", error=str(e))
+            continue
+        if key in existing:
+            result.update(status="duplicate", bill_id=existing[key][0])
+        elif key in first_with_key:
+            # resolved once the first bill with this key is written
+            result["status"] = "duplicate"
+        elif missing:
+            result.update(status="error", error=f"Products not found or not in tenant: {sorted(missing)}")
+        elif payload.get("customer_id") and payload["customer_id"] not in known_customers:
+            result.update(status="error", error="Customer not found or not in tenant")
+        else:
+            planned.append((index, payload))
+            if key:
+                first_with_key[key] = index
+
+    def create(index, payload):
+        try:
+            bill = create_bill(tenant, created_by_staff, payload)
+        except BILL_ERRORS as e:
+            results[index].update(status="error", error=str(e))
+            return False
+        results[index].update(
+            status="duplicate" if bill.replayed else "created", bill_id=bill.bill_id
         )
+        return True
+
+    committed = True
+    if mode == "atomic":
+        try:
+            with bounded_atomic():
+                if any(result["status"] == "error" for result in results):
+                    raise BatchAborted
+                for index, payload in planned:
+                    if not create(index, payload):
+                        raise BatchAborted
+        except (BatchAborted, TransactionTooLong):
+            committed = False
+            for result in results:
+                if result["status"] != "error":
+                    result.update(status="rolled_back", bill_id=None)
+    else:
+        for start in range(0, len(planned), chunk_size):
+            chunk = planned[start:start + chunk_size]
+            try:
+                with bounded_atomic():
+                    for index, payload in chunk:
+                        create(index, payload)
+            except TransactionTooLong as e:
+                for index, _ in chunk:
+                    if results[index]["status"] != "error":
+                        results[index].update(status="rolled_back", bill_id=None, error=str(e))
 
-        # process each item
-        for it in items:
-            product = Product.objects.select_for_update().get(pk=it["product_id"], tenant=tenant)
-
-            qty = int(it["quantity"])
-            if qty <= 0:
-                raise ValueError("Quantity must be > 0")
-
-            if product.current_stock < qty:
-                raise InsufficientStock(f"Insufficient stock for product {product.name}")
-
-            price = Decimal(it.get("price", product.selling_price))
-            discount = Decimal(it.get("discount", 0))
-            subtotal = (price - discount) * qty
-
-            bill_item = BillItem.objects.create(
-                bill=bill,
-                product=product,
-                quantity=qty,
-                price=price,
-                discount=discount,
-                subtotal=subtotal
-            )
-
-            # update product stock
-            product.current_stock = F('current_stock') - qty
-            product.save(update_fields=['current_stock'])
-
-            # create stock movement record
-            StockMovement.objects.create(
-                tenant=tenant,
-                product=product,
-                type="SALE",
-                quantity=qty,
-                reference_type="Bill",
-                reason=f"Sale - Bill {bill.bill_id}"
-            )
-
-        # reload product rows so F() evaluated
-        # (optional) recalc totals
-        bill = Bill.objects.select_for_update().get(pk=bill.pk)
-        bill.recalculate_totals()
-        bill.save()
-
-        # update customer spending_balance
-        if customer:
-            # increase spending_balance by grand_total if payment_type indicates credit, else maybe no change
-            # Here we assume spending_balance increases on credit sale; change per your business logic
-            if payload.get("payment_type") and payload.get("payment_type").upper() == "CREDIT":
-                customer.spending_balance = F('spending_balance') + bill.grand_total
-                customer.save(update_fields=['spending_balance'])
-
-        return bill
+    if committed:
+        for result in results:
+            key = result["idempotency_key"]
+            if result["bill_id"] is None and key in first_with_key:
+                result["bill_id"] = results[first_with_key[key]]["bill_id"]
+    return results, committed
@@ -0,0 +1,83 @@
+"""
+Signal receivers dropping rendered bills from the bill cache (sales.bill_cache)
+when a bill, its items, or a customer or product name shown on it change, and
+bumping the tenant's customer change counter (used for ETags).
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import bump_namespace
+from inventory.models import Product
+from . import bill_cache
+from .models import Bill, BillItem, Customer
+
+# tenant cache namespace of the customer endpoints
+CUSTOMERS_NAMESPACE = "customers"
+
+
+def drop_bills(bill_ids):
+    """
+    Drop rendered bills once the transaction commits. Dropping them earlier
+    would let a concurrent retrieve re-cache the old rendering before the
+    change is visible. ``bill_ids`` may be a lazy queryset.
+    """
+    transaction.on_commit(lambda: bill_cache.delete_many(bill_ids))
+
+
+@receiver(pre_save, sender=Customer)
+@receiver(pre_save, sender=Product)
+def remember_name(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored name, so post_save only drops bills when it really changed."""
+    previous = None
+    if instance.pk is not None and (update_fields is None or "name" in update_fields):
+        previous = (
+            sender._base_manager.filter(pk=instance.pk).values_list("name", flat=True).first()
+        )
+    instance._previous_name = previous
+
+
+def name_changed(instance):
+    previous = getattr(instance, "_previous_name", None)
+    return previous is not None and previous != instance.name
+
+
+@receiver(post_save, sender=Bill)
+def bill_saved(sender, instance, created=False, **kwargs):
+    # new bills are cached by BillViewSet.create once rendered
+    if not created:
+        drop_bills([instance.pk])
+
+
+@receiver(post_delete, sender=Bill)
+def bill_deleted(sender, instance, **kwargs):
+    drop_bills([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=BillItem)
+def bill_item_changed(sender, instance, **kwargs):
+    drop_bills([instance.bill_id])
+
+
+@receiver(post_save, sender=Customer)
+def customer_saved(sender, instance, created=False, **kwargs):
+    if not created and name_changed(instance):
+        drop_bills(instance.bills.values_list("pk", flat=True))
+    customers_changed(instance.tenant_id)
+
+
+@receiver(post_delete, sender=Customer)
+def customer_deleted(sender, instance, **kwargs):
+    customers_changed(instance.tenant_id)
+
+
+def customers_changed(tenant_id):
+    transaction.on_commit(lambda: bump_namespace(tenant_id, CUSTOMERS_NAMESPACE))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created=False, **kwargs):
+    if not created and name_changed(instance):
+        drop_bills(
+            BillItem.objects.filter(product_id=instance.pk).values_list("bill_id", flat=True).distinct()
+        )
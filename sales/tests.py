@@ -1,3 +1,517 @@
-from django.test import TestCase
+import csv
+import json
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from authentication.models import Tenant
+from core.models import IdempotencyKey
+from inventory import stock
+from inventory.models import Category, Product, StockMovement
+from inventory.tests import create_tenant_client
+from . import rollups
+from .models import Bill, BillItem, Customer, DailySalesRollup
+from .services import InsufficientStock, create_bill
+
+
+class CreateBillTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(
+            business_name="Test Store",
+            plan="Standard",
+            status="Active",
+            sub_end_date=timezone.now() + timezone.timedelta(days=30),
+        )
+        self.category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.products = [
+            Product.objects.create(
+                tenant=self.tenant,
+                category=self.category,
+                name=f"Product {i}",
+                sku=f"SKU-{i}",
+                purchase_price=Decimal("50.00"),
+                selling_price=Decimal("100.00"),
+                gst_percent=Decimal("18.00"),
+                current_stock=10,
+            )
+            for i in range(5)
+        ]
+        self.customer = Customer.objects.create(tenant=self.tenant, name="Walk-in")
+
+    def test_create_bill_updates_stock_totals_and_balance(self):
+        payload = {
+            "customer_id": self.customer.pk,
+            "bill_discount": Decimal("10"),
+            "payment_type": "credit",
+            "items": [
+                {"product_id": self.products[0].pk, "quantity": 2, "discount": Decimal("5")},
+                {"product_id": self.products[1].pk, "quantity": 1, "price": Decimal("80")},
+                # same product on a second line
+                {"product_id": self.products[0].pk, "quantity": 3},
+            ],
+        }
+        bill = create_bill(self.tenant, None, payload)
+
+        bill.refresh_from_db()
+        self.assertEqual(bill.item_total, Decimal("570.00"))
+        self.assertEqual(bill.gst_total, Decimal("102.60"))
+        self.assertEqual(bill.grand_total, Decimal("662.60"))
+        self.assertEqual(BillItem.objects.filter(bill=bill).count(), 3)
+        self.assertIn("lock", bill.timings)
+
+        self.products[0].refresh_from_db()
+        self.products[1].refresh_from_db()
+        self.assertEqual(self.products[0].current_stock, 5)
+        self.assertEqual(self.products[1].current_stock, 9)
+        self.assertEqual(
+            StockMovement.objects.filter(tenant=self.tenant, type="SALE").count(), 3
+        )
+
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.spending_balance, Decimal("662.60"))
+
+    def test_insufficient_stock_rolls_back(self):
+        payload = {
+            "items": [
+                {"product_id": self.products[0].pk, "quantity": 6},
+                {"product_id": self.products[0].pk, "quantity": 6},
+            ],
+        }
+        with self.assertRaises(InsufficientStock):
+            create_bill(self.tenant, None, payload)
+
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].current_stock, 10)
+        self.assertFalse(Bill.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_query_count_does_not_grow_with_items(self):
+        payload = {
+            "items": [{"product_id": p.pk, "quantity": 1} for p in self.products],
+        }
+        create_bill(self.tenant, None, payload)  # creates today's rollup row
+        # savepoint + lock + bill + items + stock + low-stock flag + movements + rollup + release
+        with self.assertNumQueries(9):
+            create_bill(self.tenant, None, payload)
+
+    @override_settings(INVENTORY_STOCK_COUNTER_SLOTS=4)
+    def test_sharded_stock_counters(self):
+        payload = {"items": [{"product_id": self.products[0].pk, "quantity": 4}]}
+        create_bill(self.tenant, None, payload)
+        create_bill(self.tenant, None, payload)
+        with self.assertRaises(InsufficientStock):
+            create_bill(self.tenant, None, payload)
+
+        self.assertEqual(stock.current_stock([self.products[0].pk])[self.products[0].pk], 2)
+        self.assertEqual(Bill.objects.count(), 2)
+        self.assertEqual(StockMovement.objects.filter(type="SALE").count(), 2)
+
+
+class BillListTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.products = [
+            Product.objects.create(
+                tenant=self.tenant,
+                category=category,
+                name=f"Product {i}",
+                sku=f"SKU-{i}",
+                purchase_price=Decimal("50.00"),
+                selling_price=Decimal("100.00"),
+                current_stock=100,
+            )
+            for i in range(3)
+        ]
+        self.customer = Customer.objects.create(tenant=self.tenant, name="Walk-in")
+        # primary keys are reused between tests
+        caches["bills"].clear()
+
+    def create_bills(self, count):
+        for _ in range(count):
+            create_bill(self.tenant, None, {
+                "customer_id": self.customer.pk,
+                "items": [{"product_id": p.pk, "quantity": 1} for p in self.products],
+            })
+
+    def count_queries(self, params=None):
+        # measure the uncached path
+        caches["bills"].clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse("bill-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return len(captured.captured_queries), response
+
+    def test_query_count_is_constant(self):
+        self.create_bills(2)
+        self.count_queries()  # warm the tenant cache
+        few, _ = self.count_queries()
+        few_summary, _ = self.count_queries({"view": "summary"})
+
+        self.create_bills(8)
+        many, response = self.count_queries()
+        many_summary, summary = self.count_queries({"view": "summary"})
+
+        self.assertEqual(few, many)
+        self.assertEqual(few_summary, many_summary)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(response.data["results"][0]["items"][0]["product_name"], "Product 0")
+        self.assertEqual(response.data["results"][0]["customer_name"], "Walk-in")
+
+        row = summary.data["results"][0]
+        self.assertEqual(row["item_count"], 3)
+        self.assertNotIn("items", row)
+
+    def test_retrieve_query_count(self):
+        self.create_bills(1)
+        bill = Bill.objects.get()
+        url = reverse("bill-detail", args=[bill.pk])
+        self.client.get(url)  # warm the tenant cache
+        caches["bills"].clear()
+        # bill + customer join, items + products join
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["items"]), 3)
+
+        # now rendered and cached
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, response.data)
+
+    def test_cached_bills_are_dropped_on_changes(self):
+        self.create_bills(2)
+        url = reverse("bill-list")
+        self.client.get(url)  # renders and caches both bills
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        # saves that keep the name leave the rendered bills cached
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.save()
+            self.products[0].selling_price = Decimal("1.00")
+            self.products[0].save()
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.name = "Regular"
+            self.customer.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data["results"][0]["customer_name"], "Regular")
+
+        bill = Bill.objects.first()
+        item = bill.items.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            item.quantity = 5
+            item.save()
+        response = self.client.get(reverse("bill-detail", args=[bill.pk]))
+        self.assertIn(5, [row["quantity"] for row in response.data["items"]])
+
+        # another tenant never sees a cached bill
+        _, other = create_tenant_client("Other Store", "owner@other.com")
+        response = other.get(reverse("bill-detail", args=[bill.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_caches_the_bill(self):
+        response = self.client.post(reverse("bill-list"), {
+            "items": [{"product_id": self.products[0].pk, "quantity": 1}],
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        with self.assertNumQueries(0):
+            cached = self.client.get(reverse("bill-detail", args=[response.data["bill_id"]]))
+        self.assertEqual(cached.data, response.data)
+
+
+class SalesReportTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name="Runner",
+            sku="RUN-1",
+            purchase_price=Decimal("50.00"),
+            selling_price=Decimal("100.00"),
+            gst_percent=Decimal("18.00"),
+            current_stock=100,
+        )
+
+    def sell(self, quantity, payment_type):
+        return create_bill(self.tenant, None, {
+            "payment_type": payment_type,
+            "items": [{"product_id": self.product.pk, "quantity": quantity}],
+        })
+
+    def test_create_bill_updates_rollup(self):
+        self.sell(1, "cash")
+        self.sell(2, "CASH")
+        self.sell(1, "Credit")
+
+        today = timezone.localdate()
+        cash = DailySalesRollup.objects.get(tenant=self.tenant, day=today, payment_type="CASH")
+        self.assertEqual(cash.bill_count, 2)
+        self.assertEqual(cash.item_total, Decimal("300.00"))
+        self.assertEqual(cash.grand_total, Decimal("354.00"))
+
+        before = set(DailySalesRollup.objects.values_list("day", "payment_type", "bill_count", "grand_total"))
+        self.assertEqual(rollups.rebuild(self.tenant), 2)
+        after = set(DailySalesRollup.objects.values_list("day", "payment_type", "bill_count", "grand_total"))
+        self.assertEqual(before, after)
+
+    def test_reports(self):
+        self.sell(1, "cash")
+        old = self.sell(2, "credit")
+        Bill.objects.filter(pk=old.pk).update(date=timezone.now() - timezone.timedelta(days=40))
+        rollups.rebuild(self.tenant)
+
+        self.client.get(reverse("sales-report-daily"))  # warm the tenant cache
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("sales-report-daily"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["totals"]["grand_total"], "118.00")
+
+        response = self.client.get(reverse("sales-report-monthly"))
+        self.assertEqual(response.data["totals"]["bill_count"], 2)
+        self.assertEqual(response.data["totals"]["grand_total"], "354.00")
+        credit = [row["payment_types"].get("CREDIT") for row in response.data["results"]]
+        self.assertIn({"bill_count": 1, "item_total": "200.00", "bill_discount": "0.00",
+                       "gst_total": "36.00", "grand_total": "236.00"}, credit)
+
+        response = self.client.get(reverse("sales-report-weekly"), {"from": "2025-02-01", "to": "2025-01-01"})
+        self.assertEqual(response.status_code, 400)
+
+
+class GstSummaryTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+
+        def product(sku, hsn, rate):
+            return Product.objects.create(
+                tenant=self.tenant, category=category, name=sku, sku=sku, hsn_code=hsn,
+                purchase_price=Decimal("50.00"), selling_price=Decimal("100.00"),
+                gst_percent=Decimal(rate), current_stock=100,
+            )
+
+        shoe, sock, belt = product("SHOE", "6403", "18"), product("SOCK", "6115", "5"), product("BELT", "6403", "12")
+        business = Customer.objects.create(tenant=self.tenant, name="Retailer", gst_number="27ABCDE1234F1Z5")
+        walk_in = Customer.objects.create(tenant=self.tenant, name="Walk-in", gst_number="")
+        for customer, items in [
+            (business, [(shoe, 2), (sock, 4)]),
+            (walk_in, [(shoe, 1), (belt, 1)]),
+            (None, [(sock, 2)]),
+        ]:
+            create_bill(self.tenant, None, {
+                "customer_id": customer.pk if customer else None,
+                "items": [{"product_id": p.pk, "quantity": qty} for p, qty in items],
+            })
+        self.url = reverse("sales-report-gst")
+
+    def test_summary_groups_by_hsn_and_rate(self):
+        self.client.get(self.url)  # warm the tenant cache
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        rows = {(row["hsn_code"], row["gst_percent"]): row for row in response.data["results"]}
+        self.assertEqual(set(rows), {("6115", "5.00"), ("6403", "12.00"), ("6403", "18.00")})
+
+        shoes = rows[("6403", "18.00")]
+        self.assertEqual(shoes["quantity"], 3)
+        self.assertEqual(shoes["taxable_value"], "300.00")
+        self.assertEqual(shoes["tax_amount"], "54.00")
+        self.assertEqual(shoes["b2b_taxable_value"], "200.00")
+        self.assertEqual(shoes["b2c_quantity"], 1)
+
+        socks = rows[("6115", "5.00")]
+        self.assertEqual((socks["b2b_quantity"], socks["b2c_quantity"]), (4, 2))
+        self.assertEqual(response.data["totals"]["taxable_value"], "1000.00")
+
+    def test_streaming_exports(self):
+        today = timezone.localdate()
+        response = self.client.get(self.url, {"month": today.strftime("%Y-%m"), "export": "csv"})
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ["hsn_code", "gst_percent", "quantity"])
+        self.assertEqual(len(rows), 4)
+
+        response = self.client.get(self.url, {"fy": str(today.year - 1), "export": "json"})
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertIn("from", data)
+
+        response = self.client.get(self.url, {"month": "2025-13"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CustomerConditionalGetTest(TestCase):
+    def test_customer_write_changes_the_etag(self):
+        tenant, client = create_tenant_client("Test Store", "owner@store.com")
+        customer = Customer.objects.create(tenant=tenant, name="Walk-in")
+        url = reverse("customer-detail", args=[customer.pk])
+        etag = client.get(url)["ETag"]
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.phone = "9999999999"
+            customer.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["phone"], "9999999999")
+
+
+class BillBatchTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=category,
+            name="Runner",
+            sku="RUN-1",
+            purchase_price=Decimal("50.00"),
+            selling_price=Decimal("100.00"),
+            current_stock=5,
+        )
+        self.url = reverse("bill-batch")
+        caches["bills"].clear()
+
+    def bill(self, key, quantity=1, product_id=None):
+        return {
+            "idempotency_key": key,
+            "payment_type": "CASH",
+            "items": [{"product_id": product_id or self.product.pk, "quantity": quantity}],
+        }
+
+    def test_chunked_batch_reports_per_bill_results_and_replays_safely(self):
+        batch = {
+            "mode": "chunked",
+            "chunk_size": 2,
+            "bills": [
+                self.bill("till1-1"),
+                self.bill("till1-2", quantity=10),  # more than in stock
+                self.bill("till1-3", product_id=999999),
+                self.bill("till1-4", quantity=2),
+                self.bill("till1-1"),  # same bill queued twice
+            ],
+        }
+        response = self.client.post(self.url, batch, format="json")
+        self.assertEqual(response.status_code, 200)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, ["created", "error", "error", "created", "duplicate"])
+        results = response.data["results"]
+        self.assertEqual(results[4]["bill_id"], results[0]["bill_id"])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 2)
+
+        # replaying the whole batch writes nothing new
+        response = self.client.post(self.url, batch, format="json")
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, ["duplicate", "error", "error", "duplicate", "duplicate"])
+        self.assertEqual(Bill.objects.count(), 2)
+
+    def test_atomic_batch_rolls_back_on_any_failure(self):
+        batch = {"mode": "atomic", "bills": [self.bill("a-1"), self.bill("a-2", quantity=10)]}
+        response = self.client.post(self.url, batch, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.data["committed"])
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], ["rolled_back", "error"]
+        )
+        self.assertFalse(Bill.objects.exists())
+
+        batch["bills"][1]["items"][0]["quantity"] = 2
+        response = self.client.post(self.url, batch, format="json")
+        self.assertTrue(response.data["committed"])
+        self.assertEqual(Bill.objects.count(), 2)
+
+    def test_atomic_batches_are_capped_to_one_short_transaction(self):
+        batch = {"mode": "atomic", "bills": [self.bill(f"big-{n}") for n in range(101)]}
+        response = self.client.post(reverse("bill-batch"), batch, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Bill.objects.exists())
+
+    def test_single_create_honors_idempotency_key(self):
+        first = self.client.post(reverse("bill-list"), self.bill("single-1"), format="json")
+        again = self.client.post(reverse("bill-list"), self.bill("single-1"), format="json")
+        self.assertEqual((first.status_code, again.status_code), (201, 200))
+        self.assertEqual(first.data["bill_id"], again.data["bill_id"])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 4)
+
+    def test_reused_key_with_a_different_bill_is_rejected(self):
+        self.client.post(reverse("bill-list"), self.bill("single-2"), format="json")
+        response = self.client.post(reverse("bill-list"), self.bill("single-2", quantity=2), format="json")
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("different bill", response.data["error"])
+
+        batch = {
+            "mode": "chunked",
+            "bills": [
+                self.bill("single-2", quantity=3),
+                self.bill("batch-1"),
+                self.bill("batch-1", quantity=2),
+            ],
+        }
+        results = self.client.post(reverse("bill-batch"), batch, format="json").data["results"]
+        self.assertEqual([r["status"] for r in results], ["error", "created", "error"])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 3)
+
+    def test_idempotency_key_header_replays_the_stored_response(self):
+        headers = {"HTTP_IDEMPOTENCY_KEY": "till1-retry-7"}
+        body = {"payment_type": "CASH", "items": [{"product_id": self.product.pk, "quantity": 1}]}
+        first = self.client.post(reverse("bill-list"), body, format="json", **headers)
+        self.assertEqual(first.status_code, 201)
+
+        # only the stored key is read
+        with self.assertNumQueries(1):
+            again = self.client.post(reverse("bill-list"), body, format="json", **headers)
+        self.assertEqual(again.status_code, 201)
+        self.assertEqual(again["Idempotent-Replayed"], "true")
+        self.assertEqual(again.data["bill_id"], first.data["bill_id"])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 4)
+
+        body["items"][0]["quantity"] = 2
+        response = self.client.post(reverse("bill-list"), body, format="json", **headers)
+        self.assertEqual(response.status_code, 422)
+
+    @override_settings(MAX_WRITE_TRANSACTION_SECONDS=0)
+    def test_transactions_running_too_long_are_rolled_back(self):
+        response = self.client.post(reverse("bill-list"), self.bill("slow-1"), format="json")
+        self.assertEqual(response.status_code, 503)
+
+        batch = {"mode": "chunked", "bills": [self.bill("slow-2"), self.bill("slow-3")]}
+        results = self.client.post(reverse("bill-batch"), batch, format="json").data["results"]
+        self.assertEqual([r["status"] for r in results], ["rolled_back", "rolled_back"])
+        self.assertFalse(Bill.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 5)
+
+    def test_idempotency_key_header_survives_other_workers_and_restarts(self):
+        headers = {"HTTP_IDEMPOTENCY_KEY": "till1-retry-8"}
+        body = {"payment_type": "CASH", "items": [{"product_id": self.product.pk, "quantity": 1}]}
+        first = self.client.post(reverse("bill-list"), body, format="json", **headers)
+        self.assertEqual(Bill.objects.get(pk=first.data["bill_id"]).idempotency_key, "till1-retry-8")
+
+        # a retry served by a worker with nothing cached
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        again = self.client.post(reverse("bill-list"), body, format="json", **headers)
+        self.assertEqual(again["Idempotent-Replayed"], "true")
+        self.assertEqual(again.data["bill_id"], first.data["bill_id"])
+
+        # even without the stored response, the bill's key returns the same bill
+        IdempotencyKey.objects.all().delete()
+        again = self.client.post(reverse("bill-list"), body, format="json", **headers)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data["bill_id"], first.data["bill_id"])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.current_stock, 4)
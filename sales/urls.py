@@ -1,11 +1,12 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
-from .views import CustomerViewSet, BillViewSet, CustomerPaymentViewSet
+from .views import CustomerViewSet, BillViewSet, CustomerPaymentViewSet, SalesReportViewSet
 
 router = DefaultRouter()
 router.register("customers", CustomerViewSet, basename="customer")
 router.register("bills", BillViewSet, basename="bill")
 router.register("payments", CustomerPaymentViewSet, basename="payment")
+router.register("reports", SalesReportViewSet, basename="sales-report")
 
 urlpatterns = [
     path("", include(router.urls)),
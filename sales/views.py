@@ -2,22 +2,40 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.filters import SearchFilter
-from core.mixins import TenantViewSetMixin
+from core.idempotency import HEADER as IDEMPOTENCY_HEADER, idempotent
+from core.mixins import TenantETagMixin, TenantViewSetMixin
 from core.permissions import IsTenantUser
+from core.streaming import streaming_csv_response, streaming_json_response
 from rest_framework.permissions import AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+import datetime
+from decimal import Decimal
 
+from . import bill_cache, gst, rollups
 from .models import Customer, Bill, CustomerPayment
-from .serializers import CustomerSerializer, BillCreateSerializer, BillDetailSerializer, CustomerPaymentSerializer
+from .services import IdempotencyKeyReused, create_bills_batch
+from .signals import CUSTOMERS_NAMESPACE
+from .serializers import (
+    CustomerSerializer,
+    BillCreateSerializer,
+    BillDetailSerializer,
+    BillSummarySerializer,
+    BillBatchSerializer,
+    CustomerPaymentSerializer,
+)
 
 
-class CustomerViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
+class CustomerViewSet(TenantETagMixin, TenantViewSetMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [IsTenantUser]
     filter_backends = [SearchFilter]
     search_fields = ["phone"]
+    etag_namespace = CUSTOMERS_NAMESPACE
 
 
 class BillViewSet(TenantViewSetMixin, viewsets.GenericViewSet):
@@ -32,25 +50,249 @@ class BillViewSet(TenantViewSetMixin, viewsets.GenericViewSet):
     def get_serializer_class(self):
         if self.action == "create":
             return BillCreateSerializer
+        elif self.is_summary():
+            return BillSummarySerializer
         else:
             return BillDetailSerializer
 
+    def is_summary(self):
+        return self.action == "list" and self.request.query_params.get("view") == "summary"
+
+    def get_queryset(self):
+        """
+        Customer names are joined in, and summary mode annotates an item
+        count. Full bills are rendered through bill_cache, which prefetches
+        items (with their products) for uncached bills in one query, so the
+        query count does not grow with the page.
+        """
+        queryset = super().get_queryset().select_related("customer")
+        if self.is_summary():
+            return queryset.annotate(item_count=Count("items"))
+        return queryset
+
     def list(self, request):
+        """
+        List bills with their items, or header-only rows with an
+        ``item_count`` when called with ``?view=summary``.
+        """
         qs = self.filter_queryset(self.get_queryset())
-        serializer = BillDetailSerializer(qs, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(qs)
+        bills = page if page is not None else list(qs)
+        if self.is_summary():
+            data = BillSummarySerializer(bills, many=True).data
+        else:
+            data = bill_cache.render(bills)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
 
     def retrieve(self, request, pk=None):
+        tenant = getattr(request, "tenant", None)
+        if tenant is not None and str(pk).isdigit():
+            cached = bill_cache.get(tenant.pk, int(pk))
+            if cached is not None:
+                return Response(cached)
         bill = self.get_object()
-        serializer = BillDetailSerializer(bill)
-        return Response(serializer.data)
+        return Response(bill_cache.render([bill])[0])
 
+    @idempotent
     def create(self, request):
-        serializer = BillCreateSerializer(data=request.data, context={"request": request})
+        data = request.data
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key and not data.get("idempotency_key"):
+            # the bill's unique idempotency_key backs the header as well
+            data = data.copy()
+            data["idempotency_key"] = key
+        serializer = BillCreateSerializer(data=data, context={"request": request})
         serializer.is_valid(raise_exception=True)
-        bill = serializer.save()
-        out = BillDetailSerializer(bill)
-        return Response(out.data, status=status.HTTP_201_CREATED)
+        try:
+            bill = serializer.save()
+        except IdempotencyKeyReused as e:
+            return Response({"error": str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        # render (and cache) the bill now, so reprints are served from cache
+        response = Response(
+            bill_cache.render([bill])[0],
+            # a replayed idempotency key returns the bill created the first time
+            status=status.HTTP_200_OK if bill.replayed else status.HTTP_201_CREATED
+        )
+        # expose create_bill's per-phase timings to clients and APM tools
+        response["Server-Timing"] = ", ".join(
+            f"{phase};dur={ms}" for phase, ms in getattr(bill, "timings", {}).items()
+        )
+        return response
+
+    @action(detail=False, methods=["POST"], url_path="batch")
+    def batch(self, request):
+        """
+        Create many bills in one request, e.g. bills queued offline.
+
+        Body: ``{"mode": "atomic" | "chunked", "chunk_size": 50, "bills": [...]}``
+        where each bill is a create payload with an optional
+        ``idempotency_key``; replays of known keys are reported as duplicates.
+        Atomic batches and chunks hold at most 100 bills, so each transaction
+        stays within MAX_WRITE_TRANSACTION_SECONDS.
+        Returns per-bill results; an atomic batch that failed returns 400.
+        """
+        serializer = BillBatchSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        results, committed = create_bills_batch(
+            request.tenant,
+            getattr(request.user, "staff_profile", None),
+            **serializer.validated_data,
+        )
+        return Response(
+            {"committed": committed, "results": results},
+            status=status.HTTP_200_OK if committed else status.HTTP_400_BAD_REQUEST
+        )
+
+
+def parse_date_range(params, default_days):
+    """
+    Read an inclusive ``from``/``to`` date range from query params, ending
+    today and spanning ``default_days`` days by default.
+
+    Returns (start, end) or None when a date is malformed or the range is reversed.
+    """
+    try:
+        end = parse_date(params["to"]) if params.get("to") else timezone.localdate()
+        start = (
+            parse_date(params["from"]) if params.get("from")
+            else end - datetime.timedelta(days=default_days - 1)
+        )
+    except ValueError:
+        return None
+    if start is None or end is None or start > end:
+        return None
+    return start, end
+
+
+def parse_gst_period(params):
+    """
+    Read the GST report period: ``month=YYYY-MM``, ``fy=YYYY`` (the Indian
+    financial year starting 1 April YYYY, "YYYY-YY" also accepted) or a
+    ``from``/``to`` range. Defaults to the current month.
+
+    Returns (start, end) or None when the parameters are malformed.
+    """
+    try:
+        if params.get("month"):
+            year, month = (int(part) for part in params["month"].split("-"))
+            start = datetime.date(year, month, 1)
+            end = (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+            return start, end - datetime.timedelta(days=1)
+        if params.get("fy"):
+            year = int(params["fy"].split("-")[0])
+            return datetime.date(year, 4, 1), datetime.date(year + 1, 3, 31)
+    except ValueError:
+        return None
+    if params.get("from") or params.get("to"):
+        return parse_date_range(params, 1)
+    today = timezone.localdate()
+    return today.replace(day=1), today
+
+
+class SalesReportViewSet(viewsets.ViewSet):
+    """
+    Sales totals served from DailySalesRollup, never from Bill/BillItem.
+
+    Every report takes optional ``from`` and ``to`` dates (inclusive) and
+    returns one row per period with a per-payment-type breakdown.
+    """
+    permission_classes = [IsTenantUser]
+
+    # default range per report, in days
+    DEFAULT_DAYS = {"daily": 30, "weekly": 12 * 7, "monthly": 365}
+
+    def report(self, request, period):
+        date_range = parse_date_range(request.query_params, self.DEFAULT_DAYS[period])
+        if date_range is None:
+            return Response(
+                {"error": "'from' and 'to' must be ISO dates (YYYY-MM-DD) with from <= to"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start, end = date_range
+        rows, totals = rollups.report(request.tenant, period, start, end)
+        return Response({
+            "period": period,
+            "from": start,
+            "to": end,
+            "totals": self.format_totals(totals),
+            "results": [
+                {
+                    "period_start": row["period_start"],
+                    **self.format_totals(row),
+                    "payment_types": {
+                        payment_type: self.format_totals(values)
+                        for payment_type, values in row["payment_types"].items()
+                    },
+                }
+                for row in rows
+            ],
+        })
+
+    def format_totals(self, values):
+        return {
+            "bill_count": values["bill_count"],
+            **{field: str(values[field].quantize(rollups.CENT)) for field in rollups.TOTAL_FIELDS},
+        }
+
+    @action(detail=False, methods=["GET"])
+    def daily(self, request):
+        return self.report(request, "daily")
+
+    @action(detail=False, methods=["GET"])
+    def weekly(self, request):
+        return self.report(request, "weekly")
+
+    @action(detail=False, methods=["GET"])
+    def monthly(self, request):
+        return self.report(request, "monthly")
+
+    @action(detail=False, methods=["GET"], url_path="gst", url_name="gst")
+    def gst_summary(self, request):
+        """
+        GST summary per HSN code and rate with B2B/B2C splits.
+
+        Period: ``month``, ``fy`` or ``from``/``to`` (see parse_gst_period).
+        ``?export=csv`` or ``?export=json`` streams the rows as a download
+        (``&compress=gzip`` compresses the CSV).
+        """
+        period = parse_gst_period(request.query_params)
+        if period is None:
+            return Response(
+                {"error": "Use month=YYYY-MM, fy=YYYY or from/to ISO dates (YYYY-MM-DD)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start, end = period
+
+        export = request.query_params.get("export")
+        filename = f"gst-summary-{start}-{end}"
+        if export == "csv":
+            rows = gst.summary_rows(request.tenant, start, end)
+            return streaming_csv_response(
+                f"{filename}.csv",
+                gst.COLUMNS,
+                ([row[column] for column in gst.COLUMNS] for row in rows),
+                compress=request.query_params.get("compress") == "gzip",
+            )
+        if export == "json":
+            return streaming_json_response(
+                f"{filename}.json",
+                {"from": start, "to": end},
+                gst.summary_rows(request.tenant, start, end),
+            )
+
+        rows, totals = gst.summary(request.tenant, start, end)
+        return Response({
+            "from": start,
+            "to": end,
+            "totals": self.format_amounts(totals),
+            "results": [self.format_amounts(row) for row in rows],
+        })
+
+    def format_amounts(self, row):
+        # decimals as strings, as in the streamed exports and serializers
+        return {key: str(value) if isinstance(value, Decimal) else value for key, value in row.items()}
 
 
 class CustomerPaymentViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
@@ -66,4 +308,4 @@ class CustomerPaymentViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
             cust = payment.customer
             from django.db.models import F
             cust.spending_balance = F('spending_balance') - payment.amount
-            cust.save(update_fields=['spending_balance'])
+            cust.save(update_fields=['spending_balance', 'updated_at'])
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from sync.models import Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('object_type', 'object_id', 'tenant', 'deleted_at')
+    list_filter = ('object_type',)
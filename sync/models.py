@@ -0,0 +1,36 @@
+from django.db import models
+from django.utils import timezone
+from authentication.models import Tenant
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted category, product or customer, so delta sync clients
+    (GET /api/sync/changes/) can drop it from their offline copy.
+    """
+    OBJECT_TYPES = [
+        ('category', 'Category'),
+        ('product', 'Product'),
+        ('customer', 'Customer'),
+    ]
+
+    tombstone_id = models.BigAutoField(primary_key=True)
+
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name='tombstones',
+    )
+
+    object_type = models.CharField(max_length=20, choices=OBJECT_TYPES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['tenant', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type} {self.object_id} deleted at {self.deleted_at}"
@@ -0,0 +1,31 @@
+"""
+Signal receivers recording a Tombstone for every deleted category, product
+and customer.
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from authentication.models import Tenant
+from inventory.models import Category, Product
+from sales.models import Customer
+from .models import Tombstone
+
+OBJECT_TYPES = {
+    Category: 'category',
+    Product: 'product',
+    Customer: 'customer',
+}
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Customer)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # rows removed because their tenant is deleted need no tombstone
+    if isinstance(origin, Tenant):
+        return
+    Tombstone.objects.create(
+        tenant_id=instance.tenant_id,
+        object_type=OBJECT_TYPES[sender],
+        object_id=instance.pk,
+    )
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from inventory.models import Category, Product
+from inventory.tests import create_tenant_client
+from sales.models import Customer
+from .models import Tombstone
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncChangesTest(TestCase):
+    def setUp(self):
+        self.tenant, self.client = create_tenant_client("Test Store", "owner@store.com")
+        self.category = Category.objects.create(tenant=self.tenant, name="Shoes")
+        self.product = Product.objects.create(
+            tenant=self.tenant,
+            category=self.category,
+            name="Runner",
+            sku="RUN-1",
+            purchase_price=Decimal("10.00"),
+            selling_price=Decimal("20.00"),
+        )
+        self.customer = Customer.objects.create(tenant=self.tenant, name="Walk-in")
+        self.url = reverse("sync-changes")
+
+    def sync(self, since=None, limit=None):
+        params = {key: value for key, value in [("since", since), ("limit", limit)] if value}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_initial_sync_pages_through_all_types(self):
+        first = self.sync(limit=2)
+        self.assertTrue(first["has_more"])
+        second = self.sync(first["next"], limit=2)
+        self.assertFalse(second["has_more"])
+
+        changes = first["changes"] + second["changes"]
+        self.assertEqual(
+            [(change["type"], change["id"]) for change in changes],
+            [("category", self.category.pk), ("product", self.product.pk), ("customer", self.customer.pk)],
+        )
+        self.assertEqual(changes[1]["data"]["sku"], "RUN-1")
+
+        # nothing new since the last cursor
+        self.assertEqual(self.sync(second["next"])["changes"], [])
+
+    def test_updates_and_deletions_after_the_cursor(self):
+        cursor = self.sync()["next"]
+
+        self.client.post(reverse("product-add-stock", args=[self.product.pk]), {"quantity": 4})
+        customer_id = self.customer.pk
+        self.customer.delete()
+
+        data = self.sync(cursor)
+        changes = {(change["type"], change["op"]): change for change in data["changes"]}
+        self.assertEqual(set(changes), {("product", "upsert"), ("customer", "delete")})
+        self.assertEqual(changes[("product", "upsert")]["data"]["current_stock"], 4)
+        self.assertEqual(changes[("customer", "delete")]["id"], customer_id)
+
+    def test_cursor_is_tenant_bound(self):
+        cursor = self.sync()["next"]
+        _, other = create_tenant_client("Other Store", "owner@other.com")
+        response = other.get(self.url, {"since": cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_tenant_deletion_leaves_no_tombstones(self):
+        self.tenant.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class SyncSettleWindowTest(TestCase):
+    def test_settle_window_covers_the_longest_write_transaction(self):
+        # rows of a transaction still running are never older than the horizon
+        self.assertGreater(settings.SYNC_SETTLE_SECONDS, settings.MAX_WRITE_TRANSACTION_SECONDS)
@@ -0,0 +1,161 @@
+import datetime
+import heapq
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.permissions import IsTenantUser
+from inventory import stock
+from inventory.models import Category, Product
+from inventory.serializers import CategorySerializer, ProductSerializer
+from sales.models import Customer
+from sales.serializers import CustomerSerializer
+
+from .models import Tombstone
+
+CURSOR_SALT = "sync.changes"
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+# (type, model, serializer) in merge order; tombstones come after them
+SOURCES = [
+    ("category", Category, CategorySerializer),
+    ("product", Product, ProductSerializer),
+    ("customer", Customer, CustomerSerializer),
+]
+TOMBSTONE_RANK = len(SOURCES)
+# rank of the cursor handed out once everything up to the horizon was sent
+END_RANK = TOMBSTONE_RANK + 1
+
+
+class SyncChangesView(APIView):
+    """
+    GET /api/sync/changes/?since=<cursor>&limit=<n>
+
+    Categories, products and customers changed after the cursor, plus
+    deletions, as one stream ordered by (change time, type, id):
+
+        {"changes": [{"type", "op": "upsert" | "delete", "id", "changed_at", "data"}],
+         "next": <cursor>, "has_more": bool}
+
+    Without ``since`` the stream starts from the beginning (initial sync).
+    Clients keep ``next`` and call again while ``has_more`` is true.
+
+    Changes from the last SYNC_SETTLE_SECONDS are held back, so rows written
+    by transactions that have not committed yet cannot be skipped over. This
+    relies on writers keeping transactions under MAX_WRITE_TRANSACTION_SECONDS
+    (core.transactions.bounded_atomic, best effort), a bound
+    SYNC_SETTLE_SECONDS is derived from.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsTenantUser]
+
+    def get(self, request):
+        tenant = request.tenant
+        try:
+            limit = min(max(int(request.query_params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = DEFAULT_LIMIT
+
+        since = request.query_params.get("since")
+        position = None
+        if since:
+            position = self.decode_cursor(since, tenant)
+            if position is None:
+                return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+        horizon = timezone.now() - datetime.timedelta(seconds=getattr(settings, "SYNC_SETTLE_SECONDS", 20))
+
+        streams = []
+        for rank, (kind, model, _) in enumerate(SOURCES):
+            queryset = model.objects.filter(tenant=tenant)
+            if model is Product:
+                queryset = stock.with_live_stock(queryset)
+            streams.append(self.changed(queryset, "updated_at", rank, position, horizon, limit))
+        streams.append(self.changed(
+            Tombstone.objects.filter(tenant=tenant), "deleted_at", TOMBSTONE_RANK, position, horizon, limit
+        ))
+
+        merged = list(heapq.merge(*streams))[:limit + 1]
+        has_more = len(merged) > limit
+        page = merged[:limit]
+
+        if has_more:
+            changed_at, rank, pk, _ = page[-1]
+            next_position = (changed_at, rank, pk)
+        else:
+            # everything up to the horizon has been sent
+            next_position = (horizon, END_RANK, 0)
+
+        return Response({
+            "changes": self.render(request, page),
+            "next": self.encode_cursor(tenant, next_position),
+            "has_more": has_more,
+        })
+
+    def changed(self, queryset, field, rank, position, horizon, limit):
+        """
+        Up to limit + 1 rows of one source after ``position``, as
+        (changed_at, rank, pk, obj) tuples in stream order.
+        """
+        queryset = queryset.filter(**{f"{field}__lte": horizon})
+        if position is not None:
+            changed_at, after_rank, after_pk = position
+            later = Q(**{f"{field}__gt": changed_at})
+            if rank > after_rank:
+                queryset = queryset.filter(later | Q(**{field: changed_at}))
+            elif rank == after_rank:
+                queryset = queryset.filter(later | Q(**{field: changed_at, "pk__gt": after_pk}))
+            else:
+                queryset = queryset.filter(later)
+        rows = queryset.order_by(field, "pk")[:limit + 1]
+        return [(getattr(obj, field), rank, obj.pk, obj) for obj in rows]
+
+    def render(self, request, page):
+        by_rank = {}
+        for _, rank, _, obj in page:
+            by_rank.setdefault(rank, []).append(obj)
+
+        # serialize each type in one batch
+        data = {}
+        for rank, (_, _, serializer_class) in enumerate(SOURCES):
+            objects = by_rank.get(rank, [])
+            serialized = serializer_class(objects, many=True, context={"request": request}).data
+            data.update(((rank, obj.pk), item) for obj, item in zip(objects, serialized))
+
+        changes = []
+        for changed_at, rank, pk, obj in page:
+            if rank == TOMBSTONE_RANK:
+                changes.append({
+                    "type": obj.object_type, "op": "delete", "id": obj.object_id,
+                    "changed_at": changed_at,
+                })
+            else:
+                changes.append({
+                    "type": SOURCES[rank][0], "op": "upsert", "id": pk,
+                    "changed_at": changed_at, "data": data[(rank, pk)],
+                })
+        return changes
+
+    def encode_cursor(self, tenant, position):
+        changed_at, rank, pk = position
+        return signing.dumps(
+            {"t": tenant.pk, "c": changed_at.isoformat(), "k": rank, "i": pk},
+            salt=CURSOR_SALT, compress=True,
+        )
+
+    def decode_cursor(self, cursor, tenant):
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+            changed_at = parse_datetime(payload["c"])
+            if payload["t"] != tenant.pk or changed_at is None:
+                return None
+            return changed_at, int(payload["k"]), int(payload["i"])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return None